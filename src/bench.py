@@ -0,0 +1,288 @@
+"""
+Benchmarks for maze construction, generation, solving and rendering across grid sizes.
+
+Run the benchmarks and write the results as JSON:
+
+    python3 src/bench.py run --sizes 16x12 256x192 1024x768 --seeds 1 2 3 --out results.json
+
+Compare two runs and fail if anything got slower than the threshold:
+
+    python3 src/bench.py compare baseline.json results.json --threshold 0.1
+"""
+from core.maze import Maze
+from core.gui import MazeRenderer
+from constants import NUM_ROWS, NUM_COLS
+from array import array
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Grid sizes (columns x rows) swept by default, from the default maze of constants.py up to millions of cells
+DEFAULT_SIZES = [(NUM_COLS, NUM_ROWS), (64, 48), (256, 192), (1024, 768), (2048, 1536)]
+DEFAULT_SEEDS = [1, 2, 3]
+DEFAULT_GENERATORS = ["backtracker", "binary_tree", "sidewinder", "kruskal", "prim", "wilson", "eller"]
+DEFAULT_SOLVERS = ["dfs", "bfs", "astar", "bidirectional"]
+DEFAULT_QUERIES = 1000  # The number of random queries of each batch of the "query" case
+
+# Measuring memory with tracemalloc slows allocation-heavy code down a lot, so it is skipped above this size
+DEFAULT_MEMORY_MAX_CELLS = 300_000
+
+
+class _TclCanvas():
+    def __init__(self):
+        """
+        Initializes a stand-in for a Tk canvas that runs the renderer's Tcl commands in a Tcl interpreter
+        without Tk, so that rendering can be benchmarked on machines with no display.
+        """
+        import tkinter
+        self.tk = tkinter.Tcl()
+        self._w = ".canvas"
+        self.tk.eval("proc .canvas {args} {}") # Accept and ignore every canvas command
+
+
+def parse_size(text: str) -> tuple:
+    """
+    Parses a grid size written as COLSxROWS.
+
+    Args:
+        text (str): The size, e.g. "16x12".
+    """
+    cols, _, rows = text.lower().partition("x")
+    return int(cols), int(rows)
+
+
+def _generator_spec(spec: str) -> tuple:
+    """
+    Splits a generator written as ALGORITHM or ALGORITHM:BACKEND into (algorithm, backend).
+    """
+    algorithm, _, backend = spec.partition(":")
+    return algorithm, backend or "python"
+
+
+def _measure(function, seeds: list, memory: bool) -> dict:
+    """
+    Runs function(seed) once per seed and returns the median wall time and, optionally, the peak
+    memory allocated during one extra run under tracemalloc.
+    """
+    times = []
+    for seed in seeds:
+        started = time.perf_counter()
+        function(seed)
+        times.append(time.perf_counter() - started)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function(seeds[0])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"time_s": statistics.median(times), "times_s": times, "peak_bytes": peak}
+
+
+def run_benchmarks(sizes: list = None, seeds: list = None, generators: list = None, solvers: list = None,
+                   render: bool = True, memory_max_cells: int = DEFAULT_MEMORY_MAX_CELLS, log=None,
+                   queries: int = DEFAULT_QUERIES) -> dict:
+    """
+    Runs every benchmark case for every grid size and returns the results.
+
+    The cases are:
+    - "construct": creating a Maze with every wall standing, without generating it.
+    - "generate": Maze.generate() with each generator, given as ALGORITHM or ALGORITHM:BACKEND.
+    - "solve": Maze.solve() with each solver on a maze made by the backtracker.
+    - "render": drawing a whole maze with MazeRenderer, into a Tcl interpreter without a display.
+    - "query": Maze.query_batch() with random start cells, to the exit ("exit") and to random goals ("pairs"),
+      on the indexed maze of each seed. These results also hold the queries per second.
+
+    Args:
+        sizes (list, optional): The (columns, rows) sizes to sweep. Defaults to DEFAULT_SIZES.
+        seeds (list, optional): The seeds to run each case with. Defaults to DEFAULT_SEEDS.
+        generators (list, optional): The generators to benchmark. Defaults to DEFAULT_GENERATORS.
+        solvers (list, optional): The solvers to benchmark. Defaults to DEFAULT_SOLVERS.
+        render (bool, optional): Whether to benchmark rendering (needs tkinter, not a display). Defaults to True.
+        memory_max_cells (int, optional): The largest maze whose peak memory is measured. Defaults to 300,000.
+        log (file, optional): Where to print progress, e.g. sys.stderr. Defaults to None.
+        queries (int, optional): The number of queries per batch of the "query" case, 0 to skip it. Defaults to 1000.
+
+    Returns:
+        dict: {"meta": {...}, "results": [...]} with one result per case and size, holding the median wall
+        time over the seeds, the peak memory allocated (or None when not measured) and the cells per second.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    seeds = seeds or DEFAULT_SEEDS
+    generators = generators or DEFAULT_GENERATORS
+    solvers = solvers or DEFAULT_SOLVERS
+
+    results = []
+    for num_cols, num_rows in sizes:
+        cells = num_cols * num_rows
+        memory = cells <= memory_max_cells
+        cases = []
+
+        # Creating the packed grid and the cell views
+        cases.append(("construct", None, lambda seed: Maze(0, 0, num_rows, num_cols, 1, 1, seed=seed, generate=False)))
+
+        # Generation with each generator
+        for spec in generators:
+            algorithm, backend = _generator_spec(spec)
+            maze = Maze(0, 0, num_rows, num_cols, 1, 1, generate=False)
+            def generate(seed, maze=maze, algorithm=algorithm, backend=backend):
+                # Regenerate the walls of the same maze, seeded like Maze(seed=seed) would be
+                maze.generate(algorithm, backend, seed=seed)
+            cases.append(("generate", spec, generate))
+
+        # Solving with each solver, on the maze generated for each seed
+        mazes = {seed: Maze(0, 0, num_rows, num_cols, 1, 1, seed=seed) for seed in seeds}
+        for algorithm in solvers:
+            def solve(seed, algorithm=algorithm):
+                mazes[seed].solve(algorithm)
+            cases.append(("solve", algorithm, solve))
+
+        # Drawing the whole maze with the batched renderer
+        if render:
+            try:
+                renderer = MazeRenderer(_TclCanvas(), 0, 0, 1, 1)
+            except Exception: # tkinter or Tcl is not available
+                renderer = None
+            if renderer is not None:
+                cases.append(("render", None, lambda seed: renderer.draw(mazes[seed]._grid)))
+
+        # Batches of path queries, answered from the index built once per maze
+        if queries:
+            rng = random.Random(0)
+            starts = array("I")
+            goals = array("I")
+            for _ in range(queries):
+                starts.extend((rng.randrange(num_cols), rng.randrange(num_rows)))
+                goals.extend((rng.randrange(num_cols), rng.randrange(num_rows)))
+            for maze in mazes.values():
+                maze.index()
+            cases.append(("query", "exit", lambda seed: mazes[seed].query_batch(starts)))
+            cases.append(("query", "pairs", lambda seed: mazes[seed].query_batch(starts, goals)))
+
+        for case, variant, function in cases:
+            measured = _measure(function, seeds, memory)
+            result = {
+                "case": case,
+                "variant": variant,
+                "cols": num_cols,
+                "rows": num_rows,
+                "cells": cells,
+                "seeds": list(seeds),
+                **measured,
+                "cells_per_s": cells / measured["time_s"] if measured["time_s"] > 0 else None,
+            }
+            if case == "query":
+                result["queries_per_s"] = queries / measured["time_s"] if measured["time_s"] > 0 else None
+            results.append(result)
+            if log is not None:
+                rate = (f"{result['queries_per_s'] or 0:,.0f} queries/s" if case == "query"
+                        else f"{result['cells_per_s'] or 0:,.0f} cells/s")
+                print(f"{case:<10} {variant or '':<16} {num_cols}x{num_rows:<10} "
+                      f"{measured['time_s']:.6f} s  {rate}", file=log)
+        mazes.clear()
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def _key(result: dict) -> tuple:
+    """
+    Returns the key identifying the same benchmark in two runs.
+    """
+    return (result["case"], result["variant"], result["cols"], result["rows"])
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """
+    Compares two benchmark runs case by case.
+
+    Args:
+        baseline (dict): The results of the reference run, as returned by run_benchmarks().
+        current (dict): The results of the run to check.
+        threshold (float, optional): The relative slowdown above which a case counts as a regression. Defaults to 0.1 (10%).
+
+    Returns:
+        list: One dict per case present in both runs, with the two times, their ratio (current / baseline)
+        and whether it is a regression.
+    """
+    baseline_results = {_key(result): result for result in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        before = baseline_results.get(_key(result))
+        if before is None:
+            continue
+        ratio = result["time_s"] / before["time_s"] if before["time_s"] > 0 else float("inf")
+        comparison.append({
+            "case": result["case"],
+            "variant": result["variant"],
+            "cols": result["cols"],
+            "rows": result["rows"],
+            "baseline_s": before["time_s"],
+            "current_s": result["time_s"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return comparison
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark maze generation, solving and rendering.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks and print or save the results as JSON")
+    run.add_argument("--sizes", nargs="+", type=parse_size, default=DEFAULT_SIZES, metavar="COLSxROWS")
+    run.add_argument("--seeds", nargs="+", type=int, default=DEFAULT_SEEDS)
+    run.add_argument("--generators", nargs="+", default=DEFAULT_GENERATORS, metavar="ALGORITHM[:BACKEND]")
+    run.add_argument("--solvers", nargs="+", default=DEFAULT_SOLVERS)
+    run.add_argument("--no-render", action="store_true", help="skip the rendering benchmark")
+    run.add_argument("--queries", type=int, default=DEFAULT_QUERIES,
+                     help="the number of random queries per batch of the query benchmark, 0 to skip it")
+    run.add_argument("--memory-max-cells", type=int, default=DEFAULT_MEMORY_MAX_CELLS,
+                     help="only measure peak memory for mazes up to this many cells")
+    run.add_argument("--out", help="write the JSON results to this file instead of stdout")
+
+    compare = commands.add_parser("compare", help="compare two JSON results and report regressions")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.1, help="relative slowdown counted as a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.seeds, args.generators, args.solvers,
+                                 not args.no_render, args.memory_max_cells, log=sys.stderr, queries=args.queries)
+        if args.out:
+            with open(args.out, "w") as file:
+                json.dump(results, file, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+            print()
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    comparison = compare_results(baseline, current, args.threshold)
+    for row in comparison:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['case']:<10} {row['variant'] or '':<16} {row['cols']}x{row['rows']:<10} "
+              f"{row['baseline_s']:.6f} s -> {row['current_s']:.6f} s  x{row['ratio']:.2f} {flag}")
+    return 1 if any(row["regression"] for row in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
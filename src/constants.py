@@ -15,6 +15,8 @@ MARGIN = 50
 
 # Animation settings
 ANIMATION_SPEED = 0.05  # seconds between frames (lower = faster)
+ANIMATION_FPS = 60  # frames per second of the scheduled animation in main.py
+ANIMATION_DURATION = 10  # seconds the whole generation and solving animation should take, whatever the maze size
 
 # Colors
 WALL_COLOR = "white"
@@ -23,4 +25,7 @@ BACKTRACK_COLOR = "gray"
 ERASER_COLOR = "black"
 
 # Cell line settings
-LINE_WIDTH = 2
\ No newline at end of file
+LINE_WIDTH = 2
+
+# Level of detail: mazes whose cells are smaller than this many pixels are drawn as a bitmap with pan and zoom
+LOD_MIN_CELL_SIZE = 4
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Parallel generation and solving of many seeded mazes across a process pool.
+
+Workers build and solve headless mazes and send back only packed data (the wall bytes and the path as
+an array of cell indices), which is much cheaper to pickle than a grid of Cell objects.
+"""
+from core.grid import Grid
+from core.maze import Maze
+from array import array
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import os
+import time
+
+
+class BatchResult():
+    def __init__(self, seed: int, num_cols: int, num_rows: int, walls: bytes, path: array,
+                 nodes_expanded: int, generate_s: float, solve_s: float):
+        """
+        Initializes the result of generating and solving one maze of a batch.
+
+        Args:
+            seed (int): The seed of the maze.
+            num_cols (int): The number of columns of the maze.
+            num_rows (int): The number of rows of the maze.
+            walls (bytes): The wall bytes of the maze, in the layout of Grid.walls.
+            path (array): The indices of the cells on the path from the entrance to the exit.
+            nodes_expanded (int): The number of cells the solver expanded.
+            generate_s (float): The time spent generating the maze, in seconds.
+            solve_s (float): The time spent solving the maze, in seconds.
+        """
+        self.seed = seed
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.walls = walls
+        self.path = path
+        self.nodes_expanded = nodes_expanded
+        self.generate_s = generate_s
+        self.solve_s = solve_s
+
+    def to_maze(self, **kwargs) -> Maze:
+        """
+        Returns a Maze with the walls of this result. Keyword arguments are passed to Maze.from_grid().
+        """
+        return Maze.from_grid(Grid(self.num_cols, self.num_rows, bytearray(self.walls)), seed=self.seed, **kwargs)
+
+
+def _generate_one(seed: int, num_rows: int, num_cols: int, algorithm: str, backend: str, solver: str) -> tuple:
+    """
+    Generates and solves one maze in a worker process and returns its packed data as a tuple.
+    """
+    started = time.perf_counter()
+    maze = Maze(0, 0, num_rows, num_cols, 1, 1, seed=seed, algorithm=algorithm, backend=backend)
+    generated = time.perf_counter()
+    result = maze.solve(solver) if solver is not None else None
+    solved = time.perf_counter()
+    path = result.path.tobytes() if result is not None else b""
+    expanded = result.nodes_expanded if result is not None else 0
+    return seed, bytes(maze._grid.walls), path, expanded, generated - started, solved - generated
+
+
+def _to_result(data: tuple, num_cols: int, num_rows: int) -> BatchResult:
+    """
+    Turns the tuple sent back by _generate_one() into a BatchResult.
+    """
+    seed, walls, path_bytes, expanded, generate_s, solve_s = data
+    path = array("I")
+    path.frombytes(path_bytes)
+    return BatchResult(seed, num_cols, num_rows, walls, path, expanded, generate_s, solve_s)
+
+
+def iter_batch(seeds, num_rows: int, num_cols: int, workers: int = None, algorithm: str = "backtracker",
+               backend: str = "python", solver: str = "bfs", max_pending: int = None):
+    """
+    Generates and solves one maze per seed across a process pool, yielding each result as soon as it
+    is ready (not in seed order). At most max_pending mazes are queued or in flight at once, so memory
+    stays bounded however many seeds there are and the results can be written out as they arrive.
+
+    Args:
+        seeds (iterable): The seeds of the mazes, may be a lazy iterator.
+        num_rows (int): The number of rows of every maze.
+        num_cols (int): The number of columns of every maze.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        algorithm (str, optional): The generation algorithm, see Maze.generate(). Defaults to "backtracker".
+        backend (str, optional): The generation backend, see Maze.generate(). Defaults to "python".
+        solver (str, optional): The solver, see Maze.solve(), or None to skip solving. Defaults to "bfs".
+        max_pending (int, optional): The maximum number of mazes in flight. Defaults to twice the number of workers.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        seeds = iter(seeds)
+        pending = set()
+        while True:
+            # Keep the pool busy without queueing every seed at once
+            for seed in seeds:
+                pending.add(executor.submit(_generate_one, seed, num_rows, num_cols, algorithm, backend, solver))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _to_result(future.result(), num_cols, num_rows)
+
+
+def generate_batch(seeds, num_rows: int, num_cols: int, workers: int = None, algorithm: str = "backtracker",
+                   backend: str = "python", solver: str = "bfs") -> list:
+    """
+    Generates and solves one maze per seed across a process pool and returns the results in seed order.
+    See iter_batch() for the arguments, and to process results as they complete instead.
+    """
+    seeds = list(seeds)
+    order = {seed: n for n, seed in enumerate(seeds)}
+    results = list(iter_batch(seeds, num_rows, num_cols, workers, algorithm, backend, solver))
+    results.sort(key=lambda result: order[result.seed])
+    return results
@@ -0,0 +1,216 @@
+"""
+Bit-parallel reachability and distances on a packed Grid, using Python integers as bitboards.
+
+The whole grid is held as two integers with one bit per cell (bit k for cell k, row by row like Grid):
+
+    east   bit k set if cell k is open to its right neighbor
+    south  bit k set if cell k is open to the cell below it
+
+A set of cells is one more integer of the same layout, so moving every cell of a set one step in a
+direction is a shift and a mask over the whole grid at once: cells open to the east move with
+(cells & east) << 1, cells whose west neighbor is open to them move with (cells >> 1) & east, and
+likewise with shifts of num_cols for south and north. The last column has no east bits and the last
+row no south bits, so nothing wraps around. A bitset of cells converts to the visited bitmap of a Grid
+with to_bitmap(), since both store cell k in bit k % 8 of byte k // 8.
+
+Every step costs a few operations on integers of size / 8 bytes, whatever the number of cells in the
+set. This pays off when many cells move at once: open or braided grids, and flood fills, where
+reachable() follows a whole corridor per step. In a perfect maze made of long winding corridors (e.g.
+the backtracker), the frontier is only a few cells wide and a breadth-first search one cell at a time,
+like core.solvers or core.index, is faster.
+
+search() also returns a shortest path, and is available as the "bitboard" solver of core.solvers (and so
+of Maze.solve()), for the grids where it is the faster choice.
+"""
+from core.grid import Grid, RIGHT_WALL, BOTTOM_WALL
+from array import array
+
+# Maps a wall byte to the digit "1" if the cell is open to the right (or below), "0" otherwise
+_EAST_DIGITS = bytes(ord("0") if wall & RIGHT_WALL else ord("1") for wall in range(256))
+_SOUTH_DIGITS = bytes(ord("0") if wall & BOTTOM_WALL else ord("1") for wall in range(256))
+
+
+class BitBoard():
+    def __init__(self, grid: Grid):
+        """
+        Initializes a BitBoard from the walls of a grid.
+
+        Building it takes a couple of bytes.translate() and int() conversions, without a Python loop per cell.
+
+        Args:
+            grid (Grid): The grid to read the walls from. The board is only valid while grid.version is unchanged.
+        """
+        num_cols = grid.num_cols
+        num_rows = grid.num_rows
+        self.num_cols = num_cols
+        self.size = grid.size
+        self.version = grid.version  # The version of the walls the board was built from
+        self._bitmap_size = len(grid.visited)
+
+        if self.size == 0:
+            self.east = self.south = 0
+            return
+
+        # The digits of the translated walls are read in reverse so that cell k ends up in bit k
+        walls = bytes(grid.walls)
+        not_last_column = int(("0" + "1" * (num_cols - 1)) * num_rows, 2)
+        self.east = int(walls.translate(_EAST_DIGITS)[::-1], 2) & not_last_column
+        self.south = int(walls.translate(_SOUTH_DIGITS)[::-1], 2) & ((1 << (self.size - num_cols)) - 1)
+
+    def step(self, cells: int) -> int:
+        """
+        Returns the cells one open passage away from any of the given cells.
+
+        Args:
+            cells (int): A bitset of cells.
+        """
+        east = self.east
+        south = self.south
+        num_cols = self.num_cols
+        return (((cells & east) << 1) | ((cells >> 1) & east)
+                | ((cells & south) << num_cols) | ((cells >> num_cols) & south))
+
+    def frontiers(self, start: int):
+        """
+        Yields the breadth-first frontiers from the start cell as bitsets: the start cell, then every cell
+        at distance 1, 2 and so on, until no new cell can be reached.
+
+        Args:
+            start (int): The index of the start cell.
+        """
+        frontier = 1 << start
+        seen = frontier
+        while frontier:
+            yield frontier
+            frontier = self.step(frontier)
+            frontier ^= frontier & seen  # Drop the cells already reached
+            seen |= frontier
+
+    def distance(self, start: int, goal: int) -> int:
+        """
+        Returns the length of the shortest path from start to goal in steps, or -1 if there is none.
+
+        Args:
+            start (int): The index of the start cell.
+            goal (int): The index of the goal cell.
+        """
+        for d, frontier in enumerate(self.frontiers(start)):
+            if frontier >> goal & 1:
+                return d
+        return -1
+
+    def search(self, start: int, goal: int) -> tuple:
+        """
+        Returns a shortest path from start to goal and the cells reached by the search, as (path, cells):
+        the path is an array of cell indices, empty if the goal cannot be reached, and cells is a bitset.
+
+        Rather than one bitset per frontier, the search keeps three bitsets of the cells whose distance is
+        0, 1 or 2 modulo 3. The neighbors of a reached cell are one step closer, as far or one step further,
+        three distances that are different modulo 3, so walking back from the goal through the neighbor
+        with the previous distance modulo 3 follows a shortest path, with one bit test per direction.
+
+        Args:
+            start (int): The index of the start cell.
+            goal (int): The index of the goal cell.
+        """
+        layers = [0, 0, 0]
+        goal_bit = 1 << goal
+        for d, frontier in enumerate(self.frontiers(start)):
+            layers[d % 3] |= frontier
+            if frontier & goal_bit:
+                return self._trace_back(layers, start, goal, d), layers[0] | layers[1] | layers[2]
+        return array("I"), layers[0] | layers[1] | layers[2]
+
+    def _trace_back(self, layers: list, start: int, goal: int, d: int) -> array:
+        """
+        Returns the path of d steps from start to goal, walking back through the distance layers of search().
+        The bitsets are turned into bytes first, so that testing one bit does not copy a whole integer.
+        """
+        num_cols = self.num_cols
+        east = self.east.to_bytes(self._bitmap_size, "little")
+        south = self.south.to_bytes(self._bitmap_size, "little")
+        layers = [layer.to_bytes(self._bitmap_size, "little") for layer in layers]
+
+        def has(bits, n):
+            return bits[n >> 3] >> (n & 7) & 1
+
+        path = array("I", [goal])
+        k = goal
+        while d > 0:
+            d -= 1
+            previous = layers[d % 3]
+            # The neighbor one step closer, trying left, top, right, bottom like core.solvers
+            if k % num_cols > 0 and has(east, k - 1) and has(previous, k - 1):
+                k -= 1
+            elif k >= num_cols and has(south, k - num_cols) and has(previous, k - num_cols):
+                k -= num_cols
+            elif has(east, k) and has(previous, k + 1):
+                k += 1
+            else:
+                k += num_cols
+            path.append(k)
+        path.reverse()
+        return path
+
+    def reachable(self, start: int) -> int:
+        """
+        Returns the bitset of every cell reachable from the start cell.
+
+        Instead of one step per iteration, the set is filled along whole corridors in each of the four
+        directions with Kogge-Stone fills (doubling shifts, so log2 of the corridor length operations),
+        until it stops growing.
+
+        Args:
+            start (int): The index of the start cell.
+        """
+        num_cols = self.num_cols
+        size = self.size
+        east = self.east
+        south = self.south
+        cells = 1 << start
+        while True:
+            previous = cells
+            cells = _fill(cells, east << 1, 1, num_cols, True)  # Right
+            cells = _fill(cells, east, 1, num_cols, False)  # Left
+            cells = _fill(cells, south << num_cols, num_cols, size, True)  # Down
+            cells = _fill(cells, south, num_cols, size, False)  # Up
+            if cells == previous:
+                return cells
+
+    def to_bitmap(self, cells: int) -> bytearray:
+        """
+        Returns a bitset of cells as a bitmap in the layout of Grid.visited.
+
+        Args:
+            cells (int): A bitset of cells.
+        """
+        return bytearray(cells.to_bytes(self._bitmap_size, "little"))
+
+    @staticmethod
+    def count(cells: int) -> int:
+        """
+        Returns the number of cells in a bitset.
+        """
+        return cells.bit_count()
+
+
+def _fill(cells: int, open_from: int, shift: int, limit: int, forward: bool) -> int:
+    """
+    Extends a bitset of cells as far as possible in one direction and returns it.
+
+    Args:
+        cells (int): A bitset of cells.
+        open_from (int): The cells that can be entered from their neighbor in the direction of the fill.
+        shift (int): The shift of one step, 1 for rows and num_cols for columns.
+        limit (int): The shift at which no corridor can go further, num_cols for rows and size for columns.
+        forward (bool): Whether to fill towards higher cell indices (right or down).
+    """
+    while shift < limit:
+        if forward:
+            cells |= open_from & (cells << shift)
+            open_from &= open_from << shift
+        else:
+            cells |= open_from & (cells >> shift)
+            open_from &= open_from >> shift
+        shift <<= 1
+    return cells
@@ -1,7 +1,10 @@
-from core.gui import Window, Point, Line
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL
 from constants import WALL_COLOR, PATH_COLOR, BACKTRACK_COLOR, ERASER_COLOR
+TYPE_CHECKING = False  # Like typing.TYPE_CHECKING, without importing typing
+if TYPE_CHECKING:
+    from core.gui import Window
 class Cell():
-    def __init__(self, win: Window = None,
+    def __init__(self, win: 'Window' = None,
                 # Optional parameters:
                 has_left_wall: bool = True, has_right_wall: bool = True, has_top_wall: bool = True, has_bottom_wall: bool = True,  
                 x1: int = None, x2: int = None, y1: int = None, y2: int = None,
@@ -55,6 +58,11 @@ class Cell():
         self._y1 = y1_top_left
         self._y2 = y2_bottom_right
 
+        # Nothing to draw on without a window
+        if self._win is None:
+            return
+        from core.gui import Point, Line  # Loaded with the first drawing, not for headless use
+
         # Draw or remove right wall
         if self.has_right_wall:
             # Draw right wall
@@ -102,10 +110,115 @@ class Cell():
             to_cell (Cell): The cell to move to.
             undo (bool): Whether this move is an undo move. If True, draw the line in gray. If False, draw the line in red. Defaults to False.
         """
+        if self._win is None: # Nothing to draw on without a window
+            return
+        from core.gui import Point, Line
         point_cell1 = Point((self._x1 + self._x2) / 2, (self._y1 + self._y2) / 2) # Get the center point of the current cell
         point_cell2 = Point((to_cell._x1 + to_cell._x2) / 2, (to_cell._y1 + to_cell._y2) / 2) # Get the center point of the target cell
         line = Line(point_cell1, point_cell2) # Create a line from the center point of the current cell to the center point of the target cell
         if undo:
             self._win.draw_line(line, BACKTRACK_COLOR) # Draw the line in gray
         else:
-            self._win.draw_line(line, PATH_COLOR) # Draw the line in red
\ No newline at end of file
+            self._win.draw_line(line, PATH_COLOR) # Draw the line in red
+
+class GridCell(Cell):
+    def __init__(self, grid: Grid, k: int, win: 'Window' = None,
+                x1: int = None, x2: int = None, y1: int = None, y2: int = None):
+        """
+        Initializes a lightweight view of one cell stored in a packed Grid.
+
+        A GridCell behaves like a Cell (it can be drawn and its walls and visited flag can be read and
+        written) but it keeps no wall state of its own: every access goes straight to the Grid. Views
+        are created on demand and are cheap to throw away.
+
+        Args:
+            grid (Grid): The grid holding the cell.
+            k (int): The index of the cell in the grid.
+            win (Window, optional): The window to draw the cell on. Defaults to None.
+            x1 (int, optional): The x-coordinate of the top left corner of the cell. Defaults to None.
+            x2 (int, optional): The x-coordinate of the bottom right corner of the cell. Defaults to None.
+            y1 (int, optional): The y-coordinate of the top left corner of the cell. Defaults to None.
+            y2 (int, optional): The y-coordinate of the bottom right corner of the cell. Defaults to None.
+        """
+        # Do not call Cell.__init__, the walls and visited flag are owned by the grid
+        self._grid = grid
+        self._k = k
+        self._win = win
+        self._x1 = x1
+        self._x2 = x2
+        self._y1 = y1
+        self._y2 = y2
+
+    def _get_wall(self, wall: int) -> bool:
+        return self._grid.has_wall(self._k, wall)
+
+    def _set_wall(self, wall: int, present: bool) -> None:
+        self._grid.set_wall(self._k, wall, present)
+
+    has_left_wall = property(lambda self: self._get_wall(LEFT_WALL), lambda self, value: self._set_wall(LEFT_WALL, value))
+    has_right_wall = property(lambda self: self._get_wall(RIGHT_WALL), lambda self, value: self._set_wall(RIGHT_WALL, value))
+    has_top_wall = property(lambda self: self._get_wall(TOP_WALL), lambda self, value: self._set_wall(TOP_WALL, value))
+    has_bottom_wall = property(lambda self: self._get_wall(BOTTOM_WALL), lambda self, value: self._set_wall(BOTTOM_WALL, value))
+    visited = property(lambda self: self._grid.is_visited(self._k), lambda self, value: self._grid.set_visited(self._k, value))
+
+
+class CellColumns():
+    def __init__(self, grid: Grid, x1: int, y1: int, cell_size_x: int, cell_size_y: int, win: 'Window' = None):
+        """
+        Initializes a list-of-columns view over a packed Grid, so that cells[i][j] returns a GridCell
+        for column i and row j just like the 2D list of Cell objects the maze used to keep.
+
+        Args:
+            grid (Grid): The grid holding the cells.
+            x1 (int): The x-coordinate of the top left corner of the maze.
+            y1 (int): The y-coordinate of the top left corner of the maze.
+            cell_size_x (float): The width of each cell.
+            cell_size_y (float): The height of each cell.
+            win (Window, optional): The window the cells are drawn on. Defaults to None.
+        """
+        self._grid = grid
+        self._x1 = x1
+        self._y1 = y1
+        self._cell_size_x = cell_size_x
+        self._cell_size_y = cell_size_y
+        self._win = win
+
+    def __len__(self) -> int:
+        return self._grid.num_cols
+
+    def __getitem__(self, i: int) -> 'CellColumn':
+        if i < 0:
+            i += self._grid.num_cols
+        if i < 0 or i >= self._grid.num_cols:
+            raise IndexError("column index out of range")
+        return CellColumn(self, i)
+
+
+class CellColumn():
+    def __init__(self, columns: CellColumns, i: int):
+        """
+        Initializes a view of one column of cells.
+
+        Args:
+            columns (CellColumns): The columns view this column belongs to.
+            i (int): The column index.
+        """
+        self._columns = columns
+        self._i = i
+
+    def __len__(self) -> int:
+        return self._columns._grid.num_rows
+
+    def __getitem__(self, j: int) -> GridCell:
+        columns = self._columns
+        grid = columns._grid
+        if j < 0:
+            j += grid.num_rows
+        if j < 0 or j >= grid.num_rows:
+            raise IndexError("row index out of range")
+
+        # Calculate the coordinates of the cell based on its position in the grid and the size of each cell
+        x1 = columns._x1 + self._i * columns._cell_size_x
+        y1 = columns._y1 + j * columns._cell_size_y
+        return GridCell(grid, grid.index(self._i, j), columns._win,
+                        x1, x1 + columns._cell_size_x, y1, y1 + columns._cell_size_y)
@@ -0,0 +1,352 @@
+"""
+Mazes far bigger than memory, generated one tile at a time on demand.
+
+A ChunkedMaze is split into tiles of tile_cols x tile_rows cells. Every tile is an ordinary perfect maze
+carved by Maze from its own seed, derived from (seed, tile_x, tile_y), so any tile can be rebuilt at any
+time without looking at the others. Tiles are joined into one perfect maze by a binary tree over the tiles:
+every tile except the top left one opens exactly one passage through the seam with the tile to its left
+or the tile above it (tiles in the top row always go left, tiles in the left column always go up). Each
+link and the position of its passage along the seam come from a separate seed, so a tile knows the
+passages on all four of its sides without generating its neighbors.
+
+Since the tiles form a tree and each tile is a tree of cells, the whole maze is perfect: every cell is
+reachable from every other cell by exactly one path, even when the maze has no right or bottom edge.
+Only the tiles in use are kept, in a least recently used cache of bounded size.
+"""
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL
+from core.maze import Maze
+from core.solvers import solve_bfs
+from collections import OrderedDict
+from array import array
+import hashlib
+import random
+
+# Default size of a tile in cells, and number of tiles kept in the cache (about 1 MB of walls)
+TILE_COLS = 64
+TILE_ROWS = 64
+CACHE_TILES = 256
+
+# Directions of the link of a tile to its parent in the tree of tiles
+WEST = "west"
+NORTH = "north"
+
+
+def _derive_seed(*parts) -> int:
+    """
+    Returns a 64-bit seed derived from the given parts, the same on every platform and Python run.
+    """
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class ChunkedMaze():
+    def __init__(self, seed: int, tiles_x: int = None, tiles_y: int = None, tile_cols: int = TILE_COLS,
+                 tile_rows: int = TILE_ROWS, algorithm: str = "backtracker", backend: str = "python",
+                 cache_tiles: int = CACHE_TILES):
+        """
+        Initializes a ChunkedMaze. Nothing is generated until cells are read.
+
+        The entrance is the left wall of the top left cell and, when the maze is bounded in both
+        directions, the exit is the bottom wall of the bottom right cell like in Maze.
+
+        Args:
+            seed (int): The seed of the whole maze, every tile is derived from it.
+            tiles_x (int, optional): The number of tiles across, or None for no right edge. Defaults to None.
+            tiles_y (int, optional): The number of tiles down, or None for no bottom edge. Defaults to None.
+            tile_cols (int, optional): The number of columns of a tile. Defaults to TILE_COLS.
+            tile_rows (int, optional): The number of rows of a tile. Defaults to TILE_ROWS.
+            algorithm (str, optional): The algorithm carving each tile, see Maze.generate(). Defaults to "backtracker".
+            backend (str, optional): The backend carving each tile, see Maze.generate(). Defaults to "python".
+            cache_tiles (int, optional): The maximum number of tiles kept in memory. Defaults to CACHE_TILES.
+        """
+        self.seed = seed
+        self.tiles_x = tiles_x
+        self.tiles_y = tiles_y
+        self.tile_cols = tile_cols
+        self.tile_rows = tile_rows
+        self.num_cols = tiles_x * tile_cols if tiles_x is not None else None  # None when unbounded
+        self.num_rows = tiles_y * tile_rows if tiles_y is not None else None
+        self._algorithm = algorithm
+        self._backend = backend
+        self._cache_tiles = max(1, cache_tiles)
+        self._tiles = OrderedDict()  # (tile_x, tile_y) -> Grid, least recently used first
+        self.hits = 0  # Cache statistics
+        self.misses = 0
+        self.evictions = 0
+
+    def _in_tiles(self, tx: int, ty: int) -> bool:
+        """
+        Returns whether there is a tile at (tx, ty).
+        """
+        return (tx >= 0 and ty >= 0 and (self.tiles_x is None or tx < self.tiles_x)
+                and (self.tiles_y is None or ty < self.tiles_y))
+
+    def link(self, tx: int, ty: int) -> tuple:
+        """
+        Returns the link of a tile to its parent in the tree of tiles as (direction, offset): the passage
+        is in the row offset of the seam to the left (WEST) or the column offset of the seam above (NORTH).
+        Returns None for the top left tile, the root of the tree.
+
+        Args:
+            tx (int): The column of the tile.
+            ty (int): The row of the tile.
+        """
+        if tx == 0 and ty == 0:
+            return None
+        rng = random.Random(_derive_seed(self.seed, tx, ty, "link"))
+        if ty == 0 or (tx > 0 and rng.random() < 0.5):
+            return WEST, rng.randrange(self.tile_rows)
+        return NORTH, rng.randrange(self.tile_cols)
+
+    def parent(self, tx: int, ty: int) -> tuple:
+        """
+        Returns the tile a tile is linked to, or None for the top left tile.
+
+        Args:
+            tx (int): The column of the tile.
+            ty (int): The row of the tile.
+        """
+        link = self.link(tx, ty)
+        if link is None:
+            return None
+        return (tx - 1, ty) if link[0] == WEST else (tx, ty - 1)
+
+    def tile(self, tx: int, ty: int) -> Grid:
+        """
+        Returns the walls of a tile, generating it if it is not in the cache. Outer walls are standing
+        except for the passages to the neighboring tiles, the entrance and the exit.
+
+        Args:
+            tx (int): The column of the tile.
+            ty (int): The row of the tile.
+
+        Raises:
+            IndexError: If there is no such tile.
+        """
+        key = (tx, ty)
+        grid = self._tiles.get(key)
+        if grid is not None:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+            return grid
+        if not self._in_tiles(tx, ty):
+            raise IndexError(f"tile ({tx}, {ty}) out of range")
+
+        self.misses += 1
+        grid = self._generate_tile(tx, ty)
+        self._tiles[key] = grid
+        if len(self._tiles) > self._cache_tiles:
+            self._tiles.popitem(last=False)
+            self.evictions += 1
+        return grid
+
+    def _generate_tile(self, tx: int, ty: int) -> Grid:
+        """
+        Carves a tile from its own seed and opens the passages through its seams.
+        """
+        cols = self.tile_cols
+        rows = self.tile_rows
+        maze = Maze(0, 0, rows, cols, 1, 1, seed=_derive_seed(self.seed, tx, ty),
+                    algorithm=self._algorithm, backend=self._backend)
+        grid = maze._grid
+        walls = grid.walls
+
+        # Close the entrance and exit Maze made, the tile's own ones are opened below
+        walls[0] |= LEFT_WALL
+        walls[grid.size - 1] |= BOTTOM_WALL
+
+        # The passage to this tile's parent
+        link = self.link(tx, ty)
+        if link is not None:
+            direction, offset = link
+            if direction == WEST:
+                walls[offset * cols] &= ~LEFT_WALL
+            else:
+                walls[offset] &= ~TOP_WALL
+
+        # The passages of the tiles to the right and below that link to this tile
+        if self._in_tiles(tx + 1, ty):
+            direction, offset = self.link(tx + 1, ty)
+            if direction == WEST:
+                walls[offset * cols + cols - 1] &= ~RIGHT_WALL
+        if self._in_tiles(tx, ty + 1):
+            direction, offset = self.link(tx, ty + 1)
+            if direction == NORTH:
+                walls[(rows - 1) * cols + offset] &= ~BOTTOM_WALL
+
+        # The entrance and exit of the whole maze
+        if tx == 0 and ty == 0:
+            walls[0] &= ~LEFT_WALL
+        if tx + 1 == self.tiles_x and ty + 1 == self.tiles_y:
+            walls[grid.size - 1] &= ~BOTTOM_WALL
+
+        grid.reset_visited()
+        return grid
+
+    def cell_walls(self, i: int, j: int) -> int:
+        """
+        Returns the wall bits of the cell in column i and row j, see core.grid.
+
+        Args:
+            i (int): The column index of the cell.
+            j (int): The row index of the cell.
+
+        Raises:
+            IndexError: If the cell is outside the maze.
+        """
+        if i < 0 or j < 0:
+            raise IndexError(f"cell ({i}, {j}) out of range")
+        tx, ci = divmod(i, self.tile_cols)
+        ty, cj = divmod(j, self.tile_rows)
+        return self.tile(tx, ty).walls[cj * self.tile_cols + ci]
+
+    def has_wall(self, i: int, j: int, wall: int) -> bool:
+        """
+        Returns whether the cell in column i and row j has the given wall.
+
+        Args:
+            i (int): The column index of the cell.
+            j (int): The row index of the cell.
+            wall (int): One of LEFT_WALL, TOP_WALL, RIGHT_WALL or BOTTOM_WALL.
+        """
+        return bool(self.cell_walls(i, j) & wall)
+
+    def region(self, i: int, j: int, num_cols: int, num_rows: int) -> Grid:
+        """
+        Returns a Grid with a copy of the walls of a rectangle of cells, reading only the tiles it overlaps.
+        The walls on the border of the region are the real walls of the maze, passages leaving it included.
+
+        Args:
+            i (int): The column index of the top left cell of the region.
+            j (int): The row index of the top left cell of the region.
+            num_cols (int): The number of columns of the region.
+            num_rows (int): The number of rows of the region.
+
+        Raises:
+            IndexError: If the region is not inside the maze.
+        """
+        if (i < 0 or j < 0 or (self.num_cols is not None and i + num_cols > self.num_cols)
+                or (self.num_rows is not None and j + num_rows > self.num_rows)):
+            raise IndexError(f"region at ({i}, {j}) of {num_cols}x{num_rows} cells out of range")
+
+        tile_cols = self.tile_cols
+        tile_rows = self.tile_rows
+        walls = bytearray(num_cols * num_rows)
+        for y in range(num_rows):
+            ty, cj = divmod(j + y, tile_rows)
+            x = 0
+            while x < num_cols:
+                # Copy the part of this row that lies in one tile at once
+                tx, ci = divmod(i + x, tile_cols)
+                count = min(tile_cols - ci, num_cols - x)
+                start = cj * tile_cols + ci
+                walls[y * num_cols + x:y * num_cols + x + count] = self.tile(tx, ty).walls[start:start + count]
+                x += count
+        return Grid(num_cols, num_rows, walls)
+
+    def view(self, i: int, j: int, num_cols: int, num_rows: int, x1: int = 0, y1: int = 0,
+             cell_size_x: int = 1, cell_size_y: int = 1, win=None) -> Maze:
+        """
+        Returns a Maze over the region() of the given cells, e.g. the part of the maze visible in a window.
+        With a window only that region is drawn, the rest of the maze is never generated.
+
+        Args:
+            i (int): The column index of the top left cell of the region.
+            j (int): The row index of the top left cell of the region.
+            num_cols (int): The number of columns of the region.
+            num_rows (int): The number of rows of the region.
+            x1 (int, optional): The x-coordinate of the top left corner of the region. Defaults to 0.
+            y1 (int, optional): The y-coordinate of the top left corner of the region. Defaults to 0.
+            cell_size_x (float, optional): The width of each cell. Defaults to 1.
+            cell_size_y (float, optional): The height of each cell. Defaults to 1.
+            win (Window, optional): The window to draw the region on. Defaults to None.
+        """
+        return Maze.from_grid(self.region(i, j, num_cols, num_rows), x1, y1, cell_size_x, cell_size_y, win)
+
+    def _tile_path(self, start: tuple, goal: tuple) -> list:
+        """
+        Returns the tiles on the path between two tiles in the tree of tiles, both included.
+        """
+        # Walk up from the start to the root, then up from the goal until the two walks meet
+        up = [start]
+        while up[-1] is not None:
+            up.append(self.parent(*up[-1]))
+        up.pop()
+        depth = {tile: n for n, tile in enumerate(up)}
+
+        down = [goal]
+        while down[-1] not in depth:
+            down.append(self.parent(*down[-1]))
+        return up[:depth[down[-1]]] + down[::-1]
+
+    def path_segments(self, start: tuple = (0, 0), goal: tuple = None):
+        """
+        Finds the path between two cells one tile at a time, without materialising more than one tile
+        beyond the cache. Yields (tile_x, tile_y, path), where path is an array of the indices of the cells
+        of the path in that tile (row by row within the tile), in order from start to goal.
+
+        The tiles the path crosses are known from the tree of tiles alone, and within each tile the path
+        runs between the passages it enters and leaves through, so only those tiles are ever generated.
+
+        Args:
+            start (tuple, optional): The (column, row) of the start cell. Defaults to the top left cell.
+            goal (tuple, optional): The (column, row) of the goal cell. Defaults to the bottom right cell,
+                which requires a bounded maze.
+        """
+        if goal is None:
+            if self.num_cols is None or self.num_rows is None:
+                raise ValueError("an unbounded maze has no bottom right cell, pass a goal")
+            goal = (self.num_cols - 1, self.num_rows - 1)
+        cols = self.tile_cols
+        rows = self.tile_rows
+        for i, j in (start, goal):
+            self.cell_walls(i, j)  # Raises IndexError outside the maze
+
+        tiles = self._tile_path((start[0] // cols, start[1] // rows), (goal[0] // cols, goal[1] // rows))
+        entry = (start[1] % rows) * cols + start[0] % cols
+        for n, (tx, ty) in enumerate(tiles):
+            # Find the cell this tile is left from, and the cell it leads to in the next tile
+            if n + 1 < len(tiles):
+                nx, ny = tiles[n + 1]
+                if (nx, ny) == self.parent(tx, ty):
+                    direction, offset = self.link(tx, ty)
+                    child = True
+                else:
+                    direction, offset = self.link(nx, ny)
+                    child = False
+                if direction == WEST:
+                    exit, next_entry = (offset * cols, offset * cols + cols - 1) if child else \
+                                       (offset * cols + cols - 1, offset * cols)
+                else:
+                    exit, next_entry = (offset, (rows - 1) * cols + offset) if child else \
+                                       ((rows - 1) * cols + offset, offset)
+            else:
+                exit = (goal[1] % rows) * cols + goal[0] % cols
+                next_entry = None
+
+            path, _ = solve_bfs(self.tile(tx, ty), entry, exit)
+            yield tx, ty, path
+            entry = next_entry
+
+    def solve(self, start: tuple = (0, 0), goal: tuple = None) -> array:
+        """
+        Returns the path between two cells as a flat array of (column, row) pairs: [i0, j0, i1, j1, ...],
+        with the same "I" typecode as SolveResult.coordinates(). See path_segments() to stream it tile by
+        tile instead.
+
+        Args:
+            start (tuple, optional): The (column, row) of the start cell. Defaults to the top left cell.
+            goal (tuple, optional): The (column, row) of the goal cell. Defaults to the bottom right cell.
+
+        Raises:
+            OverflowError: If a coordinate on the path does not fit in 32 bits.
+        """
+        coords = array("I")
+        cols = self.tile_cols
+        rows = self.tile_rows
+        for tx, ty, path in self.path_segments(start, goal):
+            for k in path:
+                cj, ci = divmod(k, cols)
+                coords.append(tx * cols + ci)
+                coords.append(ty * rows + cj)
+        return coords
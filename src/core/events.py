@@ -0,0 +1,249 @@
+"""
+Event logs of maze generation and solving, and a player that replays them on a window.
+
+Generation and solving can record what they do as a flat log of (op, i, j, direction) records, where
+(i, j) is a cell and direction is the wall bit of that cell facing the neighbor involved (see core.grid):
+
+    WALL_BROKEN   the wall between (i, j) and its neighbor in direction was knocked down
+    CELL_VISITED  the search reached (i, j), or generation backtracked from it, direction is 0
+    MOVE          the solver moved from (i, j) to its neighbor in direction
+    BACKTRACK     the solver backtracked from (i, j) to its neighbor in direction
+
+A log always starts from a maze with every wall standing except the entrance and the exit, as created by
+Maze(..., generate=False). It is recorded once at full speed and can then be replayed any number of
+times, at any speed, without running the algorithms again.
+"""
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL, OPPOSITE_WALL
+from array import array
+import struct
+import sys
+
+# Operations of the records
+WALL_BROKEN = 0
+CELL_VISITED = 1
+MOVE = 2
+BACKTRACK = 3
+
+# Header of a saved log: magic, format version, number of columns and rows
+MAGIC = b"MZEV"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")
+
+
+def neighbor(num_cols: int, k: int, direction: int) -> int:
+    """
+    Returns the index of the neighbor of cell k in the given direction (a wall bit).
+    """
+    if direction == LEFT_WALL:
+        return k - 1
+    if direction == TOP_WALL:
+        return k - num_cols
+    if direction == RIGHT_WALL:
+        return k + 1
+    return k + num_cols
+
+
+class EventLog():
+    def __init__(self, num_cols: int, num_rows: int, records: array = None):
+        """
+        Initializes an EventLog for a maze of the given size.
+
+        The records are stored in one flat array of unsigned 32-bit integers, four per record,
+        so a log takes 16 bytes per event and can be saved and loaded as raw bytes.
+
+        Args:
+            num_cols (int): The number of columns of the maze.
+            num_rows (int): The number of rows of the maze.
+            records (array, optional): Existing flat records to use. Defaults to None.
+        """
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.records = records if records is not None else array("I")
+
+    def append(self, op: int, i: int, j: int, direction: int = 0) -> None:
+        """
+        Adds a record to the log.
+
+        Args:
+            op (int): WALL_BROKEN, CELL_VISITED, MOVE or BACKTRACK.
+            i (int): The column index of the cell.
+            j (int): The row index of the cell.
+            direction (int, optional): The wall bit facing the neighbor involved. Defaults to 0.
+        """
+        self.records.extend((op, i, j, direction))
+
+    def __len__(self) -> int:
+        return len(self.records) >> 2
+
+    def __getitem__(self, n: int) -> tuple:
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError("event index out of range")
+        return tuple(self.records[4 * n:4 * n + 4])
+
+    def __iter__(self):
+        records = self.records
+        for n in range(0, len(records), 4):
+            yield records[n], records[n + 1], records[n + 2], records[n + 3]
+
+    def save(self, path: str) -> None:
+        """
+        Writes the log to a file: a little-endian header followed by the records.
+
+        Args:
+            path (str): The path of the file to write.
+        """
+        records = self.records
+        if sys.byteorder == "big":
+            records = array("I", records)
+            records.byteswap()
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.num_cols, self.num_rows))
+            records.tofile(file)
+
+    @classmethod
+    def load(cls, path: str) -> 'EventLog':
+        """
+        Reads a log written by save().
+
+        Args:
+            path (str): The path of the file to read.
+
+        Raises:
+            ValueError: If the file is not an event log of a supported version.
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        if len(data) < HEADER.size:
+            raise ValueError("file too short for an event log header")
+        magic, version, num_cols, num_rows = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not an event log")
+        if version != VERSION:
+            raise ValueError(f"unsupported event log version {version}")
+        if (len(data) - HEADER.size) % 16:
+            raise ValueError("truncated event log")
+        records = array("I")
+        records.frombytes(data[HEADER.size:])
+        if sys.byteorder == "big":
+            records.byteswap()
+        return cls(num_cols, num_rows, records)
+
+
+class Player():
+    def __init__(self, log: EventLog, win=None, x1: int = 0, y1: int = 0, cell_size_x: int = 1, cell_size_y: int = 1):
+        """
+        Initializes a Player that replays an event log, drawing it on a window if one is given.
+
+        The player keeps its own grid of walls and the moves drawn so far. Stepping forward draws each
+        event as it is applied, seeking replays the events without drawing and then draws the resulting
+        frame in one go, so jumping anywhere in a log costs about as much as drawing one frame.
+
+        Args:
+            log (EventLog): The log to replay.
+            win (Window, optional): The window to draw on. Defaults to None.
+            x1 (int, optional): The x-coordinate of the top left corner of the maze. Defaults to 0.
+            y1 (int, optional): The y-coordinate of the top left corner of the maze. Defaults to 0.
+            cell_size_x (float, optional): The width of each cell. Defaults to 1.
+            cell_size_y (float, optional): The height of each cell. Defaults to 1.
+        """
+        self._log = log
+        self._renderer = win.maze_renderer(x1, y1, cell_size_x, cell_size_y) if win is not None else None
+        self.grid = Grid(log.num_cols, log.num_rows)
+        self.moves = {}  # (from cell, to cell) -> whether the move was backtracked, in drawing order
+        self.position = 0  # The number of events applied
+        self._reset()
+        self._draw_frame()
+
+    def __len__(self) -> int:
+        return len(self._log)
+
+    def _reset(self) -> None:
+        """
+        Goes back to the state before the first event, without drawing it.
+        """
+        self.grid.reset_walls()
+        self.grid.reset_visited()
+        self.grid.set_wall(0, LEFT_WALL, False)  # Entrance and exit, like Maze._break_entrance_and_exit()
+        self.grid.set_wall(self.grid.size - 1, BOTTOM_WALL, False)
+        self.moves.clear()
+        self.position = 0
+
+    def _draw_frame(self) -> None:
+        """
+        Draws the whole current state: every wall and every move.
+        """
+        if self._renderer is not None:
+            self._renderer.draw(self.grid)
+            self._renderer.clear_moves()
+            self._renderer.draw_moves(self.grid.num_cols, ((k, n, undo) for (k, n), undo in self.moves.items()))
+
+    def _apply(self, draw: bool) -> None:
+        """
+        Applies the next event, and draws it if asked to.
+        """
+        op, i, j, direction = self._log[self.position]
+        self.position += 1
+        grid = self.grid
+        k = grid.index(i, j)
+
+        if op == WALL_BROKEN:
+            grid.set_wall(k, direction, False)
+            grid.set_wall(neighbor(grid.num_cols, k, direction), OPPOSITE_WALL[direction], False)
+            if draw:
+                self._renderer.update_cell(grid, i, j)
+        elif op == CELL_VISITED:
+            grid.set_visited(k, True)
+            if draw:
+                self._renderer.update_cell(grid, i, j)
+        else:
+            # A backtrack turns the move from the neighbor to this cell gray
+            n = neighbor(grid.num_cols, k, direction)
+            move = (k, n) if op == MOVE else (n, k)
+            self.moves[move] = op == BACKTRACK
+            if draw:
+                self._renderer.draw_moves(grid.num_cols, [(*move, op == BACKTRACK)])
+
+    def step(self, count: int = 1) -> bool:
+        """
+        Applies and draws the next events. Returns False once the end of the log is reached.
+
+        Args:
+            count (int, optional): The number of events to apply. Defaults to 1.
+        """
+        draw = self._renderer is not None
+        for _ in range(count):
+            if self.position >= len(self._log):
+                return False
+            self._apply(draw)
+        return self.position < len(self._log)
+
+    def steps(self):
+        """
+        Yields after every event applied, to be run at any speed, e.g. by core.scheduler.Scheduler.
+        Does not yield at all once the end of the log is reached.
+        """
+        while self.position < len(self._log):
+            self.step()
+            yield
+
+    def seek(self, position: int) -> None:
+        """
+        Jumps to the state after the given number of events and draws it.
+
+        Args:
+            position (int): The number of events to apply, clamped to the length of the log.
+        """
+        position = max(0, min(position, len(self._log)))
+        if position < self.position:
+            self._reset()
+        while self.position < position:
+            self._apply(False)
+        self._draw_frame()
+
+    def skip_to_end(self) -> None:
+        """
+        Jumps straight to the final frame.
+        """
+        self.seek(len(self._log))
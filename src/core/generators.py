@@ -0,0 +1,387 @@
+"""
+Maze generation algorithms working directly on a packed Grid.
+
+Each generator takes a grid with every wall standing and a random number generator, and knocks down
+walls until the grid is a perfect maze (every cell reachable from every other cell by exactly one path).
+Only walls between two cells are removed, the outer walls are left alone, so the entrance and exit made
+by Maze._break_entrance_and_exit() are kept.
+
+The "python" backend takes a random.Random-like object, the "numpy" backend takes a numpy.random.Generator.
+NumPy is optional and only imported by the numpy generators.
+
+The algorithms differ in speed, memory and the texture of the mazes they make:
+
+    binary_tree   O(1) extra memory, very fast, strongly biased (straight top row and left column)
+    sidewinder    O(cols) extra memory, fast, biased (straight top row)
+    kruskal       O(cells) union-find, many short dead ends
+    prim          O(cells) frontier, many short dead ends, radiates from a random cell
+    wilson        O(cells) walk directions, unbiased (uniform spanning tree), slow at first
+    eller         O(cols) extra memory, built row by row, see eller_rows()
+"""
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL, ALL_WALLS, OPPOSITE_WALL
+from core.rng import RandomBlock
+from array import array
+
+
+def binary_tree_python(grid: Grid, rng) -> None:
+    """
+    Binary tree algorithm: every cell knocks down either its top or its left wall at random.
+    Cells in the top row can only go left and cells in the left column can only go up.
+
+    Args:
+        grid (Grid): The grid to carve, with every wall standing.
+        rng (random.Random): The random number generator.
+    """
+    num_cols = grid.num_cols
+    walls = grid.walls
+    random = rng.random
+
+    for k in range(1, grid.size):
+        j, i = divmod(k, num_cols)
+        if j > 0 and (i == 0 or random() < 0.5):  # Carve up
+            walls[k] &= ~TOP_WALL
+            walls[k - num_cols] &= ~BOTTOM_WALL
+        else:  # Carve left
+            walls[k] &= ~LEFT_WALL
+            walls[k - 1] &= ~RIGHT_WALL
+
+
+def binary_tree_numpy(grid: Grid, rng) -> None:
+    """
+    Vectorized binary tree algorithm, see binary_tree_python().
+
+    Args:
+        grid (Grid): The grid to carve, with every wall standing.
+        rng (numpy.random.Generator): The random number generator.
+    """
+    import numpy as np
+
+    walls = grid.as_numpy()
+
+    # Decide for every cell whether it carves up (True) or left (False)
+    up = rng.random(walls.shape) < 0.5
+    up[:, 0] = True  # The left column can only go up
+    up[0, :] = False  # The top row can only go left
+    left = ~up
+    left[0, 0] = False  # The top left cell has nowhere to go
+
+    # Collect the walls to knock down and clear them all at once
+    up = up.view(np.uint8)
+    left = left.view(np.uint8)
+    cleared = up * np.uint8(TOP_WALL) | left * np.uint8(LEFT_WALL)
+    cleared[:-1] |= up[1:] * np.uint8(BOTTOM_WALL)  # The cell above loses its bottom wall
+    cleared[:, :-1] |= left[:, 1:] * np.uint8(RIGHT_WALL)  # The cell to the left loses its right wall
+    walls &= ~cleared
+
+
+def sidewinder_python(grid: Grid, rng) -> None:
+    """
+    Sidewinder algorithm: each row is split into runs of cells joined left to right, and every run
+    knocks down the top wall of one of its cells chosen at random. The top row is a single run.
+
+    Args:
+        grid (Grid): The grid to carve, with every wall standing.
+        rng (random.Random): The random number generator.
+    """
+    num_cols = grid.num_cols
+    walls = grid.walls
+    random = rng.random
+
+    for j in range(grid.num_rows):
+        run_start = j * num_cols
+        for i in range(num_cols):
+            k = j * num_cols + i
+            last = i == num_cols - 1
+            if j > 0 and (last or random() < 0.5):
+                # Close the run by carving up from one of its cells
+                up = run_start + int(random() * (k - run_start + 1))
+                walls[up] &= ~TOP_WALL
+                walls[up - num_cols] &= ~BOTTOM_WALL
+                run_start = k + 1
+            elif not last:
+                # Extend the run to the right
+                walls[k] &= ~RIGHT_WALL
+                walls[k + 1] &= ~LEFT_WALL
+
+
+def sidewinder_numpy(grid: Grid, rng) -> None:
+    """
+    Vectorized sidewinder algorithm, see sidewinder_python(). All runs of all rows are found
+    and closed in a handful of array operations.
+
+    Args:
+        grid (Grid): The grid to carve, with every wall standing.
+        rng (numpy.random.Generator): The random number generator.
+    """
+    import numpy as np
+
+    num_cols = grid.num_cols
+    walls = grid.as_numpy()
+
+    # A run ends where a cell does not carve right, and always at the end of a row
+    closes = rng.random(walls.shape) < 0.5
+    closes[:, -1] = True
+    closes[0, :-1] = False  # The top row is a single run
+    closes = closes.ravel()
+
+    # Find every run and pick one random cell in it (ignoring the top row, it cannot carve up)
+    ends = np.flatnonzero(closes)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    up = starts + (rng.random(len(ends)) * (ends - starts + 1)).astype(ends.dtype)
+    up = up[up >= num_cols]
+
+    # Collect the walls to knock down and clear them all at once
+    right = (~closes).view(np.uint8)
+    cleared = right * np.uint8(RIGHT_WALL)
+    cleared[1:] |= right[:-1] * np.uint8(LEFT_WALL)  # The cell to the right loses its left wall
+    cleared[up] |= TOP_WALL
+    cleared[up - num_cols] |= BOTTOM_WALL
+    walls &= ~cleared.reshape(walls.shape)
+
+
+def kruskal_python(grid: Grid, rng) -> None:
+    """
+    Randomized Kruskal's algorithm: every wall between two cells is visited once in random order, and
+    knocked down if the cells on either side are not connected yet. Connected cells are tracked with an
+    array-based union-find with path halving and union by size.
+
+    Args:
+        grid (Grid): The grid to carve, with every wall standing.
+        rng (random.Random): The random number generator.
+    """
+    num_cols = grid.num_cols
+    size = grid.size
+    walls = grid.walls
+
+    # Every wall between two cells, as 2 * k for the right wall of cell k and 2 * k + 1 for its bottom wall
+    edges = [2 * k for k in range(size) if (k + 1) % num_cols]
+    edges.extend(2 * k + 1 for k in range(size - num_cols))
+    rng.shuffle(edges)
+
+    parent = array("i", range(size))
+    set_size = array("i", [1]) * size
+    remaining = size - 1  # Number of unions left before every cell is connected
+    for edge in edges:
+        k = edge >> 1
+        n = k + num_cols if edge & 1 else k + 1
+
+        # Find the roots of both cells, halving the paths on the way
+        a = k
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        b = n
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a == b:
+            continue
+
+        # Join the smaller set to the larger one and knock the wall down
+        if set_size[a] < set_size[b]:
+            a, b = b, a
+        parent[b] = a
+        set_size[a] += set_size[b]
+        if edge & 1:
+            walls[k] &= ~BOTTOM_WALL
+            walls[n] &= ~TOP_WALL
+        else:
+            walls[k] &= ~RIGHT_WALL
+            walls[n] &= ~LEFT_WALL
+        remaining -= 1
+        if remaining == 0:
+            break
+
+
+def prim_python(grid: Grid, rng) -> None:
+    """
+    Randomized Prim's algorithm: starting from a random cell, a random cell of the frontier (the cells next
+    to the maze) is repeatedly joined to a random neighbor already in the maze. The frontier is a list with
+    O(1) removal of a random element (swap with the last one and pop) plus a state byte per cell.
+
+    Args:
+        grid (Grid): The grid to carve, with every wall standing.
+        rng (random.Random): The random number generator.
+    """
+    num_cols = grid.num_cols
+    num_rows = grid.num_rows
+    walls = grid.walls
+    draws = RandomBlock(rng)
+    below = draws.below
+    state = bytearray(grid.size)  # 0 outside, 1 in the frontier, 2 in the maze
+    frontier = []
+
+    def add(k):
+        # Put k in the maze and its outside neighbors in the frontier
+        state[k] = 2
+        j, i = divmod(k, num_cols)
+        for n, inside in ((k - 1, i > 0), (k - num_cols, j > 0), (k + 1, i + 1 < num_cols), (k + num_cols, j + 1 < num_rows)):
+            if inside and state[n] == 0:
+                state[n] = 1
+                frontier.append(n)
+
+    add(rng.randrange(grid.size))
+    while frontier:
+        # Take a random frontier cell out of the list (block draws only cover up to 65536 options)
+        index = below(len(frontier)) if len(frontier) <= 65536 else rng.randrange(len(frontier))
+        k = frontier[index]
+        frontier[index] = frontier[-1]
+        frontier.pop()
+
+        # Join it to a random neighbor in the maze
+        j, i = divmod(k, num_cols)
+        joins = [(n, wall) for n, wall, inside in ((k - 1, LEFT_WALL, i > 0), (k - num_cols, TOP_WALL, j > 0),
+                                                   (k + 1, RIGHT_WALL, i + 1 < num_cols), (k + num_cols, BOTTOM_WALL, j + 1 < num_rows))
+                 if inside and state[n] == 2]
+        n, wall = joins[below(len(joins))]
+        walls[k] &= ~wall
+        walls[n] &= ~OPPOSITE_WALL[wall]
+        add(k)
+
+
+def wilson_python(grid: Grid, rng) -> None:
+    """
+    Wilson's algorithm: from every cell not in the maze yet, a random walk runs until it hits the maze, and
+    the walk with its loops erased is added to the maze. Only the last direction taken from each cell is
+    kept, which erases loops for free. The result is a uniform spanning tree, every perfect maze being
+    equally likely, at the cost of long walks while the maze is still small.
+
+    Args:
+        grid (Grid): The grid to carve, with every wall standing.
+        rng (random.Random): The random number generator.
+    """
+    num_cols = grid.num_cols
+    num_rows = grid.num_rows
+    size = grid.size
+    walls = grid.walls
+    below = RandomBlock(rng).below
+    step = {LEFT_WALL: -1, TOP_WALL: -num_cols, RIGHT_WALL: 1, BOTTOM_WALL: num_cols}  # Neighbor offset by wall
+    in_maze = bytearray(size)
+    direction = bytearray(size)  # The wall crossed when last leaving each cell of the current walk
+    in_maze[rng.randrange(size)] = 1
+
+    for start in range(size):
+        if in_maze[start]:
+            continue
+
+        # Walk at random until the maze is reached, remembering the last way out of every cell
+        k = start
+        while not in_maze[k]:
+            j, i = divmod(k, num_cols)
+            options = [wall for wall, inside in ((LEFT_WALL, i > 0), (TOP_WALL, j > 0),
+                                                 (RIGHT_WALL, i + 1 < num_cols), (BOTTOM_WALL, j + 1 < num_rows)) if inside]
+            wall = options[below(len(options))]
+            direction[k] = wall
+            k += step[wall]
+
+        # Follow the remembered directions from the start, which skips every loop, and carve the path
+        k = start
+        while not in_maze[k]:
+            wall = direction[k]
+            n = k + step[wall]
+            walls[k] &= ~wall
+            walls[n] &= ~OPPOSITE_WALL[wall]
+            in_maze[k] = 1
+            k = n
+
+
+def eller_rows(num_cols: int, num_rows: int, rng):
+    """
+    Eller's algorithm, yielding the walls of the maze one row at a time as a bytearray of num_cols wall
+    bytes (in the layout of one row of Grid.walls). Only the current row is kept in memory, so mazes of
+    any height can be produced with O(num_cols) memory.
+
+    Every cell of a row belongs to a set of cells connected through the rows above. Neighboring cells of
+    different sets are joined at random, then every set carves down from at least one of its cells so that
+    it stays connected to the rest of the maze. The last row joins every remaining set.
+
+    Args:
+        num_cols (int): The number of columns of the maze.
+        num_rows (int): The number of rows of the maze.
+        rng (random.Random): The random number generator.
+    """
+    random = rng.random
+    labels = array("i", range(num_cols))  # The set of every cell of the current row, always below num_cols
+    row = bytearray([ALL_WALLS]) * num_cols
+
+    for j in range(num_rows):
+        last = j == num_rows - 1
+        parent = array("i", range(num_cols))  # Union-find over the set labels of this row
+
+        def find(a):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+
+        # Join neighboring cells of different sets at random (always in the last row)
+        for i in range(num_cols - 1):
+            a = find(labels[i])
+            b = find(labels[i + 1])
+            if a != b and (last or random() < 0.5):
+                parent[b] = a
+                row[i] &= ~RIGHT_WALL
+                row[i + 1] &= ~LEFT_WALL
+
+        if last:
+            yield row
+            return
+
+        # Group the cells by set, then carve down from a random non-empty subset of each set
+        members = {}
+        for i in range(num_cols):
+            members.setdefault(find(labels[i]), []).append(i)
+        next_row = bytearray([ALL_WALLS]) * num_cols
+        next_labels = array("i", [-1]) * num_cols
+        used = bytearray(num_cols)
+        for label, cells in members.items():
+            down = [i for i in cells if random() < 0.5] or [cells[int(random() * len(cells))]]
+            for i in down:
+                row[i] &= ~BOTTOM_WALL
+                next_row[i] &= ~TOP_WALL
+                next_labels[i] = label
+            used[label] = 1
+
+        # Cells that were not carved into start a set of their own, with a label no set uses
+        fresh = (label for label in range(num_cols) if not used[label])
+        for i in range(num_cols):
+            if next_labels[i] < 0:
+                next_labels[i] = next(fresh)
+
+        yield row
+        row = next_row
+        labels = next_labels
+
+
+def eller_python(grid: Grid, rng) -> None:
+    """
+    Eller's algorithm on a whole grid, see eller_rows().
+
+    Args:
+        grid (Grid): The grid to carve, with every wall standing.
+        rng (random.Random): The random number generator.
+    """
+    num_cols = grid.num_cols
+    walls = grid.walls
+    for j, row in enumerate(eller_rows(num_cols, grid.num_rows, rng)):
+        # Keep the outer walls of the grid (the entrance and the exit) as they are
+        start = j * num_cols
+        row[0] &= walls[start]
+        row[-1] &= walls[start + num_cols - 1]
+        walls[start:start + num_cols] = row
+
+
+# Generators available through Maze.generate(), by (algorithm, backend). The "backtracker" algorithm
+# is implemented by Maze._break_walls_i() itself, since it can animate every step on the window.
+GENERATORS = {
+    ("binary_tree", "python"): binary_tree_python,
+    ("binary_tree", "numpy"): binary_tree_numpy,
+    ("sidewinder", "python"): sidewinder_python,
+    ("sidewinder", "numpy"): sidewinder_numpy,
+    ("kruskal", "python"): kruskal_python,
+    ("prim", "python"): prim_python,
+    ("wilson", "python"): wilson_python,
+    ("eller", "python"): eller_python,
+}
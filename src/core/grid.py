@@ -0,0 +1,138 @@
+"""
+Packed storage for the walls and visited flags of a maze.
+
+Every cell is stored as one byte holding its four wall bits, and the visited flags live in a
+separate bitmap with one bit per cell. Cells are laid out row by row, so the cell in column i
+and row j is found at index k = j * num_cols + i.
+
+Memory per cell is 1 byte for the walls plus 1/8 byte for the visited bitmap, i.e. 1.125 bytes
+(a 4096x4096 maze needs about 19 MB instead of the gigabytes taken by one Cell object per cell).
+"""
+
+# Wall bits stored in each cell byte
+LEFT_WALL = 1
+TOP_WALL = 2
+RIGHT_WALL = 4
+BOTTOM_WALL = 8
+ALL_WALLS = LEFT_WALL | TOP_WALL | RIGHT_WALL | BOTTOM_WALL
+
+# The wall on the other side of each wall (e.g. the left wall of a cell is the right wall of its left neighbor)
+OPPOSITE_WALL = {
+    LEFT_WALL: RIGHT_WALL,
+    TOP_WALL: BOTTOM_WALL,
+    RIGHT_WALL: LEFT_WALL,
+    BOTTOM_WALL: TOP_WALL,
+}
+
+
+class Grid():
+    def __init__(self, num_cols: int, num_rows: int, walls: bytearray = None):
+        """
+        Initializes a Grid with every wall of every cell standing and no cell visited.
+
+        Args:
+            num_cols (int): The number of columns in the grid.
+            num_rows (int): The number of rows in the grid.
+            walls (bytearray, optional): An existing buffer of num_cols * num_rows wall bytes to use
+                instead of allocating a new one. Defaults to None.
+        """
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.size = num_cols * num_rows  # Total number of cells
+
+        if walls is None:
+            walls = bytearray([ALL_WALLS]) * self.size  # One byte per cell, every wall up
+        elif len(walls) != self.size:
+            raise ValueError(f"expected {self.size} wall bytes, got {len(walls)}")
+        self.walls = walls
+        self.visited = bytearray((self.size + 7) >> 3)  # One bit per cell
+
+        # Incremented every time walls change so cached data derived from them can be invalidated
+        self.version = 0
+
+    def index(self, i: int, j: int) -> int:
+        """
+        Returns the index of the cell in column i and row j.
+
+        Args:
+            i (int): The column index of the cell.
+            j (int): The row index of the cell.
+        """
+        return j * self.num_cols + i
+
+    def has_wall(self, k: int, wall: int) -> bool:
+        """
+        Returns whether the cell at index k has the given wall.
+
+        Args:
+            k (int): The index of the cell.
+            wall (int): One of LEFT_WALL, TOP_WALL, RIGHT_WALL or BOTTOM_WALL.
+        """
+        return bool(self.walls[k] & wall)
+
+    def set_wall(self, k: int, wall: int, present: bool) -> None:
+        """
+        Raises or removes one wall of the cell at index k. Only this cell is changed, the wall of the
+        neighboring cell is left as it is.
+
+        Args:
+            k (int): The index of the cell.
+            wall (int): One of LEFT_WALL, TOP_WALL, RIGHT_WALL or BOTTOM_WALL.
+            present (bool): Whether the wall should be standing.
+        """
+        if present:
+            self.walls[k] |= wall
+        else:
+            self.walls[k] &= ~wall
+        self.version += 1
+
+    def is_visited(self, k: int) -> bool:
+        """
+        Returns whether the cell at index k has been visited.
+
+        Args:
+            k (int): The index of the cell.
+        """
+        return bool(self.visited[k >> 3] & (1 << (k & 7)))
+
+    def set_visited(self, k: int, visited: bool) -> None:
+        """
+        Sets the visited flag of the cell at index k.
+
+        Args:
+            k (int): The index of the cell.
+            visited (bool): The new visited flag.
+        """
+        if visited:
+            self.visited[k >> 3] |= 1 << (k & 7)
+        else:
+            self.visited[k >> 3] &= ~(1 << (k & 7))
+
+    def reset_visited(self) -> None:
+        """
+        Clears the visited flag of every cell.
+        """
+        self.visited[:] = bytes(len(self.visited))
+
+    def reset_walls(self) -> None:
+        """
+        Raises every wall of every cell.
+        """
+        self.walls[:] = bytes([ALL_WALLS]) * self.size
+        self.version += 1
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes used by the wall and visited storage.
+        """
+        return len(self.walls) + len(self.visited)
+
+    def as_numpy(self):
+        """
+        Returns the walls as a (num_rows, num_cols) NumPy uint8 array sharing memory with this grid.
+
+        NumPy is optional and only imported when this method is called.
+        """
+        import numpy as np
+        return np.frombuffer(self.walls, dtype=np.uint8).reshape(self.num_rows, self.num_cols)
@@ -1,5 +1,20 @@
-from tkinter import Button, Tk, BOTH, Canvas
-from constants import WINDOW_BG_COLOR, LINE_WIDTH
+"""
+Tk window and renderers of mazes.
+
+tkinter (and asyncio, for Window.run_async()) are only imported once a Window is created or a coroutine
+or bitmap is actually needed, so the rest of the package, and this module, can be imported for headless
+use on hosts without Tk and without paying for those imports.
+"""
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL
+from core.raster import RegionRasterizer, ppm_bytes
+from constants import WINDOW_BG_COLOR, LINE_WIDTH, WALL_COLOR, PATH_COLOR, BACKTRACK_COLOR, LOD_MIN_CELL_SIZE
+import math
+import queue
+TYPE_CHECKING = False  # Like typing.TYPE_CHECKING, without importing typing
+if TYPE_CHECKING:
+    from tkinter import Canvas
+
+POLL_MS = 20 # How often the event loop runs the callbacks posted from other threads, in milliseconds
 class Point():
     def __init__(self, x: int = 0, y: int = 0):
         """
@@ -23,7 +38,7 @@ class Line():
         self.p1 = p1
         self.p2 = p2
 
-    def draw(self, canvas: Canvas, fill_color: str = "white") -> None:
+    def draw(self, canvas: 'Canvas', fill_color: str = "white") -> None:
         """
         Draws this line on the given canvas.
 
@@ -44,6 +59,8 @@ class Window():
         """
         self.width = width  # Set the width of the window
         self.height = height  # Set the height of the window
+        from tkinter import Button, Tk, BOTH, Canvas # Loaded here so that headless use never needs Tk
+
         self.__root = Tk()  # Initialize the main Tkinter window
         self.__root.geometry("1920x1080")  # Set the size of the window
         self.__root.resizable(False, False)  # Disable the window resizing
@@ -54,29 +71,104 @@ class Window():
         self.__canvas = Canvas(self.__root, {"bg": WINDOW_BG_COLOR})  # Create a canvas with a black background to draw on
         self.__canvas.pack(fill=BOTH, expand=1)  # Pack the canvas into the window 
         self.__running = False  # Initialize the running state to False (Basically if the program is running or not)
+        self.__closed = False  # Whether the window has been closed
+        self.__calls = queue.SimpleQueue()  # Callbacks posted by other threads with post(), run by the event loop
+        self.__root.after(POLL_MS, self.__run_posted)
+        self.stats = None  # Opt-in core.stats.Stats counting draws and redraws, see Maze(stats=...)
 
     def redraw(self) -> None:
         """
         Updates the window by redrawing the canvas and calling the mainloop once to handle any events.
         All it does is call update_idletasks() to update the window but not process any events caused by the user (e.g. close button) and update() to update the window for all pending events
         """
+        if self.stats is not None:
+            self.stats.count("redraws")
+            with self.stats.timer("redraw"):
+                self.__root.update_idletasks()
+                self.__root.update()
+            return
         self.__root.update_idletasks() # Update the window but do not process any events caused by user (e.g. close button is an event caused by the user)
         self.__root.update() # Update the window for all pending events
     
     def wait_for_close(self) -> None:
         """
-        Runs the main loop for this window until the window is closed. (Basically keep redrawing the window until the window is closed)
+        Runs the Tk event loop for this window until the window is closed.
+        The loop sleeps until there is an event, a scheduled after() call or a posted callback to handle,
+        so an idle window uses next to no CPU.
+        """
+        self.__running = True
+        if not self.__closed: # mainloop() would not notice a close() that happened before it started
+            self.__root.mainloop()
+        self.__running = False
+
+    async def run_async(self, interval: float = 1 / 60) -> None:
+        """
+        Pumps the Tk event loop from asyncio until the window is closed, instead of wait_for_close().
+        Other coroutines (e.g. core.scheduler.Scheduler.run_async()) run in between the redraws.
+
+            await asyncio.gather(win.run_async(), scheduler.run_async(maze.generate_steps()))
+
+        Args:
+            interval (float, optional): The time between two redraws, in seconds. Defaults to 1 / 60.
         """
-        self.__running = True # Set the running state to True to start the main loop (while self.__running is True)
-        while self.__running: # Keep redrawing the window until the window is closed (When self.__running is False)
+        import asyncio
+
+        self.__running = True
+        while not self.__closed:
             self.redraw()
-    
+            await asyncio.sleep(interval)
+        self.__running = False
+
+    def post(self, callback, *args) -> None:
+        """
+        Asks the event loop to call callback(*args) as soon as it can. Unlike every other method of the window,
+        this one can be called from any thread, e.g. by a worker thread generating a maze to draw its progress.
+
+        Args:
+            callback (callable): The function to call on the thread running the event loop.
+            *args: The arguments to call it with.
+        """
+        self.__calls.put((callback, args))
+
+    def __run_posted(self) -> None:
+        """
+        Runs the callbacks posted so far, then checks again after POLL_MS milliseconds.
+        """
+        while True:
+            try:
+                callback, args = self.__calls.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        if not self.__closed:
+            self.__root.after(POLL_MS, self.__run_posted)
+
     def close(self) -> None: # Close the window (This method is called when you close the window)
         """
         Closes the window and stops the main loop.
         This method is called when the window is closed.
         """
         self.__running = False
+        self.__closed = True
+        self.__root.quit() # Makes wait_for_close() return
+
+    @property
+    def closed(self) -> bool:
+        """
+        Whether the window has been closed (with the Exit button or the window manager).
+        """
+        return self.__closed
+
+    def after(self, ms: int, callback) -> str:
+        """
+        Asks the Tk event loop to call the given function after a delay, and returns the id of the call.
+        The call only happens while the event loop runs (e.g. in wait_for_close()).
+
+        Args:
+            ms (int): The delay in milliseconds.
+            callback (callable): The function to call, without arguments.
+        """
+        return self.__root.after(ms, callback)
     
     def draw_line(self, line: Line, fill_color: str = "white") -> None:
         """
@@ -86,6 +178,436 @@ class Window():
             line (Line): The line to draw.
             fill_color (str): The color to draw the line with. Defaults to "white".
         """
+        if self.stats is not None:
+            self.stats.count("draw_calls")
+            self.stats.count("canvas_items")
         line.draw(self.__canvas, fill_color) # Draw the line on the canvas of this current window
 
+    def maze_renderer(self, x1: float, y1: float, cell_size_x: float, cell_size_y: float) -> 'MazeRenderer':
+        """
+        Returns a MazeRenderer that draws the walls of a maze on the canvas of this window, or a LODRenderer
+        if the cells are smaller than LOD_MIN_CELL_SIZE pixels and lines would pile up on the same pixels.
+
+        Args:
+            x1 (float): The x-coordinate of the top left corner of the maze.
+            y1 (float): The y-coordinate of the top left corner of the maze.
+            cell_size_x (float): The width of each cell.
+            cell_size_y (float): The height of each cell.
+        """
+        if min(cell_size_x, cell_size_y) < LOD_MIN_CELL_SIZE:
+            return LODRenderer(self.__canvas, x1, y1, cell_size_x, cell_size_y, self.stats)
+        return MazeRenderer(self.__canvas, x1, y1, cell_size_x, cell_size_y, self.stats)
+
+
+def wall_runs(grid: Grid, horizontal: bool, line: int) -> list:
+    """
+    Returns the runs of consecutive walls along one grid line, as a list of (start, end) cell ranges
+    (end excluded). A wall is drawn if the cell on either side of it has it.
+
+    Args:
+        grid (Grid): The grid holding the walls.
+        horizontal (bool): True for the line above row `line`, False for the line left of column `line`.
+        line (int): The index of the line, from 0 to num_rows (horizontal) or num_cols (vertical).
+    """
+    walls = grid.walls
+    num_cols = grid.num_cols
+    if horizontal:
+        length = num_cols
+        before = (line - 1) * num_cols if line > 0 else None # First cell of the row above the line
+        after = line * num_cols if line < grid.num_rows else None # First cell of the row below the line
+        step = 1
+        before_wall, after_wall = BOTTOM_WALL, TOP_WALL
+    else:
+        length = grid.num_rows
+        before = line - 1 if line > 0 else None # Top cell of the column left of the line
+        after = line if line < num_cols else None # Top cell of the column right of the line
+        step = num_cols
+        before_wall, after_wall = RIGHT_WALL, LEFT_WALL
+
+    runs = []
+    start = None
+    for n in range(length):
+        present = ((before is not None and walls[before + n * step] & before_wall) or
+                   (after is not None and walls[after + n * step] & after_wall))
+        if present and start is None:
+            start = n # A run begins
+        elif not present and start is not None:
+            runs.append((start, n)) # A run ends
+            start = None
+    if start is not None:
+        runs.append((start, length))
+    return runs
+
+
+class MazeRenderer():
+    def __init__(self, canvas: 'Canvas', x1: float, y1: float, cell_size_x: float, cell_size_y: float, stats=None):
+        """
+        Initializes a MazeRenderer that draws the walls of a whole maze in batches.
+
+        Instead of four lines per cell, every run of consecutive walls along a grid line is drawn as a
+        single canvas item, and all items are created with one Tcl script, so drawing a whole maze takes
+        a handful of Tk calls. Each grid line keeps its items (tagged with the line name), so when a cell
+        changes only the four lines around it are updated, by moving the existing items with coords()
+        and creating or deleting only the difference. Removed walls are never painted over in black, so
+        the number of canvas items stays bounded no matter how often cells are redrawn.
+
+        Args:
+            canvas (Canvas): The canvas to draw on.
+            x1 (float): The x-coordinate of the top left corner of the maze.
+            y1 (float): The y-coordinate of the top left corner of the maze.
+            cell_size_x (float): The width of each cell.
+            cell_size_y (float): The height of each cell.
+            stats (Stats, optional): If given, draw calls and canvas items created are counted in it. Defaults to None.
+        """
+        self._canvas = canvas
+        self._stats = stats
+        self._x1 = x1
+        self._y1 = y1
+        self._cell_size_x = cell_size_x
+        self._cell_size_y = cell_size_y
+
+    def _run_coords(self, horizontal: bool, line: int, start: int, end: int) -> tuple:
+        """
+        Returns the canvas coordinates (x1, y1, x2, y2) of a run of walls.
+        """
+        if horizontal:
+            y = self._y1 + line * self._cell_size_y
+            return (self._x1 + start * self._cell_size_x, y, self._x1 + end * self._cell_size_x, y)
+        x = self._x1 + line * self._cell_size_x
+        return (x, self._y1 + start * self._cell_size_y, x, self._y1 + end * self._cell_size_y)
+
+    def _create_command(self, horizontal: bool, line: int, start: int, end: int) -> str:
+        """
+        Returns the Tcl command creating the canvas item of a run of walls.
+        """
+        x1, y1, x2, y2 = self._run_coords(horizontal, line, start, end)
+        tag = f"{'h' if horizontal else 'v'}{line}"
+        return (f"{self._canvas._w} create line {x1} {y1} {x2} {y2} "
+                f"-fill {WALL_COLOR} -width {LINE_WIDTH} -tags {{walls {tag}}}")
+
+    def _count(self, items: int) -> None:
+        """
+        Counts one draw call creating the given number of canvas items, if instrumentation is enabled.
+        """
+        if self._stats is not None:
+            self._stats.count("draw_calls")
+            self._stats.count("canvas_items", items)
+
+    def draw(self, grid: Grid) -> None:
+        """
+        Draws every wall of the grid, replacing anything this renderer drew before.
+
+        Args:
+            grid (Grid): The grid holding the walls.
+        """
+        commands = [f"{self._canvas._w} delete walls"]
+        for line in range(grid.num_rows + 1):
+            for start, end in wall_runs(grid, True, line):
+                commands.append(self._create_command(True, line, start, end))
+        for line in range(grid.num_cols + 1):
+            for start, end in wall_runs(grid, False, line):
+                commands.append(self._create_command(False, line, start, end))
+        self._canvas.tk.eval("\n".join(commands)) # One round trip to Tcl for the whole maze
+        self._count(len(commands) - 1)
+
+    def update_line(self, grid: Grid, horizontal: bool, line: int) -> None:
+        """
+        Redraws the walls along one grid line, reusing its existing canvas items.
+
+        Args:
+            grid (Grid): The grid holding the walls.
+            horizontal (bool): True for the line above row `line`, False for the line left of column `line`.
+            line (int): The index of the line.
+        """
+        runs = wall_runs(grid, horizontal, line)
+        items = self._canvas.find_withtag(f"{'h' if horizontal else 'v'}{line}")
+
+        # Move the existing items onto the new runs
+        for item, (start, end) in zip(items, runs):
+            self._canvas.coords(item, *self._run_coords(horizontal, line, start, end))
+
+        # Create items for any extra runs, or delete the items that are no longer needed
+        if len(runs) > len(items):
+            self._canvas.tk.eval("\n".join(self._create_command(horizontal, line, start, end)
+                                           for start, end in runs[len(items):]))
+            self._count(len(runs) - len(items))
+        for item in items[len(runs):]:
+            self._canvas.delete(item)
+
+    def update_cell(self, grid: Grid, i: int, j: int) -> None:
+        """
+        Redraws the four grid lines around the cell in column i and row j.
+
+        Args:
+            grid (Grid): The grid holding the walls.
+            i (int): The column index of the cell.
+            j (int): The row index of the cell.
+        """
+        self.update_line(grid, True, j)
+        self.update_line(grid, True, j + 1)
+        self.update_line(grid, False, i)
+        self.update_line(grid, False, i + 1)
+
+    def draw_moves(self, num_cols: int, moves) -> None:
+        """
+        Draws solver moves as lines between cell centers, like Cell.draw_move(), with one Tcl script.
+        The lines are tagged "moves" so that clear_moves() can remove them all at once.
+
+        Args:
+            num_cols (int): The number of columns of the grid.
+            moves (iterable): (from cell index, to cell index, undo) tuples, undo moves are drawn in BACKTRACK_COLOR.
+        """
+        commands = []
+        for k, n, undo in moves:
+            from_j, from_i = divmod(k, num_cols)
+            to_j, to_i = divmod(n, num_cols)
+            commands.append(f"{self._canvas._w} create line "
+                            f"{self._x1 + (from_i + 0.5) * self._cell_size_x} {self._y1 + (from_j + 0.5) * self._cell_size_y} "
+                            f"{self._x1 + (to_i + 0.5) * self._cell_size_x} {self._y1 + (to_j + 0.5) * self._cell_size_y} "
+                            f"-fill {BACKTRACK_COLOR if undo else PATH_COLOR} -width {LINE_WIDTH} -tags moves")
+        if commands:
+            self._canvas.tk.eval("\n".join(commands))
+            self._count(len(commands))
+
+    def clear_moves(self) -> None:
+        """
+        Deletes every line drawn by draw_moves().
+        """
+        self._canvas.delete("moves")
+
+    def draw_path(self, num_cols: int, path) -> None:
+        """
+        Draws a path as lines between the centers of consecutive cells, in PATH_COLOR, with one Tcl script.
+        Every line is tagged with the two cells it joins so that erase_path() can remove part of a path.
+
+        Args:
+            num_cols (int): The number of columns of the grid.
+            path (sequence): The indices of the cells on the path, in order.
+        """
+        commands = []
+        for k, n in zip(path, path[1:]):
+            from_j, from_i = divmod(k, num_cols)
+            to_j, to_i = divmod(n, num_cols)
+            commands.append(f"{self._canvas._w} create line "
+                            f"{self._x1 + (from_i + 0.5) * self._cell_size_x} {self._y1 + (from_j + 0.5) * self._cell_size_y} "
+                            f"{self._x1 + (to_i + 0.5) * self._cell_size_x} {self._y1 + (to_j + 0.5) * self._cell_size_y} "
+                            f"-fill {PATH_COLOR} -width {LINE_WIDTH} -tags {{path path{min(k, n)}_{max(k, n)}}}")
+        if commands:
+            self._canvas.tk.eval("\n".join(commands))
+            self._count(len(commands))
+
+    def erase_path(self, path) -> None:
+        """
+        Deletes the lines drawn by draw_path() between consecutive cells of the given path.
+
+        Args:
+            path (sequence): The indices of the cells on the path, or on the part of it to erase.
+        """
+        commands = [f"{self._canvas._w} delete path{min(k, n)}_{max(k, n)}" for k, n in zip(path, path[1:])]
+        if commands:
+            self._canvas.tk.eval("\n".join(commands))
+
+
+class LODRenderer():
+    MAX_CELL_SIZE = 64  # The largest zoom, in pixels per cell
+
+    def __init__(self, canvas: 'Canvas', x1: float, y1: float, cell_size_x: float, cell_size_y: float, stats=None):
+        """
+        Initializes a LODRenderer that shows a maze as one bitmap instead of one line per wall, with the same
+        methods as MazeRenderer so it can be used in its place.
+
+        Only the cells in view are rasterized (see core.raster.RegionRasterizer) into a Tk PhotoImage, at
+        a whole number of pixels per cell when zoomed in, or with every n-th row and column of cells at 2
+        pixels per cell when more cells than pixels are in view, so a render costs about the pixels of the
+        view whatever the size of the maze. Dragging with the left button pans the view and the mouse wheel
+        zooms around the pointer. Changes are drawn once the event loop is idle, however many happened.
+
+        Args:
+            canvas (Canvas): The canvas to draw on.
+            x1 (float): The x-coordinate of the top left corner of the maze.
+            y1 (float): The y-coordinate of the top left corner of the maze.
+            cell_size_x (float): The width of each cell with the whole maze in view.
+            cell_size_y (float): The height of each cell with the whole maze in view.
+            stats (Stats, optional): If given, renders are counted and timed in it. Defaults to None.
+        """
+        self._canvas = canvas
+        self._stats = stats
+        self._x1 = x1
+        self._y1 = y1
+        self._cell_size_x = cell_size_x
+        self._cell_size_y = cell_size_y
+        self._scale = min(cell_size_x, cell_size_y)  # Pixels per cell, the whole maze is in view at first
+        self._min_scale = self._scale
+        self._origin = (0.0, 0.0)  # The (column, row) at the top left corner of the view
+        self._grid = None
+        self._moves = {}  # (cell, cell) -> undo, for the lines of draw_moves()
+        self._path = {}  # (cell, cell) -> False, for the lines of draw_path()
+        self._marks = None  # The (path, visited) given to the rasterizer, rebuilt when the lines change
+        self._image = None  # The PhotoImage shown, kept referenced so Tk does not drop it
+        self._item = None  # Its canvas item
+        self._pending = False  # Whether a render is already scheduled
+        self._drag = None  # The last pointer position while panning
+        self.renders = 0  # The number of renders so far
+
+        canvas.bind("<ButtonPress-1>", self._on_press)
+        canvas.bind("<B1-Motion>", self._on_drag)
+        canvas.bind("<MouseWheel>", lambda event: self.zoom(1.25 if event.delta > 0 else 0.8, event.x, event.y))
+        canvas.bind("<Button-4>", lambda event: self.zoom(1.25, event.x, event.y)) # Wheel on X11
+        canvas.bind("<Button-5>", lambda event: self.zoom(0.8, event.x, event.y))
+
+    def viewport(self) -> tuple:
+        """
+        Returns the cells to draw and their size for the current pan and zoom, as (columns, rows, cell_size)
+        where columns and rows are ranges whose step is the number of cells per drawn cell.
+        """
+        grid = self._grid
+        scale = self._scale
+        if scale >= 2:
+            cell_size, stride = int(scale), 1
+        else:
+            cell_size, stride = 2, math.ceil(2 / scale)
+        i0 = int(self._origin[0])
+        j0 = int(self._origin[1])
+        i1 = min(grid.num_cols, math.ceil(self._origin[0] + grid.num_cols * self._cell_size_x / scale))
+        j1 = min(grid.num_rows, math.ceil(self._origin[1] + grid.num_rows * self._cell_size_y / scale))
+        return range(i0, max(i1, i0 + 1), stride), range(j0, max(j1, j0 + 1), stride), cell_size
+
+    def pan(self, dx: float, dy: float) -> None:
+        """
+        Moves the view by the given number of pixels, the maze follows the pointer.
+        """
+        self._origin = (self._origin[0] - dx / self._scale, self._origin[1] - dy / self._scale)
+        self._clamp()
+        self._schedule()
+
+    def zoom(self, factor: float, x: float, y: float) -> None:
+        """
+        Zooms in (factor > 1) or out around the canvas point (x, y), which stays over the same cell.
+        """
+        scale = min(max(self._scale * factor, self._min_scale), self.MAX_CELL_SIZE)
+        cell_x = self._origin[0] + (x - self._x1) / self._scale
+        cell_y = self._origin[1] + (y - self._y1) / self._scale
+        self._scale = scale
+        self._origin = (cell_x - (x - self._x1) / scale, cell_y - (y - self._y1) / scale)
+        self._clamp()
+        self._schedule()
+
+    def _clamp(self) -> None:
+        """
+        Keeps the view inside the maze.
+        """
+        if self._grid is None:
+            return
+        max_x = max(0.0, self._grid.num_cols - self._grid.num_cols * self._cell_size_x / self._scale)
+        max_y = max(0.0, self._grid.num_rows - self._grid.num_rows * self._cell_size_y / self._scale)
+        self._origin = (min(max(self._origin[0], 0.0), max_x), min(max(self._origin[1], 0.0), max_y))
+
+    def _on_press(self, event) -> None:
+        self._drag = (event.x, event.y)
+
+    def _on_drag(self, event) -> None:
+        if self._drag is not None:
+            self.pan(event.x - self._drag[0], event.y - self._drag[1])
+        self._drag = (event.x, event.y)
+
+    def _schedule(self) -> None:
+        """
+        Renders once the event loop is idle, unless a render is already scheduled.
+        """
+        if not self._pending and self._grid is not None:
+            self._pending = True
+            self._canvas.after_idle(self.render)
+
+    def render(self) -> None:
+        """
+        Rasterizes the cells in view and shows them on the canvas.
+        """
+        import tkinter
+
+        self._pending = False
+        if self._grid is None:
+            return
+        columns, rows, cell_size = self.viewport()
+        if self._marks is None:
+            self._marks = self._mark_cells()
+        segments, visited = self._marks
+        data = ppm_bytes(RegionRasterizer(self._grid, columns, rows, cell_size, visited=visited, segments=segments))
+        self._image = tkinter.PhotoImage(master=self._canvas, data=data, format="PPM")
+        if self._item is None:
+            self._item = self._canvas.create_image(self._x1, self._y1, anchor="nw", image=self._image)
+        else:
+            self._canvas.itemconfigure(self._item, image=self._image)
+        self.renders += 1
+        if self._stats is not None:
+            self._stats.count("draw_calls")
+
+    def _mark_cells(self) -> tuple:
+        """
+        Returns the segments and visited bitmap for the rasterizer: every red line is a segment joining its
+        two cells only, the cells joined by gray lines are backtracked.
+        """
+        segments = []
+        visited = bytearray(len(self._grid.visited))
+        for lines in (self._path, self._moves):
+            for (k, n), undo in lines.items():
+                if undo:
+                    visited[k >> 3] |= 1 << (k & 7)
+                    visited[n >> 3] |= 1 << (n & 7)
+                else:
+                    segments.append((k, n))
+        return segments, visited
+
+    def draw(self, grid: Grid) -> None:
+        """
+        Shows the grid, see MazeRenderer.draw().
+        """
+        self._grid = grid
+        self._clamp()
+        self._schedule()
+
+    def update_line(self, grid: Grid, horizontal: bool, line: int) -> None:
+        """
+        Shows the changes of the walls along one grid line, see MazeRenderer.update_line().
+        """
+        self.draw(grid)
+
+    def update_cell(self, grid: Grid, i: int, j: int) -> None:
+        """
+        Shows the changes of the walls of one cell, see MazeRenderer.update_cell().
+        """
+        self.draw(grid)
+
+    def draw_moves(self, num_cols: int, moves) -> None:
+        """
+        Shows solver moves, see MazeRenderer.draw_moves(). A backtrack turns the cells it joins gray.
+        """
+        for k, n, undo in moves:
+            self._moves[(min(k, n), max(k, n))] = undo
+        self._marks = None
+        self._schedule()
+
+    def clear_moves(self) -> None:
+        """
+        Removes every move shown by draw_moves().
+        """
+        self._moves.clear()
+        self._marks = None
+        self._schedule()
 
+    def draw_path(self, num_cols: int, path) -> None:
+        """
+        Shows a path, see MazeRenderer.draw_path().
+        """
+        for k, n in zip(path, path[1:]):
+            self._path[(min(k, n), max(k, n))] = False
+        self._marks = None
+        self._schedule()
+
+    def erase_path(self, path) -> None:
+        """
+        Removes the part of a path shown by draw_path() between consecutive cells of the given path.
+        """
+        for k, n in zip(path, path[1:]):
+            self._path.pop((min(k, n), max(k, n)), None)
+        self._marks = None
+        self._schedule()
@@ -0,0 +1,400 @@
+"""
+Precomputed adjacency and distance index of a maze, for answering many path queries on the same walls.
+
+The open passages of the grid are stored in compressed sparse row (CSR) form: the neighbors of cell k are
+neighbors[offsets[k]:offsets[k + 1]]. On top of it a single breadth-first search from a root cell (the
+exit by default) records the distance and parent of every cell. A perfect maze is a tree, so following
+parents from any cell is its path to the root, and the path between two cells goes up from both of them
+to their lowest common ancestor (LCA) in that tree. Both take time proportional to the length of the path.
+
+When a single wall is opened or closed, open_wall() and close_wall() repair the distances and parents in
+place instead of searching again: opening a wall can only bring cells closer to the root, so the change is
+spread outwards from the cell that got closer, and closing a wall only matters if it cut the search tree,
+in which case only the cells of the cut-off subtree are searched again. Either way the work is about the
+size of the region whose distances change.
+
+paths() answers a whole batch of queries against the same search tree and returns them as a PathBatch:
+one flat array holding the cells of every path back to back, plus the offset where each path starts.
+"""
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL
+from array import array
+from bisect import bisect_right
+from collections import deque
+import heapq
+
+
+class PathBatch():
+    def __init__(self, offsets: array, cells: array, num_cols: int):
+        """
+        Initializes a PathBatch holding many paths in two flat arrays: path n is cells[offsets[n]:offsets[n + 1]],
+        empty if its goal cannot be reached.
+
+        Args:
+            offsets (array): The start of every path in cells, plus the total length at the end.
+            cells (array): The indices of the cells of every path, back to back.
+            num_cols (int): The number of columns of the grid, used to turn indices back into coordinates.
+        """
+        self.offsets = offsets
+        self.cells = cells
+        self._num_cols = num_cols
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def path(self, n: int) -> array:
+        """
+        Returns path n as an array of cell indices.
+        """
+        return self.cells[self.offsets[n]:self.offsets[n + 1]]
+
+    def lengths(self) -> array:
+        """
+        Returns the number of cells of every path.
+        """
+        offsets = self.offsets
+        return array("I", [offsets[n + 1] - offsets[n] for n in range(len(self))])
+
+    def coordinates(self) -> array:
+        """
+        Returns the cells of every path as a flat array of (column, row) pairs: path n is
+        coordinates[2 * offsets[n]:2 * offsets[n + 1]].
+        """
+        num_cols = self._num_cols
+        coords = array("I", bytes(8 * len(self.cells)))
+        coords[0::2] = array("I", map(num_cols.__rmod__, self.cells))
+        coords[1::2] = array("I", map(num_cols.__rfloordiv__, self.cells))
+        return coords
+
+
+class MazeIndex():
+    def __init__(self, grid: Grid, root: int = None):
+        """
+        Initializes a MazeIndex by building the adjacency of the grid and the search tree from the root.
+
+        Memory is about 20 bytes per cell: 4 for the offsets, 8 for the neighbors of a perfect maze,
+        and 4 each for the distances and parents.
+
+        Args:
+            grid (Grid): The grid to index. The index is only valid while grid.version is unchanged.
+            root (int, optional): The index of the root cell of the search tree. Defaults to the bottom right cell.
+        """
+        self.num_cols = grid.num_cols
+        self.size = grid.size
+        self.root = grid.size - 1 if root is None else root
+        self.version = grid.version  # The version of the walls the index was built from
+        self._grid = grid
+        self._csr = self._adjacency(grid)  # (offsets, neighbors), None after an edit until used again
+        self.distance, self.parent = self._search(self.root)
+
+    @property
+    def offsets(self) -> array:
+        """
+        The CSR offsets of the open passages, see _adjacency().
+        """
+        return self._current_adjacency()[0]
+
+    @property
+    def neighbors(self) -> array:
+        """
+        The CSR neighbors of the open passages, see _adjacency().
+        """
+        return self._current_adjacency()[1]
+
+    def _current_adjacency(self) -> tuple:
+        """
+        Returns the CSR arrays, rebuilding them if a wall was edited since they were built.
+        """
+        if self._csr is None:
+            self._csr = self._adjacency(self._grid)
+        return self._csr
+
+    def _adjacency(self, grid: Grid) -> tuple:
+        """
+        Returns the CSR arrays (offsets, neighbors) of the open passages of the grid, in the order
+        left, top, right, bottom like core.solvers.
+        """
+        num_cols = self.num_cols
+        size = self.size
+        walls = grid.walls
+        offsets = array("I", [0]) * (size + 1)
+        neighbors = array("I")
+        append = neighbors.append
+
+        for k in range(size):
+            wall = walls[k]
+            i = k % num_cols
+            if i > 0 and not wall & LEFT_WALL:
+                append(k - 1)
+            if k >= num_cols and not wall & TOP_WALL:
+                append(k - num_cols)
+            if i + 1 < num_cols and not wall & RIGHT_WALL:
+                append(k + 1)
+            if k + num_cols < size and not wall & BOTTOM_WALL:
+                append(k + num_cols)
+            offsets[k + 1] = len(neighbors)
+        return offsets, neighbors
+
+    def _search(self, root: int) -> tuple:
+        """
+        Runs a breadth-first search from the root over the adjacency and returns the (distance, parent)
+        arrays. Cells that cannot be reached have a distance and parent of -1, the root is its own parent.
+        """
+        offsets = self.offsets
+        neighbors = self.neighbors
+        distance = array("i", [-1]) * self.size
+        parent = array("i", [-1]) * self.size
+        distance[root] = 0
+        parent[root] = root
+
+        queue = array("I", [root])  # Cells in the order they are discovered, read with a moving head
+        head = 0
+        while head < len(queue):
+            k = queue[head]
+            head += 1
+            d = distance[k] + 1
+            for n in neighbors[offsets[k]:offsets[k + 1]]:
+                if parent[n] < 0:
+                    parent[n] = k
+                    distance[n] = d
+                    queue.append(n)
+        return distance, parent
+
+    def _open_neighbors(self, k: int) -> list:
+        """
+        Returns the cells one open passage away from the cell at index k, read from the walls of the grid.
+        """
+        num_cols = self.num_cols
+        wall = self._grid.walls[k]
+        i = k % num_cols
+        neighbors = []
+        if i > 0 and not wall & LEFT_WALL:
+            neighbors.append(k - 1)
+        if k >= num_cols and not wall & TOP_WALL:
+            neighbors.append(k - num_cols)
+        if i + 1 < num_cols and not wall & RIGHT_WALL:
+            neighbors.append(k + 1)
+        if k + num_cols < self.size and not wall & BOTTOM_WALL:
+            neighbors.append(k + num_cols)
+        return neighbors
+
+    def open_wall(self, a: int, b: int) -> int:
+        """
+        Updates the index after the wall between the neighboring cells a and b was opened in the grid, and
+        returns the number of cells whose distance changed. The index must have been up to date before the edit.
+
+        Args:
+            a (int): The index of one cell.
+            b (int): The index of the other cell.
+        """
+        distance = self.distance
+        parent = self.parent
+        self._csr = None
+        self.version = self._grid.version
+
+        # Only the cell that is now more than one step closer through the new passage changes
+        if distance[b] < 0 or 0 <= distance[a] < distance[b] - 1:
+            source, k = a, b
+        elif distance[a] < 0 or 0 <= distance[b] < distance[a] - 1:
+            source, k = b, a
+        else:
+            return 0
+        if distance[source] < 0:
+            return 0  # Neither side can reach the root
+
+        # Spread the shorter distances outwards, breadth first so every cell is settled once
+        distance[k] = distance[source] + 1
+        parent[k] = source
+        queue = deque([k])
+        changed = 0
+        while queue:
+            k = queue.popleft()
+            changed += 1
+            d = distance[k] + 1
+            for n in self._open_neighbors(k):
+                if distance[n] < 0 or d < distance[n]:
+                    distance[n] = d
+                    parent[n] = k
+                    queue.append(n)
+        return changed
+
+    def close_wall(self, a: int, b: int) -> int:
+        """
+        Updates the index after the wall between the neighboring cells a and b was closed in the grid, and
+        returns the number of cells whose distance had to be searched again. The index must have been up to
+        date before the edit.
+
+        Args:
+            a (int): The index of one cell.
+            b (int): The index of the other cell.
+        """
+        distance = self.distance
+        parent = self.parent
+        self._csr = None
+        self.version = self._grid.version
+
+        # Unless the passage was an edge of the search tree every path to the root is still there
+        if parent[b] == a and b != a:
+            child = b
+        elif parent[a] == b and a != b:
+            child = a
+        else:
+            return 0
+
+        # The subtree below the closed passage lost its path to the root
+        subtree = [child]
+        for k in subtree:
+            subtree.extend(n for n in self._open_neighbors(k) if parent[n] == k)
+        inside = set(subtree)
+        for k in subtree:
+            distance[k] = -1
+            parent[k] = -1
+
+        # Reconnect it through the cheapest passages to the rest of the tree, then search inwards
+        heap = []
+        for k in subtree:
+            for n in self._open_neighbors(k):
+                if n not in inside and distance[n] >= 0 and (distance[k] < 0 or distance[n] + 1 < distance[k]):
+                    distance[k] = distance[n] + 1
+                    parent[k] = n
+            if distance[k] >= 0:
+                heap.append((distance[k], k))
+        heapq.heapify(heap)
+        while heap:
+            d, k = heapq.heappop(heap)
+            if d != distance[k]:
+                continue  # Reached again with a shorter distance since it was pushed
+            for n in self._open_neighbors(k):
+                if n in inside and (distance[n] < 0 or d + 1 < distance[n]):
+                    distance[n] = d + 1
+                    parent[n] = k
+                    heapq.heappush(heap, (d + 1, n))
+        return len(subtree)
+
+    def degree(self, k: int) -> int:
+        """
+        Returns the number of open passages of the cell at index k.
+        """
+        return self.offsets[k + 1] - self.offsets[k]
+
+    def path_to_root(self, k: int) -> array:
+        """
+        Returns the path from the cell at index k to the root as an array of cell indices, or an empty
+        array if the root cannot be reached. This is a shortest path whether or not the maze is perfect.
+
+        Args:
+            k (int): The index of the start cell.
+        """
+        parent = self.parent
+        if parent[k] < 0:
+            return array("I")
+        path = array("I", [k])
+        while k != self.root:
+            k = parent[k]
+            path.append(k)
+        return path
+
+    def paths(self, starts, goals=None) -> PathBatch:
+        """
+        Returns the paths of a batch of queries, see path_to_root() and path(). Every query reads the same
+        search tree. Paths to the root merge as soon as they reach a cell an earlier path went through, and
+        from there the rest of the earlier path is copied instead of followed again, so the parents are only
+        read once per cell of the union of the paths.
+
+        Args:
+            starts (iterable): The indices of the start cells.
+            goals (iterable, optional): The indices of the goal cells, one per start. Defaults to the root for every start.
+        """
+        if goals is None:
+            parent = self.parent
+            root = self.root
+            offsets = array("Q", [0])
+            cells = array("I")
+            append = cells.append
+            position = {}  # Cell -> where it was first written in cells
+            for k in starts:
+                if parent[k] >= 0:
+                    while k not in position:
+                        position[k] = len(cells)
+                        append(k)
+                        if k == root:
+                            break
+                        k = parent[k]
+                    else:
+                        # Copy the rest of the earlier path, up to the end of the path it belongs to
+                        first = position[k]
+                        cells.extend(cells[first:offsets[bisect_right(offsets, first)]])
+                offsets.append(len(cells))
+            return PathBatch(offsets, cells, self.num_cols)
+
+        offsets = array("Q", [0])
+        cells = array("I")
+        for start, goal in zip(starts, goals):
+            cells.extend(self.path(start, goal))
+            offsets.append(len(cells))
+        return PathBatch(offsets, cells, self.num_cols)
+
+    def path(self, start: int, goal: int) -> array:
+        """
+        Returns the path between two cells through their lowest common ancestor in the search tree, as an
+        array of cell indices from start to goal, or an empty array if they are not connected. In a perfect
+        maze this is the only path between them. After edits that add loops it is still a valid path, but
+        only paths to the root are guaranteed to be the shortest.
+
+        Cells that cannot reach the root (e.g. a subtree cut off by close_wall()) are outside the search tree,
+        so a path between two of them is found by a breadth-first search of their own region instead.
+
+        Args:
+            start (int): The index of the start cell.
+            goal (int): The index of the goal cell.
+        """
+        distance = self.distance
+        parent = self.parent
+        if distance[start] < 0 and distance[goal] < 0:
+            return self._search_between(start, goal)
+        if distance[start] < 0 or distance[goal] < 0:
+            return array("I")
+
+        # Walk up from the deeper cell until both are at the same depth, then up from both until they meet
+        up = array("I", [start])
+        down = array("I", [goal])
+        a, b = start, goal
+        while distance[a] > distance[b]:
+            a = parent[a]
+            up.append(a)
+        while distance[b] > distance[a]:
+            b = parent[b]
+            down.append(b)
+        while a != b:
+            a = parent[a]
+            b = parent[b]
+            up.append(a)
+            down.append(b)
+
+        # The meeting cell is at the end of both halves
+        down.pop()
+        down.reverse()
+        up.extend(down)
+        return up
+
+    def _search_between(self, start: int, goal: int) -> array:
+        """
+        Returns the shortest path from start to goal found by a breadth-first search over the walls of the
+        grid, or an empty array if goal cannot be reached. The search only visits the region of start, which
+        for cells outside the search tree is usually a small part of the grid.
+        """
+        came_from = {start: start}
+        queue = deque([start])
+        while queue:
+            k = queue.popleft()
+            if k == goal:
+                path = array("I", [k])
+                while k != start:
+                    k = came_from[k]
+                    path.append(k)
+                path.reverse()
+                return path
+            for n in self._open_neighbors(k):
+                if n not in came_from:
+                    came_from[n] = k
+                    queue.append(n)
+        return array("I")
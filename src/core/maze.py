@@ -1,16 +1,28 @@
-from core.gui import Window
-from core.cell import Cell
+from core.cell import CellColumns
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL, OPPOSITE_WALL
+from core.solvers import SolveResult
+from core.index import MazeIndex, PathBatch
+from core.stats import Stats
+from core.rng import RandomBlock
+from core.events import EventLog, WALL_BROKEN, CELL_VISITED, MOVE, BACKTRACK
+from core import generators, raster, solvers, storage
 from constants import ANIMATION_SPEED
+from array import array
 import random
 import time
+TYPE_CHECKING = False  # Like typing.TYPE_CHECKING, without importing typing
+if TYPE_CHECKING:
+    from core.gui import Window
 
 class Maze:
-    def __init__(self, x1: int, y1: int, num_rows: int, num_cols: int, cell_size_x: int, cell_size_y: int, win: Window = None, seed: int = None):
+    def __init__(self, x1: int, y1: int, num_rows: int, num_cols: int, cell_size_x: int, cell_size_y: int, win: 'Window' = None, seed: int = None,
+                algorithm: str = "backtracker", backend: str = "python", generate: bool = True, stats: Stats = None):
         """
         Initializes a Maze object with the given parameters.
 
         The Maze class is responsible for constructing the maze layout and handling its animation.
-        It utilizes the Cell class to generate individual cells and the Window class for graphical rendering.
+        The walls and visited flags are stored in a packed Grid (1.125 bytes per cell), and the Cell
+        class is used as a view over it for drawing. The Window class is used for graphical rendering.
 
         Args:
             x1 (int): The x-coordinate of the top left corner of the maze.
@@ -20,59 +32,358 @@ class Maze:
             cell_size_x (float): The width of each cell in the maze.
             cell_size_y (float): The height of each cell in the maze.
             win (Window, optional): The window to draw the maze on. Defaults to None.
-            seed (int, optional): The seed for the random number generator. Defaults to None.
+            seed (int, optional): The seed of the maze's own random number generator, for reproducible mazes. Defaults to None.
+            algorithm (str, optional): The generation algorithm, see generate(). Defaults to "backtracker".
+            backend (str, optional): The generation backend, see generate(). Defaults to "python".
+            generate (bool, optional): Whether to generate the maze right away. If False the cells are created
+                with every wall standing, to be carved later by generate() or generate_steps(). Defaults to True.
+            stats (Stats, optional): If given, counters and timers of the maze and its window are collected in it,
+                see stats(). Defaults to None, which disables instrumentation.
         """
-        # Set the random seed if provided to ensure reproducibility
-        if seed is not None:
-            random.seed(seed)
-
         # Initialize the maze grid and its properties
-        self._cells = []  # A 2D list to store the cells of the maze
+        self._setup(x1, y1, Grid(num_cols, num_rows), cell_size_x, cell_size_y, win, seed, stats)
+
+        # Create the cells and break the walls to form the maze path
+        if generate:
+            self.generate(algorithm, backend)
+        else:
+            self._create_cells()
+
+    def _setup(self, x1: int, y1: int, grid: Grid, cell_size_x: int, cell_size_y: int, win: 'Window', seed: int,
+               stats: Stats = None) -> None:
+        """
+        Initializes the properties of the maze around the given grid, without touching its walls.
+
+        Args:
+            x1 (int): The x-coordinate of the top left corner of the maze.
+            y1 (int): The y-coordinate of the top left corner of the maze.
+            grid (Grid): The packed walls and visited flags of every cell.
+            cell_size_x (float): The width of each cell in the maze.
+            cell_size_y (float): The height of each cell in the maze.
+            win (Window): The window to draw the maze on, or None.
+            seed (int): The seed for the random number generator, or None.
+            stats (Stats, optional): The counters and timers to collect, or None. Defaults to None.
+        """
+        if stats is not None and win is not None:
+            win.stats = stats  # Count the draws and redraws of the window too
+        self._stats = stats  # Opt-in instrumentation, None when disabled
+        self._grid = grid  # Packed walls and visited flags of every cell
+        self._cells = CellColumns(grid, x1, y1, cell_size_x, cell_size_y, win)  # A 2D list-like view of the cells of the maze
         self._x1 = x1  # X-coordinate of the top left corner of the maze
         self._y1 = y1  # Y-coordinate of the top left corner of the maze
-        self._num_rows = num_rows  # Total number of rows in the maze
-        self._num_cols = num_cols  # Total number of columns in the maze
+        self._num_rows = grid.num_rows  # Total number of rows in the maze
+        self._num_cols = grid.num_cols  # Total number of columns in the maze
         self._cell_size_x = cell_size_x  # Width of each cell
         self._cell_size_y = cell_size_y  # Height of each cell
         self._win = win  # The window object where the maze will be drawn
+        self._seed = seed  # The seed of the random number generators
+        self._rng = random.Random(seed)  # The maze's own generator, never the shared random module
+        self._algorithm = None  # The generation algorithm and backend used for the current walls
+        self._backend = None
+        self._index = None  # The MazeIndex of the current walls, built on first use by index()
+        self._shown_path = None  # The path drawn by show_path(), kept up to date by open_wall() and close_wall()
+        self._renderer = win.maze_renderer(x1, y1, cell_size_x, cell_size_y) if win is not None else None  # Batched wall renderer
+
+    @classmethod
+    def from_grid(cls, grid: Grid, x1: int = 0, y1: int = 0, cell_size_x: int = 1, cell_size_y: int = 1,
+                  win: 'Window' = None, seed: int = None, stats: Stats = None) -> 'Maze':
+        """
+        Creates a Maze around an existing grid of walls, e.g. one loaded from a file, without generating anything.
+
+        Args:
+            grid (Grid): The packed walls of the maze. It is used as is, not copied.
+            x1 (int, optional): The x-coordinate of the top left corner of the maze. Defaults to 0.
+            y1 (int, optional): The y-coordinate of the top left corner of the maze. Defaults to 0.
+            cell_size_x (float, optional): The width of each cell in the maze. Defaults to 1.
+            cell_size_y (float, optional): The height of each cell in the maze. Defaults to 1.
+            win (Window, optional): The window to draw the maze on. Defaults to None.
+            seed (int, optional): The seed the maze was generated with, if known. Defaults to None.
+            stats (Stats, optional): The counters and timers to collect, see Maze(). Defaults to None.
+        """
+        maze = cls.__new__(cls)
+        maze._setup(x1, y1, grid, cell_size_x, cell_size_y, win, seed, stats)
+        if win is not None:
+            maze._renderer.draw(grid)
+        return maze
+
+    def save(self, path: str) -> None:
+        """
+        Saves the walls of the maze to a binary file, see core.storage.
+
+        Args:
+            path (str): The path of the file to write.
+        """
+        storage.save_grid(path, self._grid, self._seed, self._algorithm, self._backend)
+
+    def save_image(self, file, cell_size: int = 4, result: SolveResult = None, show_visited: bool = False,
+                   image_format: str = None) -> None:
+        """
+        Saves a PNG or PPM picture of the maze, optionally with a solve path, without Tk or a display.
+        The image is written row by row, so even mazes of tens of millions of cells need little memory,
+        see core.raster.
+
+        Args:
+            file (str or file): The path of the image, or a file object opened in binary mode.
+            cell_size (int, optional): The size of a cell in pixels. Defaults to 4.
+            result (SolveResult, optional): The solve result whose path is drawn in PATH_COLOR. Defaults to None.
+            show_visited (bool, optional): Whether to draw the cells visited by the last solve and not on the
+                path in BACKTRACK_COLOR. Defaults to False.
+            image_format (str, optional): "png" or "ppm". Defaults to the extension of the path.
+        """
+        rasterizer = raster.Rasterizer(self._grid, cell_size, result.path if result is not None else None,
+                                       self._grid.visited if show_visited else None)
+        raster.save_image(file, rasterizer, image_format)
 
-        # Create the cells for the maze
+    @classmethod
+    def load(cls, path: str, x1: int = 0, y1: int = 0, cell_size_x: int = 1, cell_size_y: int = 1,
+             win: 'Window' = None, use_mmap: bool = True) -> 'Maze':
+        """
+        Loads a maze saved with save(). By default the file is memory-mapped, so even huge mazes open
+        instantly and their walls are only read from disk as they are used.
+
+        Args:
+            path (str): The path of the file to read.
+            x1 (int, optional): The x-coordinate of the top left corner of the maze. Defaults to 0.
+            y1 (int, optional): The y-coordinate of the top left corner of the maze. Defaults to 0.
+            cell_size_x (float, optional): The width of each cell in the maze. Defaults to 1.
+            cell_size_y (float, optional): The height of each cell in the maze. Defaults to 1.
+            win (Window, optional): The window to draw the maze on. Defaults to None.
+            use_mmap (bool, optional): Whether to memory-map the file instead of reading it. Defaults to True.
+        """
+        grid, header = storage.load_grid(path, use_mmap)
+        maze = cls.from_grid(grid, x1, y1, cell_size_x, cell_size_y, win, header.seed)
+        maze._algorithm = header.algorithm
+        maze._backend = header.backend
+        return maze
+
+    def generate(self, algorithm: str = "backtracker", backend: str = "python", seed: int = None,
+                 log: EventLog = None) -> None:
+        """
+        Generates a new maze, replacing the current one.
+
+        The "backtracker" algorithm is the recursive backtracking (depth-first search) algorithm run with
+        an explicit stack by _break_walls_i(), and is animated on the window. The other algorithms come
+        from core.generators and run at full speed, after which the whole maze is drawn:
+
+        - "binary_tree": every cell opens its top or left wall. Very fast, but biased towards the top left.
+        - "sidewinder": rows are split into runs that each open one top wall. Fast, biased towards the top.
+        - "kruskal": walls are knocked down in random order between unconnected cells (union-find).
+        - "prim": the maze grows from a random cell by joining random cells of its frontier.
+        - "wilson": loop-erased random walks, every perfect maze is equally likely. The slowest.
+        - "eller": built row by row with O(columns) extra memory.
+
+        The binary tree and sidewinder algorithms also have a "numpy" backend that carves the whole grid with
+        a few vectorized array operations, for mazes of tens of millions of cells. NumPy is only needed for
+        that backend.
+
+        Random choices come from the maze's own generator, so mazes built in different threads never
+        interfere and the same seed always gives the same maze, whatever else uses the random module.
+
+        Args:
+            algorithm (str, optional): "backtracker", "binary_tree", "sidewinder", "kruskal", "prim", "wilson" or "eller".
+                Defaults to "backtracker".
+            backend (str, optional): "python" or "numpy" (only for "binary_tree" and "sidewinder"). Defaults to "python".
+            seed (int, optional): If given, reseeds the maze's generator first, giving the same maze as Maze(seed=seed). Defaults to None.
+            log (EventLog, optional): If given, every wall knocked down is recorded in it, and with the backtracker
+                every cell visited or backtracked from, see core.events. Defaults to None.
+        """
+        generator = self._generator(algorithm, backend)
+        self._algorithm = algorithm
+        self._backend = backend
+        if seed is not None:
+            self._reseed(seed)
+        started = time.perf_counter()
+
+        # With a window, animate the generation step by step, the steps also record the log
+        if self._win is not None or log is not None:
+            self._run_steps(self.generate_steps(algorithm, backend, log=log))
+            self._add_time("generate", started)
+            return
+
+        # Create the cells for the maze, with every wall standing
         self._create_cells()
 
-        # Start breaking walls to form the maze path using recursive backtracking
-        self._break_walls_r(0, 0)
-        
+        if generator is None:
+            # Start breaking walls to form the maze path using iterative backtracking
+            self._break_walls_i(0, 0)
+        else:
+            # Carve the whole grid at once
+            generator(self._grid, self._generator_rng(backend))
+            self._grid.version += 1
+
+        # Reset the visited status of all cells
+        self._count_generated()
+        self._reset_cells_visited()
+        self._add_time("generate", started)
+
+    def generate_steps(self, algorithm: str = "backtracker", backend: str = "python", seed: int = None,
+                       log: EventLog = None):
+        """
+        Generates a new maze one step at a time, drawing each step on the window.
+
+        This is a generator that yields after every step instead of sleeping, so the caller decides how
+        fast the maze is built (see core.scheduler.Scheduler, which runs steps from the Tk event loop).
+        The "backtracker" algorithm yields once per cell, the other algorithms carve the whole grid in
+        one step. The arguments are the same as for generate().
+
+        Args:
+            algorithm (str, optional): The generation algorithm, see generate(). Defaults to "backtracker".
+            backend (str, optional): "python" or "numpy". Defaults to "python".
+            seed (int, optional): If given, reseeds the maze's generator first. Defaults to None.
+            log (EventLog, optional): If given, the events of the generation are recorded in it, see generate(). Defaults to None.
+        """
+        generator = self._generator(algorithm, backend)
+        self._algorithm = algorithm
+        self._backend = backend
+        if seed is not None:
+            self._reseed(seed)
+
+        # Create the cells for the maze, with every wall standing
+        self._create_cells()
+        yield
+
+        if generator is None:
+            # Break the walls one cell at a time using iterative backtracking
+            yield from self._break_walls_steps(0, 0, log)
+        else:
+            # Carve the whole grid at once and draw the result
+            generator(self._grid, self._generator_rng(backend))
+            self._grid.version += 1
+            if log is not None:
+                self._log_walls(log)
+            if self._win is not None:
+                self._renderer.draw(self._grid)
+            yield
+
         # Reset the visited status of all cells
+        self._count_generated()
         self._reset_cells_visited()
 
+    def stats(self) -> dict:
+        """
+        Returns the counters and timers collected so far (see core.stats.Stats.summary()), or None if the
+        maze was created without a Stats object.
+        """
+        return self._stats.summary() if self._stats is not None else None
+
+    def _add_time(self, name: str, started: float) -> None:
+        """
+        Adds the time since started (from time.perf_counter()) to a timer, if instrumentation is enabled.
+        """
+        if self._stats is not None:
+            self._stats.add_time(name, time.perf_counter() - started)
+
+    def _count_generated(self) -> None:
+        """
+        Counts the cells visited and walls broken by the generation that just ended, if instrumentation is
+        enabled. Both are read from the grid once, so the generation loops themselves count nothing.
+        """
+        if self._stats is None:
+            return
+        grid = self._grid
+        self._stats.count("cells_visited", bin(int.from_bytes(grid.visited, "little")).count("1"))
+
+        # Every passage between two cells is a missing right or bottom wall inside the grid
+        missing = bytes((not key & RIGHT_WALL) + (not key & BOTTOM_WALL) for key in range(256))
+        passages = sum(bytes(grid.walls).translate(missing))
+        passages -= sum(not grid.walls[k] & RIGHT_WALL for k in range(self._num_cols - 1, grid.size, self._num_cols))
+        passages -= sum(not grid.walls[k] & BOTTOM_WALL for k in range(grid.size - self._num_cols, grid.size))
+        self._stats.count("walls_broken", passages)
+
+    def _log_walls(self, log: EventLog) -> None:
+        """
+        Records every wall missing between two cells, for generators that carve the whole grid at once.
+
+        Args:
+            log (EventLog): The log to record in.
+        """
+        walls = self._grid.walls
+        num_cols = self._num_cols
+        for k in range(self._grid.size):
+            j, i = divmod(k, num_cols)
+            if i + 1 < num_cols and not walls[k] & RIGHT_WALL:
+                log.append(WALL_BROKEN, i, j, RIGHT_WALL)
+            if j + 1 < self._num_rows and not walls[k] & BOTTOM_WALL:
+                log.append(WALL_BROKEN, i, j, BOTTOM_WALL)
+
+    def _generator(self, algorithm: str, backend: str):
+        """
+        Returns the core.generators function for the given algorithm and backend, or None for the backtracker.
+
+        Raises:
+            ValueError: If there is no such generator.
+        """
+        if algorithm == "backtracker" and backend == "python":
+            return None
+        if (algorithm, backend) in generators.GENERATORS:
+            return generators.GENERATORS[(algorithm, backend)]
+        raise ValueError(f"unknown generator {algorithm!r} with backend {backend!r}")
+
+    def _reseed(self, seed: int) -> None:
+        """
+        Reseeds the maze's random number generator, as if the maze had been created with the given seed.
+
+        Args:
+            seed (int): The new seed.
+        """
+        self._seed = seed
+        self._rng.seed(seed)
+
+    def _generator_rng(self, backend: str):
+        """
+        Returns the random number generator passed to the core.generators functions of the given backend.
+        The numpy generator is seeded from the maze's own generator, so it follows reseeds and earlier draws
+        just like the python backend.
+        """
+        if backend == "numpy":
+            import numpy as np
+            return np.random.default_rng(self._rng.getrandbits(64))
+        return self._rng
+
+    def _run_steps(self, steps):
+        """
+        Runs a step generator to completion, animating the window after every step, and returns its result.
+
+        Args:
+            steps (generator): A generator such as the one returned by generate_steps() or solve_steps().
+        """
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+            self._animate()
+
     def _create_cells(self) -> None:
         """
-        Creates a 2D list of Cell objects and draws them on the window.
+        Raises every wall of every cell, breaks the entrance and exit and draws the cells on the window.
 
-        The outer list is a list of columns, and the inner list is a list of cells in each column.
-        The cells are drawn on the window in the order they are created, which is from left to right and top to bottom.
+        The cells themselves live in the packed Grid created in __init__, self._cells only provides
+        a list of columns view over it, where the inner list is a list of cells in each column.
+        All the cells are drawn on the window in one batch.
+        Without a window nothing is drawn and the drawing loop is skipped entirely.
 
         Args:
             None
         """
-        for i in range(self._num_cols): # A loop to create a 2D list of cells
-            col_cells = []
-            for j in range(self._num_rows):
-                col_cells.append(Cell(self._win)) # Create a cell and add it to the column
-            self._cells.append(col_cells) # Add the column to the 2D list of our current maze
+        self._grid.reset_walls() # Start with every wall standing
+        self._grid.reset_visited()
+
+        # Remove the entrance and exit walls
+        self._break_entrance_and_exit()
+
+        if self._win is None: # Headless, there is nothing to draw
+            return
 
-        for i in range(self._num_cols): # A loop to draw each cell
-            for j in range(self._num_rows):
-                self._draw_cell(i, j) # Draw each cell
+        # Draw every cell at once with the batched renderer
+        self._renderer.draw(self._grid)
 
     def _draw_cell(self, i: int, j: int) -> None:
         """
         Draws a cell at the specified column and row indices.
 
-        Calculates the coordinates of the cell based on its position in the grid and the size of each cell.
-        Calls the draw method of the Cell object to render it on the window and animates the drawing process.
-
-        It also breaks the entrance and exit walls of the maze.
+        Only the four grid lines around the cell are redrawn by the batched renderer, which moves the
+        existing canvas items instead of stacking new ones, and then the drawing process is animated.
 
         Args:
             i (int): The column index of the cell.
@@ -82,17 +393,8 @@ class Maze:
         if self._win is None:
             return
 
-        # Calculate the coordinates of the cell based on its position in the grid and the size of each cell
-        x1 = self._x1 + i * self._cell_size_x  # Calculate the x-coordinate of the top left corner of the cell
-        y1 = self._y1 + j * self._cell_size_y  # Calculate the y-coordinate of the top left corner of the cell
-        x2 = x1 + self._cell_size_x  # Calculate the x-coordinate of the bottom right corner of the cell
-        y2 = y1 + self._cell_size_y  # Calculate the y-coordinate of the bottom right corner of the cell
-
-        # Remove the entrance and exit walls
-        self._break_entrance_and_exit()
-
         # Draw the cell
-        self._cells[i][j].draw(x1, x2, y1, y2)
+        self._renderer.update_cell(self._grid, i, j)
 
         # Animate the drawing process
         self._animate()
@@ -105,8 +407,17 @@ class Maze:
         """
         if self._win is None:
             return
+        if self._stats is None:
+            self._win.redraw()
+            time.sleep(ANIMATION_SPEED)
+            return
+
+        started = time.perf_counter()
         self._win.redraw()
+        slept = time.perf_counter()
         time.sleep(ANIMATION_SPEED)
+        self._add_time("sleep", slept)
+        self._add_time("animate", started)
     
     def _break_entrance_and_exit(self):
         """
@@ -116,10 +427,10 @@ class Maze:
         and breaks the bottom wall of the bottom-right cell to create an exit.
         It then redraws the affected cells to visually update the maze.
         """
-        self._cells[0][0].has_left_wall = False
-        self._cells[self._num_cols - 1][self._num_rows - 1].has_bottom_wall = False
+        self._grid.set_wall(0, LEFT_WALL, False)
+        self._grid.set_wall(self._grid.size - 1, BOTTOM_WALL, False)
 
-    def _break_walls_r(self, i, j):
+    def _break_walls_r(self, i, j, draws: RandomBlock = None):
         """
         Recursively breaks walls between cells to create a random maze path using Depth-First Search (DFS).
 
@@ -130,10 +441,14 @@ class Maze:
         Args:
             i (int): The column index of the current cell.
             j (int): The row index of the current cell.
+            draws (RandomBlock, optional): The random choices shared by the recursive calls. Defaults to a new
+                block of draws from the maze's generator.
         """
         # Check if the current cell exists
         if i < 0 or i >= self._num_cols or j < 0 or j >= self._num_rows:
             return
+        if draws is None:
+            draws = RandomBlock(self._rng)
         
         # Mark the current cell as visited
         self._cells[i][j].visited = True
@@ -159,7 +474,7 @@ class Maze:
                 return
             else:
                 # Randomly select one of the unvisited neighbors
-                next = random.choice(to_visit)
+                next = draws.choice(to_visit)
                 
                 # Break the wall between the current cell and the chosen neighbor
                 if next[0] == i - 1:  # Move left
@@ -176,7 +491,188 @@ class Maze:
                     self._cells[next[0]][next[1]].has_top_wall = False
                 
                 # Recursively visit the chosen neighbor
-                self._break_walls_r(next[0], next[1])
+                self._break_walls_r(next[0], next[1], draws)
+
+    def _break_walls_i(self, i: int, j: int) -> None:
+        """
+        Iteratively breaks walls between cells to create a random maze path using Depth-First Search (DFS).
+
+        This is the explicit-stack version of _break_walls_r(). Every iteration of the loop performs the
+        same work as one pass of the while loop in _break_walls_r(): the cell on top of the stack plays the
+        role of the current recursive call, pushing a neighbor replaces the recursive call and popping
+        replaces the return. Random choices and draw calls happen in the same order, so for a given seed
+        both methods carve exactly the same maze, but this one never touches the Python call stack and can
+        build mazes of any size without raising the recursion limit.
+
+        With a window the steps come from _break_walls_steps() and are animated one by one, without one
+        this loop runs with no drawing code at all.
+
+        Args:
+            i (int): The column index of the starting cell.
+            j (int): The row index of the starting cell.
+        """
+        # Check if the starting cell exists
+        if i < 0 or i >= self._num_cols or j < 0 or j >= self._num_rows:
+            return
+
+        # With a window, draw and animate every step
+        if self._win is not None:
+            self._run_steps(self._break_walls_steps(i, j))
+            return
+
+        # Work directly on the packed grid, looking attributes up once instead of once per step
+        num_cols = self._num_cols
+        num_rows = self._num_rows
+        walls = self._grid.walls
+        visited = self._grid.visited
+
+        # Random values are read straight from blocks drawn in bulk, see RandomBlock.below()
+        draws = RandomBlock(self._rng)
+        values = draws.next_block()
+        pos = 0
+
+        # Mark the starting cell as visited and push its index on the stack
+        k = j * num_cols + i
+        visited[k >> 3] |= 1 << (k & 7)
+        stack = array("I", [k])  # 4 bytes per entry, even at its deepest the stack stays small
+
+        # Unvisited neighboring cells, the first n slots are used (reused at every step instead of a new list)
+        to_visit = [0, 0, 0, 0]
+
+        while stack:
+            # The cell on top of the stack is the current cell
+            k = stack[-1]
+            j, i = divmod(k, num_cols)
+            n = 0
+
+            # Check neighbors (left, top, right, bottom) and add unvisited ones to the list
+            if i - 1 >= 0 and not visited[(k - 1) >> 3] & (1 << ((k - 1) & 7)):
+                to_visit[n] = k - 1
+                n += 1
+            if j - 1 >= 0 and not visited[(k - num_cols) >> 3] & (1 << ((k - num_cols) & 7)):
+                to_visit[n] = k - num_cols
+                n += 1
+            if i + 1 < num_cols and not visited[(k + 1) >> 3] & (1 << ((k + 1) & 7)):
+                to_visit[n] = k + 1
+                n += 1
+            if j + 1 < num_rows and not visited[(k + num_cols) >> 3] & (1 << ((k + num_cols) & 7)):
+                to_visit[n] = k + num_cols
+                n += 1
+
+            # If no unvisited neighbors, backtrack to the previous cell
+            if n == 0:
+                stack.pop()
+                continue
+
+            # Randomly select one of the unvisited neighbors
+            if pos == len(values):
+                values = draws.next_block()
+                pos = 0
+            next = to_visit[(values[pos] * n) >> 16]
+            pos += 1
+
+            # Break the wall between the current cell and the chosen neighbor
+            # (vertical moves are checked first, in a single column k - 1 is also the cell above)
+            if next == k - num_cols:  # Move up
+                walls[k] &= ~TOP_WALL
+                walls[next] &= ~BOTTOM_WALL
+            elif next == k + num_cols:  # Move down
+                walls[k] &= ~BOTTOM_WALL
+                walls[next] &= ~TOP_WALL
+            elif next == k - 1:  # Move left
+                walls[k] &= ~LEFT_WALL
+                walls[next] &= ~RIGHT_WALL
+            else:  # Move right
+                walls[k] &= ~RIGHT_WALL
+                walls[next] &= ~LEFT_WALL
+
+            # Visit the chosen neighbor next (instead of recursing into it)
+            visited[next >> 3] |= 1 << (next & 7)
+            stack.append(next)
+
+        self._grid.version += 1
+
+    def _break_walls_steps(self, i: int, j: int, log: EventLog = None):
+        """
+        Generator version of _break_walls_i() that redraws a cell when the search backtracks from it and
+        then yields, so the caller can animate each step. It makes the same random choices in the same order.
+        The steps only update the canvas items, redrawing the window and pausing is left to the caller
+        (_run_steps() or the Scheduler).
+
+        Args:
+            i (int): The column index of the starting cell.
+            j (int): The row index of the starting cell.
+            log (EventLog, optional): If given, every wall knocked down is recorded in it, and every cell
+                visited or backtracked from. Defaults to None.
+        """
+        grid = self._grid
+        num_cols = self._num_cols
+        draws = RandomBlock(self._rng)
+
+        # Mark the starting cell as visited and push its index on the stack
+        k = grid.index(i, j)
+        grid.set_visited(k, True)
+        if log is not None:
+            log.append(CELL_VISITED, i, j)
+        stack = array("I", [k])
+
+        while stack:
+            # The cell on top of the stack is the current cell
+            k = stack[-1]
+            j, i = divmod(k, num_cols)
+
+            # Unvisited neighboring cells, in the order left, top, right, bottom
+            to_visit = [n for n, inside in ((k - 1, i > 0), (k - num_cols, j > 0),
+                                            (k + 1, i + 1 < num_cols), (k + num_cols, j + 1 < self._num_rows))
+                        if inside and not grid.is_visited(n)]
+
+            # If no unvisited neighbors, redraw the current cell and backtrack to the previous one
+            if len(to_visit) == 0:
+                if self._renderer is not None:
+                    self._renderer.update_cell(grid, i, j)
+                if log is not None:
+                    log.append(CELL_VISITED, i, j)  # Replayed as the same redraw
+                stack.pop()
+                yield
+                continue
+
+            # Randomly select one of the unvisited neighbors and break the wall between them
+            next = draws.choice(to_visit)
+            wall = self._break_wall_between(k, next)
+
+            # Visit the chosen neighbor next
+            grid.set_visited(next, True)
+            if log is not None:
+                next_j, next_i = divmod(next, num_cols)
+                log.append(WALL_BROKEN, i, j, wall)
+                log.append(CELL_VISITED, next_i, next_j)
+            stack.append(next)
+
+    def _direction(self, k: int, n: int) -> int:
+        """
+        Returns the wall of the cell at index k facing its neighbor at index n.
+        """
+        if n == k - self._num_cols:  # n is above k
+            return TOP_WALL
+        if n == k + self._num_cols:  # n is below k
+            return BOTTOM_WALL
+        if n == k - 1:  # n is left of k
+            return LEFT_WALL
+        return RIGHT_WALL
+
+    def _break_wall_between(self, k: int, n: int) -> int:
+        """
+        Breaks the wall between the neighboring cells at indices k and n, on both sides, and returns
+        the wall of cell k that was broken.
+
+        Args:
+            k (int): The index of the first cell.
+            n (int): The index of the second cell.
+        """
+        wall = self._direction(k, n)
+        self._grid.set_wall(k, wall, False)
+        self._grid.set_wall(n, OPPOSITE_WALL[wall], False)
+        return wall
 
     def _reset_cells_visited(self):
         """
@@ -185,82 +681,283 @@ class Maze:
         This method is used to reset the maze after it has been solved.
         It sets the visited status of all cells to False, allowing the maze to be solved again.
         """
-        # Loop through all cells in the maze
-        for i in range(self._num_cols): # A loop to create a 2D list of cells
-            for j in range(self._num_rows):
-                # Reset the visited status of each cell
-                self._cells[i][j].visited = False
+        # Clear the visited bitmap of the grid in one go
+        self._grid.reset_visited()
     
-    def solve(self):
+    def solve(self, algorithm: str = "dfs", log: EventLog = None) -> SolveResult:
+        """
+        Solves the maze from the top-left cell to the exit in the bottom-right cell.
+
+        This method is the entry point for solving the maze. The "dfs" algorithm is the classic depth-first
+        search, the other algorithms ("bfs", "astar", "bidirectional" and "bitboard") return a shortest path.
+        "bitboard" moves the whole frontier at once on bitsets (see core.bitboard), which pays off on open
+        grids but not on perfect mazes. Without a window the iterative solvers from core.solvers run with no
+        drawing or sleeping. With a window the steps of solve_steps() are animated one by one. Either way the
+        visited flags start cleared, so the same maze can be solved again, and afterwards they hold the cells
+        explored by the last solve.
+
+        Args:
+            algorithm (str): One of "dfs", "bfs", "astar", "bidirectional" or "bitboard". Defaults to "dfs".
+            log (EventLog, optional): If given, the moves of the solver are recorded in it, see core.events. Defaults to None.
+
+        Returns:
+            SolveResult: The path as an array of cell indices along with the number of cells expanded and the
+            time taken. It is truthy if the exit was reached, just like the bool this method used to return.
         """
-        Solves the maze using a recursive depth-first search algorithm.
+        started = time.perf_counter()
 
-        This method is the entry point for solving the maze. It calls the recursive
-        helper method _solve_r() to start the search from the top-left cell of the maze.
-        If the search is successful, it returns True. If the search is unsuccessful, it returns False.
+        # Headless, run the iterative solver at full speed, from a clean visited bitmap like solve_steps()
+        if self._win is None and log is None:
+            self._reset_cells_visited()
+            result = solvers.solve(self._grid, algorithm)
+            self._count_solved(result)
+        else:
+            result = self._run_steps(self.solve_steps(algorithm, log))
+        self._add_time("solve", started)
+        return result
+
+    def _count_solved(self, result: SolveResult) -> None:
         """
-        # Start the search from the top-left cell
-        if self._solve_r(0, 0):
-            # If the search is successful, return True
-            return True
-        # If the search is unsuccessful, return False
-        return False
-    
-    def _solve_r(self, i: int, j: int):
+        Counts a finished solve, if instrumentation is enabled.
+        """
+        if self._stats is not None:
+            self._stats.count("solves")
+            self._stats.count("cells_expanded", result.nodes_expanded)
+
+    def index(self) -> MazeIndex:
+        """
+        Returns the adjacency and distance index of the maze, see core.index. It is built on first use and
+        kept until the walls change (tracked by the grid's version), so repeated queries share one search.
         """
-        Solves the maze using a recursive depth-first search algorithm.
+        if self._index is None or self._index.version != self._grid.version:
+            self._index = MazeIndex(self._grid)
+        return self._index
 
-        This method is the recursive helper method for the solve() method. It is
-        called to start the search from the top-left cell of the maze. If the search
-        is successful, it returns True. If the search is unsuccessful, it returns False.
+    def query(self, start: tuple = (0, 0), goal: tuple = None) -> SolveResult:
+        """
+        Returns the path between two cells using the index of the maze instead of a new search. Paths to
+        the exit take time proportional to their length, paths between two other cells go through their
+        lowest common ancestor in the search tree from the exit, which in a perfect maze is the only path.
 
         Args:
-            i (int): The column index of the current cell.
-            j (int): The row index of the current cell.
+            start (tuple, optional): The (column, row) of the start cell. Defaults to the top left cell.
+            goal (tuple, optional): The (column, row) of the goal cell. Defaults to the exit in the bottom right cell.
+
+        Returns:
+            SolveResult: The path as an array of cell indices, with the algorithm "index".
         """
-        if (i > 0 or i < self._num_cols) and (j > 0 or j < self._num_rows):
-            # Animate the drawing process
-            self._animate()
-            # Mark the current cell as visited
-            self._cells[i][j].visited = True
-            
-            # If the current cell is the exit, return True
-            if i == self._num_cols - 1 and j == self._num_rows - 1:
-                return True
-            
-            # Check the four possible directions to move
-            # If the direction is valid (i.e., the cell is not visited and there is no wall in the way)
-            # draw the move, recursively call _solve_r() to continue the search,
-            # and if the search is successful, return True
-            # If the search is unsuccessful, draw the move again (with a different color to indicate failure)
-            # and return False
-            
-            # Left direction
-            if i > 0 and not self._cells[i - 1][j].visited and not self._cells[i][j].has_left_wall:
-                self._cells[i][j].draw_move(self._cells[i - 1][j])
-                if self._solve_r(i - 1, j):
-                    return True
-                else:
-                    self._cells[i][j].draw_move(self._cells[i - 1][j], True)
-            # Top direction
-            if j > 0 and not self._cells[i][j - 1].visited and not self._cells[i][j].has_top_wall:
-                self._cells[i][j].draw_move(self._cells[i][j - 1])
-                if self._solve_r(i, j - 1):
-                    return True
-                else:
-                    self._cells[i][j].draw_move(self._cells[i][j - 1], True)
-            # Right direction
-            if i + 1 < self._num_cols and not self._cells[i + 1][j].visited and not self._cells[i][j].has_right_wall:
-                self._cells[i][j].draw_move(self._cells[i + 1][j])
-                if self._solve_r(i + 1, j):
-                    return True
-                else:
-                    self._cells[i][j].draw_move(self._cells[i + 1][j], True)
-            # Bottom direction
-            if j + 1 < self._num_rows and not self._cells[i][j + 1].visited and not self._cells[i][j].has_bottom_wall:
-                self._cells[i][j].draw_move(self._cells[i][j + 1])
-                if self._solve_r(i, j + 1):
-                    return True
-                else:
-                    self._cells[i][j].draw_move(self._cells[i][j + 1], True)
-        return False
+        index = self.index()
+        started = time.perf_counter()
+        k = self._grid.index(*start)
+        path = index.path_to_root(k) if goal is None else index.path(k, self._grid.index(*goal))
+        return SolveResult("index", path, len(path), time.perf_counter() - started, self._num_cols)
+
+    def query_batch(self, starts, goals=None) -> PathBatch:
+        """
+        Returns the paths between many pairs of cells at once, using the index of the maze (see query()).
+
+            batch = maze.query_batch([0, 0, 5, 7], [9, 9, 0, 0])  # (0, 0) -> (9, 9) and (5, 7) -> (0, 0)
+            batch.path(1)          # array of cell indices
+            batch.coordinates()    # flat (column, row) pairs of every path, back to back
+
+        Args:
+            starts (sequence): The start cells as a flat sequence of (column, row) pairs: [i0, j0, i1, j1, ...].
+            goals (sequence, optional): The goal cells in the same layout, one per start. Defaults to the exit
+                for every start.
+
+        Returns:
+            PathBatch: The paths as flat offsets and cells arrays, empty for a goal that cannot be reached.
+
+        Raises:
+            ValueError: If starts and goals do not hold the same number of cells.
+        """
+        index = self.index()
+        num_cols = self._num_cols
+        start_cells = [j * num_cols + i for i, j in zip(starts[0::2], starts[1::2])]
+        if goals is None:
+            return index.paths(start_cells)
+        if len(goals) != len(starts):
+            raise ValueError(f"expected {len(starts) // 2} goals, got {len(goals) // 2}")
+        return index.paths(start_cells, [j * num_cols + i for i, j in zip(goals[0::2], goals[1::2])])
+
+    def show_path(self) -> SolveResult:
+        """
+        Draws the path from the entrance to the exit given by the index (see query()) on the window, replacing
+        the one drawn before. Once shown, the path is kept up to date by open_wall() and close_wall().
+
+        Returns:
+            SolveResult: The path, empty if the exit cannot be reached.
+        """
+        result = self.query()
+        if self._renderer is not None:
+            if self._shown_path is not None:
+                self._renderer.erase_path(self._shown_path)
+            self._renderer.draw_path(self._num_cols, result.path)
+        self._shown_path = result.path
+        return result
+
+    def open_wall(self, cell: tuple, neighbor: tuple) -> int:
+        """
+        Knocks down the wall between two neighboring cells, on both sides, and updates the index and the shown
+        path incrementally instead of solving again. Only the two cells and the part of the path that changed
+        are redrawn.
+
+        Args:
+            cell (tuple): The (column, row) of a cell.
+            neighbor (tuple): The (column, row) of one of its four neighbors.
+
+        Returns:
+            int: The number of cells whose distance to the exit changed.
+
+        Raises:
+            ValueError: If the cells are not neighbors.
+        """
+        return self._edit_wall(cell, neighbor, False)
+
+    def close_wall(self, cell: tuple, neighbor: tuple) -> int:
+        """
+        Puts up the wall between two neighboring cells, on both sides, and updates the index and the shown
+        path incrementally, see open_wall().
+
+        Args:
+            cell (tuple): The (column, row) of a cell.
+            neighbor (tuple): The (column, row) of one of its four neighbors.
+
+        Returns:
+            int: The number of cells whose distance to the exit was searched again.
+
+        Raises:
+            ValueError: If the cells are not neighbors.
+        """
+        return self._edit_wall(cell, neighbor, True)
+
+    def _edit_wall(self, cell: tuple, neighbor: tuple, present: bool) -> int:
+        """
+        Sets the wall between two neighboring cells and repairs what depends on it, see open_wall().
+        """
+        (i, j), (ni, nj) = cell, neighbor
+        if abs(i - ni) + abs(j - nj) != 1 or not (0 <= ni < self._num_cols and 0 <= nj < self._num_rows):
+            raise ValueError(f"cells {cell} and {neighbor} are not neighbors")
+        k = self._grid.index(i, j)
+        n = self._grid.index(ni, nj)
+        wall = self._direction(k, n)
+        if self._grid.has_wall(k, wall) == present:
+            return 0
+
+        # Repair the index only if it matched the walls before the edit, otherwise index() builds a new one
+        index = self._index if self._index is not None and self._index.version == self._grid.version else None
+        self._grid.set_wall(k, wall, present)
+        self._grid.set_wall(n, OPPOSITE_WALL[wall], present)
+        changed = 0
+        if index is not None:
+            changed = index.close_wall(k, n) if present else index.open_wall(k, n)
+
+        if self._renderer is not None:
+            self._renderer.update_cell(self._grid, i, j)
+            self._renderer.update_cell(self._grid, ni, nj)
+        if self._shown_path is not None:
+            self._update_shown_path()
+        return changed
+
+    def _update_shown_path(self) -> None:
+        """
+        Replaces the shown path by the current one, erasing and drawing only the part between the cells
+        both paths start and end with.
+        """
+        old = self._shown_path
+        new = self.index().path_to_root(0)
+        limit = min(len(old), len(new))
+        prefix = 0
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+
+        # The changed parts, with the last common cell on each side so the joining lines are included
+        first = max(prefix - 1, 0)
+        if self._renderer is not None:
+            self._renderer.erase_path(old[first:len(old) - suffix + 1])
+            self._renderer.draw_path(self._num_cols, new[first:len(new) - suffix + 1])
+        self._shown_path = new
+
+    def solve_steps(self, algorithm: str = "dfs", log: EventLog = None):
+        """
+        Solves the maze one step at a time, drawing each move on the window.
+
+        This is a generator that yields after every step instead of sleeping, and returns the SolveResult
+        when it is exhausted (see solve() for the algorithms). The "dfs" algorithm draws the search as it
+        goes with an explicit stack, moving forward in red and backtracking in gray. The other algorithms
+        find the path at full speed and then draw it one move per step.
+
+        Args:
+            algorithm (str): One of "dfs", "bfs", "astar", "bidirectional" or "bitboard". Defaults to "dfs".
+            log (EventLog, optional): If given, every move is recorded in it. Defaults to None.
+        """
+        # Forget the cells visited by an earlier solve, so they neither block this one nor show as explored
+        self._reset_cells_visited()
+        if algorithm != "dfs":
+            result = solvers.solve(self._grid, algorithm)
+            for n in range(1, len(result.path)):
+                self._draw_move(result.path[n - 1], result.path[n], log=log)
+                yield
+            self._count_solved(result)
+            return result
+
+        # Depth-first search from the top-left cell, the stack is the current path
+        started = time.perf_counter()
+        grid = self._grid
+        num_cols = self._num_cols
+        goal = grid.size - 1
+        grid.set_visited(0, True)
+        stack = array("I", [0])
+        expanded = 1
+        if log is not None:
+            log.append(CELL_VISITED, 0, 0)
+        yield
+
+        while stack and stack[-1] != goal:
+            k = stack[-1]
+            i = k % num_cols
+
+            # Pick the first neighbor (left, top, right, bottom) that is not visited and has no wall in the way
+            for n, wall, inside in ((k - 1, LEFT_WALL, i > 0), (k - num_cols, TOP_WALL, k >= num_cols),
+                                    (k + 1, RIGHT_WALL, i + 1 < num_cols), (k + num_cols, BOTTOM_WALL, k + num_cols < grid.size)):
+                if inside and not grid.has_wall(k, wall) and not grid.is_visited(n):
+                    # Move forward to the neighbor
+                    self._draw_move(k, n, log=log)
+                    grid.set_visited(n, True)
+                    stack.append(n)
+                    expanded += 1
+                    break
+            else:
+                # Dead end, draw the move back in gray and backtrack
+                stack.pop()
+                if stack:
+                    self._draw_move(stack[-1], k, True, log)
+            yield
+
+        result = SolveResult("dfs", stack, expanded, time.perf_counter() - started, num_cols)
+        self._count_solved(result)
+        return result
+
+    def _draw_move(self, k: int, n: int, undo: bool = False, log: EventLog = None) -> None:
+        """
+        Draws a move between the cells at indices k and n on the window.
+
+        Args:
+            k (int): The index of the cell the move starts from.
+            n (int): The index of the cell the move goes to.
+            undo (bool): Whether the move is a backtrack. Defaults to False.
+            log (EventLog, optional): If given, the move is recorded in it, a backtrack as going from n back to k. Defaults to None.
+        """
+        from_j, from_i = divmod(k, self._num_cols)
+        to_j, to_i = divmod(n, self._num_cols)
+        if log is not None:
+            if undo:
+                log.append(BACKTRACK, to_i, to_j, self._direction(n, k))
+            else:
+                log.append(MOVE, from_i, from_j, self._direction(k, n))
+        if self._win is None:
+            return
+        self._renderer.draw_moves(self._num_cols, [(k, n, undo)])
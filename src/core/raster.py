@@ -0,0 +1,400 @@
+"""
+Offscreen rendering of a maze to PPM and PNG images, without Tk or a display.
+
+Every cell is cell_size x cell_size pixels whose top row and left column are its top and left walls, plus
+one more pixel row and column for the bottom and right borders. The pixels of a cell only depend on a
+single key byte (its four wall bits plus the path marks below), so the pixels of every possible key are
+built once and each image row is assembled with one bytes.join() over the keys of a row of cells, without
+a Python loop per pixel. Rows are produced one at a time, and the marks of a row are read from the path and
+the visited bitmap when it is drawn, so memory stays at a few rows of pixels (plus a few bytes per cell of
+the path) whatever the size of the maze, and the writers stream them straight to a file.
+"""
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL
+from constants import WALL_COLOR, PATH_COLOR, BACKTRACK_COLOR, WINDOW_BG_COLOR
+from array import array
+import struct
+import zlib
+
+# Marks added to the wall bits of a cell in its key byte
+PATH_MARK = 16  # The cell is on the solve path
+BACKTRACK_MARK = 32  # The cell was explored and backtracked from
+JOIN_TOP = 64  # The gap in the top wall has the color of the cell, it joins the marked cell above
+JOIN_LEFT = 128  # The gap in the left wall has the color of the cell, it joins the marked cell to the left
+
+# Tk color names used by constants.py and a few common ones, other colors can be given as "#rrggbb"
+NAMED_COLORS = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "red": (255, 0, 0),
+    "green": (0, 255, 0),
+    "blue": (0, 0, 255),
+    "yellow": (255, 255, 0),
+    "gray": (190, 190, 190),
+    "grey": (190, 190, 190),
+}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def parse_color(color: str) -> bytes:
+    """
+    Returns the three RGB bytes of a color name from NAMED_COLORS or a "#rgb" / "#rrggbb" string.
+
+    Raises:
+        ValueError: If the color is not recognized.
+    """
+    name = color.strip().lower()
+    if name in NAMED_COLORS:
+        return bytes(NAMED_COLORS[name])
+    if name.startswith("#") and len(name) in (4, 7):
+        digits = name[1:] if len(name) == 7 else "".join(c * 2 for c in name[1:])
+        try:
+            return bytes.fromhex(digits)
+        except ValueError:
+            pass
+    raise ValueError(f"unknown color {color!r}")
+
+
+class RowRasterizer():
+    def __init__(self, num_cols: int, num_rows: int, cell_size: int = 4, wall_color: str = WALL_COLOR,
+                 path_color: str = PATH_COLOR, backtrack_color: str = BACKTRACK_COLOR, background: str = WINDOW_BG_COLOR):
+        """
+        Initializes a RowRasterizer turning rows of cell keys into rows of pixels, without holding the maze.
+
+        Args:
+            num_cols (int): The number of columns of the maze.
+            num_rows (int): The number of rows of the maze.
+            cell_size (int, optional): The size of a cell in pixels, walls included (at least 2). Defaults to 4.
+            wall_color (str, optional): The color of the walls. Defaults to WALL_COLOR.
+            path_color (str, optional): The color of the path. Defaults to PATH_COLOR.
+            backtrack_color (str, optional): The color of backtracked cells. Defaults to BACKTRACK_COLOR.
+            background (str, optional): The color of empty cells. Defaults to WINDOW_BG_COLOR.
+        """
+        if cell_size < 2:
+            raise ValueError("cell_size must be at least 2")
+        self._cell_size = cell_size
+        self.width = num_cols * cell_size + 1  # In pixels
+        self.height = num_rows * cell_size + 1
+
+        wall = parse_color(wall_color)
+        fills = {0: parse_color(background), PATH_MARK: parse_color(path_color),
+                 BACKTRACK_MARK: parse_color(backtrack_color)}
+        self._wall = wall
+        self._background = fills[0]
+
+        # Pixels of the top row and of the other rows of a cell, for every key byte
+        self._top = []
+        self._inner = []
+        for key in range(256):
+            fill = fills.get(key & (PATH_MARK | BACKTRACK_MARK), fills[0])
+            top_gap = fill if key & JOIN_TOP else fills[0]
+            left_gap = fill if key & JOIN_LEFT else fills[0]
+            self._top.append(wall + (wall if key & TOP_WALL else top_gap) * (cell_size - 1))
+            self._inner.append((wall if key & LEFT_WALL else left_gap) + fill * (cell_size - 1))
+        self._bottom = [wall + (wall if key & BOTTOM_WALL else fills[0]) * (cell_size - 1) for key in range(256)]
+
+    def cell_rows(self, keys):
+        """
+        Yields the cell_size pixel rows of one row of cells, as width * 3 RGB bytes each.
+
+        Args:
+            keys (bytes): The key byte of every cell of the row: its wall bits, plus marks if any.
+        """
+        yield b"".join(map(self._top.__getitem__, keys)) + self._wall
+        right = self._wall if keys[-1] & RIGHT_WALL else self._background
+        row = b"".join(map(self._inner.__getitem__, keys)) + right
+        for _ in range(self._cell_size - 1):
+            yield row
+
+    def bottom_row(self, keys) -> bytes:
+        """
+        Returns the pixel row of the bottom border, below the given last row of cells.
+
+        Args:
+            keys (bytes): The key byte of every cell of the last row.
+        """
+        return b"".join(map(self._bottom.__getitem__, keys)) + self._wall
+
+
+class Rasterizer(RowRasterizer):
+    def __init__(self, grid: Grid, cell_size: int = 4, path=None, visited: bytearray = None, segments=None,
+                 **colors):
+        """
+        Initializes a Rasterizer producing the pixels of a whole maze one row at a time.
+
+        Args:
+            grid (Grid): The walls of the maze.
+            cell_size (int, optional): The size of a cell in pixels, walls included (at least 2). Defaults to 4.
+            path (array, optional): The indices of the cells on the solve path, e.g. SolveResult.path. Defaults to None.
+            visited (bytearray, optional): A visited bitmap like Grid.visited, visited cells that are not
+                on the path are drawn as backtracked. Defaults to None.
+            segments (iterable, optional): (cell, cell) pairs of neighboring cells drawn like the path, each
+                pair joined on its own, e.g. separate solver moves. Defaults to None.
+            **colors: wall_color, path_color, backtrack_color and background, see RowRasterizer.
+        """
+        super().__init__(grid.num_cols, grid.num_rows, cell_size, **colors)
+        self._grid = grid
+        self._path_marks = self._mark_path(path, segments)
+        self._visited = visited
+
+    def _mark_path(self, path, segments) -> tuple:
+        """
+        Returns the marks of the cells on the path and the segments grouped by row, as (offsets, entries): the
+        entries of row j are entries[offsets[j]:offsets[j + 1]], each (index << 8) | marks, and a cell can have
+        more than one. Both are flat arrays, 8 bytes per entry and per row, or None without a path or segments.
+        """
+        if path is None and segments is None:
+            return None
+        num_cols = self._grid.num_cols
+        num_rows = self._grid.num_rows
+        marks = array("Q")
+        append = marks.append
+
+        def join(k, previous):
+            # The two cells are joined through the wall gap between them
+            append(k << 8 | PATH_MARK)
+            if previous == k + num_cols:
+                append(previous << 8 | JOIN_TOP)
+            elif previous == k - num_cols:
+                append(k << 8 | JOIN_TOP)
+            elif previous == k + 1:
+                append(previous << 8 | JOIN_LEFT)
+            elif previous == k - 1:
+                append(k << 8 | JOIN_LEFT)
+
+        # Consecutive cells of the path are joined, the cells of a segment only to each other
+        previous = None
+        for k in path if path is not None else ():
+            join(k, previous)
+            previous = k
+        for k, n in segments if segments is not None else ():
+            append(k << 8 | PATH_MARK)
+            join(n, k)
+
+        # Group the entries by row with a counting sort
+        offsets = array("Q", [0]) * (num_rows + 1)
+        for entry in marks:
+            offsets[(entry >> 8) // num_cols + 1] += 1
+        for j in range(num_rows):
+            offsets[j + 1] += offsets[j]
+        entries = array("Q", [0]) * len(marks)
+        fill = offsets[:-1]
+        for entry in marks:
+            j = (entry >> 8) // num_cols
+            entries[fill[j]] = entry
+            fill[j] += 1
+        return offsets, entries
+
+    def _path_row(self, j: int) -> dict:
+        """
+        Returns the marks of the cells of row j on the path, as {column: marks}.
+        """
+        row = {}
+        if self._path_marks is None:
+            return row
+        offsets, entries = self._path_marks
+        start = j * self._grid.num_cols
+        for entry in entries[offsets[j]:offsets[j + 1]]:
+            i = (entry >> 8) - start
+            row[i] = row.get(i, 0) | (entry & 0xFF)
+        return row
+
+    def _visited_row(self, j: int) -> int:
+        """
+        Returns the visited flags of the cells of row j as an int, bit i for column i.
+        """
+        num_cols = self._grid.num_cols
+        start = j * num_cols
+        end = start + num_cols
+        bits = int.from_bytes(self._visited[start >> 3:(end + 7) >> 3], "little")
+        return (bits >> (start & 7)) & ((1 << num_cols) - 1)
+
+    def _row_marks(self, j: int) -> dict:
+        """
+        Returns the marks of the cells of row j on the path and of its backtracked cells, as {column: marks}.
+        Only the path entries and visited flags of this row and the one above are read, so marking costs no
+        memory per cell of the maze.
+        """
+        row = self._path_row(j)
+        if self._visited is None:
+            return row
+
+        # Backtracked cells are joined to the backtracked cells above and to the left with no wall between them
+        walls = self._grid.walls
+        start = j * self._grid.num_cols
+        backtracked = self._visited_row(j) & ~sum(1 << i for i in row)
+        above = 0
+        if j > 0:
+            above = self._visited_row(j - 1) & ~sum(1 << i for i in self._path_row(j - 1))
+        bits = backtracked
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            i = low.bit_length() - 1
+            wall = walls[start + i]
+            marks = BACKTRACK_MARK
+            if above & low and not wall & TOP_WALL:
+                marks |= JOIN_TOP
+            if backtracked & (low >> 1) and not wall & LEFT_WALL:
+                marks |= JOIN_LEFT
+            row[i] = marks
+        return row
+
+    def rows(self):
+        """
+        Yields the pixels of the image one row at a time, from top to bottom, as width * 3 RGB bytes.
+        """
+        grid = self._grid
+        num_cols = grid.num_cols
+        walls = grid.walls
+
+        keys = b""
+        for j in range(grid.num_rows):
+            keys = walls[j * num_cols:(j + 1) * num_cols]
+            row_marks = self._row_marks(j)
+            if row_marks:
+                keys = bytearray(keys)
+                for i, bits in row_marks.items():
+                    keys[i] |= bits
+            yield from self.cell_rows(keys)
+
+        yield self.bottom_row(keys)
+
+
+class RegionRasterizer(Rasterizer):
+    def __init__(self, grid: Grid, columns: range, rows: range, cell_size: int = 2, path=None,
+                 visited: bytearray = None, segments=None, **colors):
+        """
+        Initializes a RegionRasterizer producing the pixels of part of a maze, optionally keeping only every
+        n-th column and row of cells to make a smaller picture of a large area (see core.gui.LODRenderer).
+
+        The keys of a row of cells are one slice of the walls with the step of the range, so the cost is
+        proportional to the pixels produced, however many cells are skipped.
+
+        Args:
+            grid (Grid): The walls of the maze.
+            columns (range): The columns of the cells to draw, e.g. range(100, 300, 2) for every other column
+                from 100 to 299. The step must be positive.
+            rows (range): The rows of the cells to draw, likewise.
+            cell_size (int, optional): The size of a cell in pixels, walls included (at least 2). Defaults to 2.
+            path (array, optional): The indices of the cells on the solve path, see Rasterizer. Defaults to None.
+            visited (bytearray, optional): A visited bitmap like Grid.visited, see Rasterizer. Defaults to None.
+            segments (iterable, optional): Pairs of cells drawn like the path, see Rasterizer. Defaults to None.
+            **colors: wall_color, path_color, backtrack_color and background, see RowRasterizer.
+
+        Raises:
+            ValueError: If the region holds no cell.
+        """
+        if not columns or not rows:
+            raise ValueError("the region holds no cell")
+        super().__init__(grid, cell_size, path, visited, segments, **colors)
+        self._columns = columns
+        self._rows = rows
+        self.width = len(columns) * cell_size + 1
+        self.height = len(rows) * cell_size + 1
+
+    def rows(self):
+        """
+        Yields the pixels of the picture of the region one row at a time, from top to bottom, as width * 3 RGB bytes.
+        """
+        columns = self._columns
+        num_cols = self._grid.num_cols
+        walls = self._grid.walls
+
+        keys = b""
+        for j in self._rows:
+            start = j * num_cols
+            keys = walls[start + columns.start:start + columns.stop:columns.step]
+            row_marks = self._row_marks(j)
+            if row_marks:
+                keys = bytearray(keys)
+                for i, bits in row_marks.items():
+                    if i in columns:
+                        keys[columns.index(i)] |= bits
+            yield from self.cell_rows(keys)
+
+        yield self.bottom_row(keys)
+
+
+def write_ppm(file, rasterizer: Rasterizer) -> None:
+    """
+    Writes the image as a binary PPM (P6) to a file opened in binary mode, one row at a time.
+    """
+    file.write(b"P6\n%d %d\n255\n" % (rasterizer.width, rasterizer.height))
+    for row in rasterizer.rows():
+        file.write(row)
+
+
+def ppm_bytes(rasterizer: Rasterizer) -> bytes:
+    """
+    Returns the image as binary PPM (P6) data in memory, e.g. for a Tk PhotoImage.
+    """
+    return b"P6\n%d %d\n255\n" % (rasterizer.width, rasterizer.height) + b"".join(rasterizer.rows())
+
+
+def _png_chunk(file, kind: bytes, data: bytes) -> None:
+    """
+    Writes one PNG chunk: length, type, data and CRC.
+    """
+    file.write(struct.pack(">I", len(data)))
+    file.write(kind)
+    file.write(data)
+    file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+
+def write_png(file, rasterizer: Rasterizer, level: int = 1, chunk_size: int = 1 << 16) -> None:
+    """
+    Writes the image as an 8-bit RGB PNG to a file opened in binary mode. Rows are compressed as they
+    are produced and written out in IDAT chunks of about chunk_size bytes.
+
+    Args:
+        file (file): The file to write to.
+        rasterizer (Rasterizer): The image to write.
+        level (int, optional): The zlib compression level, from 0 (none) to 9 (smallest). Defaults to 1,
+            compression takes most of the time and higher levels only make maze images a little smaller.
+        chunk_size (int, optional): The size of the IDAT chunks to write. Defaults to 64 KiB.
+    """
+    file.write(PNG_SIGNATURE)
+    _png_chunk(file, b"IHDR", struct.pack(">IIBBBBB", rasterizer.width, rasterizer.height, 8, 2, 0, 0, 0))
+
+    compressor = zlib.compressobj(level)
+    pending = bytearray()
+    for row in rasterizer.rows():
+        pending += compressor.compress(b"\0" + row)  # Filter type 0 (none) before every row
+        if len(pending) >= chunk_size:
+            _png_chunk(file, b"IDAT", bytes(pending))
+            pending.clear()
+    pending += compressor.flush()
+    _png_chunk(file, b"IDAT", bytes(pending))
+    _png_chunk(file, b"IEND", b"")
+
+
+# Writers by image format
+WRITERS = {
+    "png": write_png,
+    "ppm": write_ppm,
+}
+
+
+def save_image(file, rasterizer: Rasterizer, image_format: str = None) -> None:
+    """
+    Writes the image to a path or to a file opened in binary mode (e.g. io.BytesIO).
+
+    Args:
+        file (str or file): The path of the file to write, or a file object.
+        rasterizer (Rasterizer): The image to write.
+        image_format (str, optional): "png" or "ppm". Defaults to the extension of the path.
+
+    Raises:
+        ValueError: If the format is unknown or cannot be guessed.
+    """
+    if image_format is None and isinstance(file, str):
+        image_format = file.rpartition(".")[2].lower()
+    if image_format not in WRITERS:
+        raise ValueError(f"unknown image format {image_format!r}, expected one of {', '.join(WRITERS)}")
+
+    if isinstance(file, str):
+        with open(file, "wb") as out:
+            WRITERS[image_format](out, rasterizer)
+    else:
+        WRITERS[image_format](file, rasterizer)
@@ -0,0 +1,62 @@
+"""
+Random numbers drawn in blocks, for generators that make one small random choice per step.
+"""
+from array import array
+import random
+import sys
+
+# Number of 16-bit values drawn from the underlying generator at once
+BLOCK_SIZE = 4096
+
+
+class RandomBlock():
+    def __init__(self, rng: random.Random, block_size: int = BLOCK_SIZE):
+        """
+        Initializes a RandomBlock that draws random 16-bit values from rng, a whole block at a time.
+
+        Calling random.choice() once per step costs a few Python calls and bit fiddling per choice. Here a
+        single rng.randbytes() call fills a block of values, and a choice among n options is just
+        (value * n) >> 16, so hot loops can read the block directly (see next_block()) and only call back
+        into the generator once every block_size choices. The bias of that mapping is below 1/65536.
+
+        Args:
+            rng (random.Random): The generator to draw from.
+            block_size (int, optional): The number of values per block. Defaults to BLOCK_SIZE.
+        """
+        self._rng = rng
+        self._block_size = block_size
+        self._values = array("H")
+        self._pos = 0
+
+    def next_block(self) -> array:
+        """
+        Draws and returns a new block of random 16-bit values, and discards what was left of the current one.
+        The bytes are read as little-endian values on every host, so a seed gives the same choices everywhere.
+        """
+        self._values = array("H", self._rng.randbytes(2 * self._block_size))
+        if sys.byteorder == "big":
+            self._values.byteswap()
+        self._pos = 0
+        return self._values
+
+    def below(self, n: int) -> int:
+        """
+        Returns a random integer in range(n), for 1 <= n <= 65536.
+
+        Args:
+            n (int): The number of options.
+        """
+        if self._pos == len(self._values):
+            self.next_block()
+        value = self._values[self._pos]
+        self._pos += 1
+        return (value * n) >> 16
+
+    def choice(self, options: list):
+        """
+        Returns a random element of a non-empty list.
+
+        Args:
+            options (list): The list to choose from.
+        """
+        return options[self.below(len(options))]
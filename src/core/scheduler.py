@@ -0,0 +1,132 @@
+"""
+Frame-budgeted animation of step generators such as Maze.generate_steps() and Maze.solve_steps().
+"""
+import math
+import time
+TYPE_CHECKING = False  # Like typing.TYPE_CHECKING, without importing typing
+if TYPE_CHECKING:
+    from core.gui import Window
+
+
+class Scheduler():
+    def __init__(self, win: 'Window', fps: float = 60, duration: float = None, steps_per_frame: int = 1, stats=None):
+        """
+        Initializes a Scheduler that runs the steps of an algorithm from the Tk event loop.
+
+        Instead of redrawing and sleeping after every step, the scheduler asks Tk to call it back once per
+        frame with Window.after(), runs a batch of steps and returns to the event loop, which redraws the
+        canvas and handles the Exit button and window close in between. The number of steps per frame is
+        either fixed, or derived from a target duration so that the animation takes the same time whatever
+        the size of the maze.
+
+        Args:
+            win (Window): The window whose event loop drives the animation.
+            fps (float, optional): The target number of frames per second. Defaults to 60.
+            duration (float, optional): If given, the target duration of the whole animation in seconds,
+                which requires the total number of steps to be passed to run(). Defaults to None.
+            steps_per_frame (int, optional): The number of steps per frame when no duration is given. Defaults to 1.
+            stats (Stats, optional): If given, frames, steps and the time spent running them are counted in it. Defaults to None.
+        """
+        self._win = win
+        self._fps = fps
+        self._duration = duration
+        self._steps_per_frame = steps_per_frame
+        self._stats = stats
+        self._steps = None
+        self._on_done = None
+        self.done = False  # Whether the last run finished all its steps
+        self.frames = 0  # The number of frames of the last run
+
+    def steps_per_frame(self, total_steps: int = None) -> int:
+        """
+        Returns the number of steps to run per frame.
+
+        Args:
+            total_steps (int, optional): The total number of steps of the animation, if known. Defaults to None.
+        """
+        if self._duration is not None and total_steps is not None:
+            return max(1, math.ceil(total_steps / (self._fps * self._duration)))
+        return self._steps_per_frame
+
+    def run(self, steps, total_steps: int = None, on_done=None) -> None:
+        """
+        Starts running the given steps, a batch per frame. This method returns immediately, the steps run
+        while the Tk event loop does (e.g. in Window.wait_for_close()).
+
+        Args:
+            steps (iterator): The steps to run, usually a generator yielding once per step.
+            total_steps (int, optional): The total number of steps, an upper bound is fine. Defaults to None.
+            on_done (callable, optional): Called without arguments once every step has run. Defaults to None.
+        """
+        self._steps = iter(steps)
+        self._on_done = on_done
+        self._per_frame = self.steps_per_frame(total_steps)
+        self.done = False
+        self.frames = 0
+        self._win.after(0, self._frame)
+
+    async def run_async(self, steps, total_steps: int = None) -> bool:
+        """
+        Runs the given steps as a coroutine, a batch per frame, for a window driven by Window.run_async().
+        Returns True once every step has run, or False if the window was closed first.
+
+        Args:
+            steps (iterator): The steps to run, usually a generator yielding once per step.
+            total_steps (int, optional): The total number of steps, an upper bound is fine. Defaults to None.
+        """
+        import asyncio
+
+        steps = iter(steps)
+        per_frame = self.steps_per_frame(total_steps)
+        self.done = False
+        self.frames = 0
+
+        while not self._win.closed:
+            started = time.perf_counter()
+            self.frames += 1
+            for n in range(per_frame):
+                try:
+                    next(steps)
+                except StopIteration:
+                    self.done = True
+                    self._count(n, started)
+                    return True
+            self._count(per_frame, started)
+
+            # Let the window redraw and other coroutines run for what is left of the frame
+            await asyncio.sleep(max(0.0, 1 / self._fps - (time.perf_counter() - started)))
+        return False
+
+    def _frame(self) -> None:
+        """
+        Runs one batch of steps and schedules the next frame.
+        """
+        # Stop as soon as the window is closed
+        if self._win.closed:
+            return
+
+        started = time.perf_counter()
+        self.frames += 1
+        for n in range(self._per_frame):
+            try:
+                next(self._steps)
+            except StopIteration:
+                self.done = True
+                self._count(n, started)
+                if self._on_done is not None:
+                    self._on_done()
+                return
+        self._count(self._per_frame, started)
+
+        # Wait for what is left of the frame, the canvas is redrawn by the event loop in the meantime
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._win.after(max(1, int(1000 / self._fps - elapsed_ms)), self._frame)
+
+    def _count(self, steps: int, started: float) -> None:
+        """
+        Counts a frame that ran the given number of steps since started, if instrumentation is enabled.
+        """
+        if self._stats is not None:
+            self._stats.count("frames")
+            self._stats.count("steps", steps)
+            self._stats.add_time("steps", time.perf_counter() - started)
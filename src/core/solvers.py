@@ -0,0 +1,373 @@
+"""
+Iterative maze solvers working directly on a packed Grid.
+
+Every solver takes the grid, the index of the start cell and the index of the goal cell, and returns
+the path from start to goal as an array of cell indices (empty if the goal cannot be reached) together
+with the number of cells it expanded. Use solve() to run one by name and get a SolveResult back.
+"""
+from core.grid import Grid, LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL
+from core.bitboard import BitBoard
+from array import array
+import time
+
+
+class SolveResult():
+    def __init__(self, algorithm: str, path: array, nodes_expanded: int, elapsed: float, num_cols: int):
+        """
+        Initializes a SolveResult holding the outcome of one solver run.
+
+        A SolveResult is truthy when a path was found, so it can be used wherever solve() used to return a bool.
+
+        Args:
+            algorithm (str): The name of the algorithm that produced the result.
+            path (array): The indices of the cells on the path from start to goal, empty if there is no path.
+            nodes_expanded (int): The number of cells the solver expanded.
+            elapsed (float): The time spent solving, in seconds.
+            num_cols (int): The number of columns of the grid, used to turn indices back into coordinates.
+        """
+        self.algorithm = algorithm
+        self.path = path
+        self.nodes_expanded = nodes_expanded
+        self.elapsed = elapsed
+        self._num_cols = num_cols
+
+    @property
+    def found(self) -> bool:
+        """
+        Whether a path from start to goal was found.
+        """
+        return len(self.path) > 0
+
+    def __bool__(self) -> bool:
+        return self.found
+
+    def coordinates(self) -> array:
+        """
+        Returns the path as a flat array of (column, row) pairs: [i0, j0, i1, j1, ...].
+        """
+        coords = array("I", bytes(8 * len(self.path)))
+        num_cols = self._num_cols
+        for n, k in enumerate(self.path):
+            coords[2 * n + 1], coords[2 * n] = divmod(k, num_cols)
+        return coords
+
+    def __repr__(self) -> str:
+        return (f"SolveResult(algorithm={self.algorithm!r}, length={len(self.path)}, "
+                f"nodes_expanded={self.nodes_expanded}, elapsed={self.elapsed:.6f})")
+
+
+def _neighbors(walls, num_cols: int, size: int, k: int) -> list:
+    """
+    Returns the indices of the cells reachable in one step from cell k (left, top, right, bottom).
+    """
+    wall = walls[k]
+    i = k % num_cols
+    neighbors = []
+    if i > 0 and not wall & LEFT_WALL:
+        neighbors.append(k - 1)
+    if k >= num_cols and not wall & TOP_WALL:
+        neighbors.append(k - num_cols)
+    if i + 1 < num_cols and not wall & RIGHT_WALL:
+        neighbors.append(k + 1)
+    if k + num_cols < size and not wall & BOTTOM_WALL:
+        neighbors.append(k + num_cols)
+    return neighbors
+
+
+def _trace_back(parent: array, start: int, goal: int) -> array:
+    """
+    Follows parent links from goal back to start and returns the path from start to goal.
+    """
+    path = array("I", [goal])
+    k = goal
+    while k != start:
+        k = parent[k]
+        path.append(k)
+    path.reverse()
+    return path
+
+
+def solve_dfs(grid: Grid, start: int, goal: int) -> tuple:
+    """
+    Depth-first search with an explicit stack, trying neighbors in the order left, top, right, bottom.
+
+    Like Maze.solve_steps() it marks the cells it explores as visited in the grid. The path it finds is the
+    stack at the moment the goal is reached, which is not necessarily the shortest one.
+
+    Args:
+        grid (Grid): The grid to solve.
+        start (int): The index of the start cell.
+        goal (int): The index of the goal cell.
+    """
+    num_cols = grid.num_cols
+    size = grid.size
+    walls = grid.walls
+    visited = grid.visited
+    expanded = 0
+
+    visited[start >> 3] |= 1 << (start & 7)
+    stack = array("I", [start])
+
+    while stack:
+        k = stack[-1]
+
+        # If the current cell is the goal, the stack holds the path
+        if k == goal:
+            return stack, expanded + 1
+
+        # Pick the first neighbor that is not visited and has no wall in the way
+        wall = walls[k]
+        if k % num_cols > 0 and not wall & LEFT_WALL and not visited[(k - 1) >> 3] & (1 << ((k - 1) & 7)):
+            next = k - 1
+        elif k >= num_cols and not wall & TOP_WALL and not visited[(k - num_cols) >> 3] & (1 << ((k - num_cols) & 7)):
+            next = k - num_cols
+        elif k % num_cols + 1 < num_cols and not wall & RIGHT_WALL and not visited[(k + 1) >> 3] & (1 << ((k + 1) & 7)):
+            next = k + 1
+        elif k + num_cols < size and not wall & BOTTOM_WALL and not visited[(k + num_cols) >> 3] & (1 << ((k + num_cols) & 7)):
+            next = k + num_cols
+        else:
+            # Dead end, backtrack
+            stack.pop()
+            expanded += 1
+            continue
+
+        # Mark the neighbor as visited and continue the search from it
+        visited[next >> 3] |= 1 << (next & 7)
+        stack.append(next)
+
+    return array("I"), expanded
+
+
+def solve_bfs(grid: Grid, start: int, goal: int) -> tuple:
+    """
+    Breadth-first search, level by level. Returns a shortest path.
+
+    Args:
+        grid (Grid): The grid to solve.
+        start (int): The index of the start cell.
+        goal (int): The index of the goal cell.
+    """
+    num_cols = grid.num_cols
+    size = grid.size
+    walls = grid.walls
+    parent = array("i", [-1]) * size # Parent of every discovered cell, -1 if not discovered yet
+    parent[start] = start
+    expanded = 0
+
+    frontier = [start]
+    while frontier:
+        next_frontier = []
+        for k in frontier:
+            expanded += 1
+            if k == goal:
+                return _trace_back(parent, start, goal), expanded
+
+            # Discover the neighbors with no wall in the way
+            wall = walls[k]
+            i = k % num_cols
+            if i > 0 and not wall & LEFT_WALL and parent[k - 1] < 0:
+                parent[k - 1] = k
+                next_frontier.append(k - 1)
+            if k >= num_cols and not wall & TOP_WALL and parent[k - num_cols] < 0:
+                parent[k - num_cols] = k
+                next_frontier.append(k - num_cols)
+            if i + 1 < num_cols and not wall & RIGHT_WALL and parent[k + 1] < 0:
+                parent[k + 1] = k
+                next_frontier.append(k + 1)
+            if k + num_cols < size and not wall & BOTTOM_WALL and parent[k + num_cols] < 0:
+                parent[k + num_cols] = k
+                next_frontier.append(k + num_cols)
+        frontier = next_frontier
+
+    return array("I"), expanded
+
+
+def solve_astar(grid: Grid, start: int, goal: int) -> tuple:
+    """
+    A* search with a Manhattan distance heuristic. Returns a shortest path.
+
+    Every step costs 1 and changes the Manhattan distance to the goal by 1, so the estimated total cost
+    of a neighbor is either the same as the cell's (a step towards the goal) or 2 more (a step away). The
+    open set is therefore two lists instead of a heap: the cells at the current estimate and the cells at
+    the next one. Cells are taken from the end of the current list, so the latest cells found, deepest in
+    the corridor being followed, are expanded first.
+
+    The heuristic helps on open or braided grids. In a perfect maze the only path winds away from the goal
+    many times, and A* expands about as many cells as solve_bfs().
+
+    Args:
+        grid (Grid): The grid to solve.
+        start (int): The index of the start cell.
+        goal (int): The index of the goal cell.
+    """
+    num_cols = grid.num_cols
+    size = grid.size
+    walls = grid.walls
+    goal_j, goal_i = divmod(goal, num_cols)
+    parent = array("i", [-1]) * size # Parent of every discovered cell, -1 if not discovered yet
+    cost = array("i", [0]) * size # Cost of the best known path to every discovered cell
+    closed = bytearray(size)
+    parent[start] = start
+    expanded = 0
+
+    current = [start] # Open cells at the current estimate
+    later = [] # Open cells at the current estimate + 2
+    while True:
+        if not current:
+            if not later:
+                break
+            current, later = later, current
+        k = current.pop()
+        if closed[k]:
+            continue
+        closed[k] = 1
+        expanded += 1
+        if k == goal:
+            return _trace_back(parent, start, goal), expanded
+
+        # Discover the neighbors with no wall in the way, whose best known path gets shorter
+        g = cost[k] + 1
+        wall = walls[k]
+        j, i = divmod(k, num_cols)
+        if i > 0 and not wall & LEFT_WALL:
+            n = k - 1
+            if not closed[n] and (parent[n] < 0 or cost[n] > g):
+                parent[n] = k
+                cost[n] = g
+                (current if i > goal_i else later).append(n)
+        if j > 0 and not wall & TOP_WALL:
+            n = k - num_cols
+            if not closed[n] and (parent[n] < 0 or cost[n] > g):
+                parent[n] = k
+                cost[n] = g
+                (current if j > goal_j else later).append(n)
+        if i + 1 < num_cols and not wall & RIGHT_WALL:
+            n = k + 1
+            if not closed[n] and (parent[n] < 0 or cost[n] > g):
+                parent[n] = k
+                cost[n] = g
+                (current if i < goal_i else later).append(n)
+        if k + num_cols < size and not wall & BOTTOM_WALL:
+            n = k + num_cols
+            if not closed[n] and (parent[n] < 0 or cost[n] > g):
+                parent[n] = k
+                cost[n] = g
+                (current if j < goal_j else later).append(n)
+
+    return array("I"), expanded
+
+
+def solve_bidirectional(grid: Grid, start: int, goal: int) -> tuple:
+    """
+    Bidirectional breadth-first search, growing one level at a time from whichever side has the
+    smaller frontier until the two searches meet. Returns a shortest path.
+
+    The level in which the searches meet is expanded to the end, and of the cells where they meet the
+    one closest to the other side's root is kept. All of them are at the same depth from this side,
+    so that cell gives the shortest path, also on grids with loops.
+
+    Args:
+        grid (Grid): The grid to solve.
+        start (int): The index of the start cell.
+        goal (int): The index of the goal cell.
+    """
+    if start == goal:
+        return array("I", [start]), 1
+
+    num_cols = grid.num_cols
+    size = grid.size
+    walls = grid.walls
+    parent_start = array("i", [-1]) * size # Parents in the search from the start
+    parent_goal = array("i", [-1]) * size # Parents in the search from the goal
+    depth_start = array("i", [-1]) * size # Depths in the search from the start, -1 if not discovered yet
+    depth_goal = array("i", [-1]) * size # Depths in the search from the goal
+    parent_start[start] = start
+    parent_goal[goal] = goal
+    depth_start[start] = 0
+    depth_goal[goal] = 0
+    frontier_start = [start]
+    frontier_goal = [goal]
+    expanded = 0
+
+    while frontier_start and frontier_goal:
+        # Expand the smaller frontier by one level
+        if len(frontier_start) <= len(frontier_goal):
+            frontier, parent, depth, other = frontier_start, parent_start, depth_start, depth_goal
+        else:
+            frontier, parent, depth, other = frontier_goal, parent_goal, depth_goal, depth_start
+
+        next_frontier = []
+        meet = -1
+        for k in frontier:
+            expanded += 1
+            d = depth[k] + 1
+            for n in _neighbors(walls, num_cols, size, k):
+                if depth[n] >= 0:
+                    continue
+                parent[n] = k
+                depth[n] = d
+                next_frontier.append(n)
+                if other[n] >= 0 and (meet < 0 or other[n] < other[meet]): # The two searches meet at n
+                    meet = n
+
+        if meet >= 0:
+            path = _trace_back(parent_start, start, meet)
+            k = meet
+            while k != goal:
+                k = parent_goal[k]
+                path.append(k)
+            return path, expanded
+
+        if parent is parent_start:
+            frontier_start = next_frontier
+        else:
+            frontier_goal = next_frontier
+
+    return array("I"), expanded
+
+
+def solve_bitboard(grid: Grid, start: int, goal: int) -> tuple:
+    """
+    Breadth-first search on bitsets, advancing the whole frontier one step per iteration (see core.bitboard).
+    Returns a shortest path. Every cell the search reached counts as expanded.
+
+    Much faster than solve_bfs() on open or braided grids with wide frontiers, much slower on perfect
+    mazes of long narrow corridors.
+
+    Args:
+        grid (Grid): The grid to solve.
+        start (int): The index of the start cell.
+        goal (int): The index of the goal cell.
+    """
+    path, cells = BitBoard(grid).search(start, goal)
+    return path, BitBoard.count(cells)
+
+
+# Solvers available through solve(), by name
+SOLVERS = {
+    "dfs": solve_dfs,
+    "bfs": solve_bfs,
+    "astar": solve_astar,
+    "bidirectional": solve_bidirectional,
+    "bitboard": solve_bitboard,
+}
+
+
+def solve(grid: Grid, algorithm: str = "bfs", start: int = 0, goal: int = None) -> SolveResult:
+    """
+    Solves the grid with the named algorithm and returns the path along with statistics.
+
+    Args:
+        grid (Grid): The grid to solve.
+        algorithm (str): One of "dfs", "bfs", "astar", "bidirectional" or "bitboard". Defaults to "bfs".
+        start (int): The index of the start cell. Defaults to the top left cell.
+        goal (int, optional): The index of the goal cell. Defaults to the bottom right cell.
+    """
+    if algorithm not in SOLVERS:
+        raise ValueError(f"unknown solver {algorithm!r}, expected one of {', '.join(SOLVERS)}")
+    if goal is None:
+        goal = grid.size - 1
+
+    started = time.perf_counter()
+    path, expanded = SOLVERS[algorithm](grid, start, goal)
+    return SolveResult(algorithm, path, expanded, time.perf_counter() - started, grid.num_cols)
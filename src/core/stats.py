@@ -0,0 +1,101 @@
+"""
+Opt-in counters and timers for finding where the time of a run goes.
+
+A Stats object is passed to Maze (and through it to the Window, its MazeRenderer and the Scheduler).
+Instrumented code only checks whether it has a Stats object, once per call, so leaving instrumentation
+off costs next to nothing. Counts that can be derived from the grid afterwards (cells visited, walls
+broken) are computed once at the end of a run instead of being counted step by step.
+"""
+import time
+
+
+class _Timer():
+    def __init__(self, stats: 'Stats', name: str):
+        """
+        Initializes a context manager adding the time spent in its block to a timer of stats.
+        """
+        self._stats = stats
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._stats.add_time(self._name, time.perf_counter() - self._started)
+        return False
+
+
+class Stats():
+    def __init__(self):
+        """
+        Initializes a Stats object with every counter and timer at zero.
+
+        Counters used by the repository:
+        - cells_visited, walls_broken: by generation
+        - cells_expanded, solves: by solving
+        - draw_calls, canvas_items: lines drawn by Window.draw_line() and items created by MazeRenderer
+        - redraws, frames, steps: window redraws, scheduler frames and steps run by the scheduler
+
+        Timers (in seconds): generate, solve, steps (running scheduled steps), redraw (every Window.redraw()),
+        and animate and sleep (redrawing and sleeping between the steps of an animated generate() or solve()).
+        """
+        self.counters = {}
+        self.timers = {}
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        Adds n to a counter.
+
+        Args:
+            name (str): The name of the counter.
+            n (int, optional): The amount to add. Defaults to 1.
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """
+        Adds time to a timer.
+
+        Args:
+            name (str): The name of the timer.
+            seconds (float): The time to add, in seconds.
+        """
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def timer(self, name: str) -> _Timer:
+        """
+        Returns a context manager adding the time spent in its block to the named timer.
+
+            with stats.timer("solve"):
+                ...
+        """
+        return _Timer(self, name)
+
+    def reset(self) -> None:
+        """
+        Sets every counter and timer back to zero.
+        """
+        self.counters.clear()
+        self.timers.clear()
+
+    def summary(self) -> dict:
+        """
+        Returns the counters and timers as a dict, timers with an "_s" suffix. "compute_s" is the time
+        spent generating, solving and running scheduled steps, minus the time spent animating them.
+        """
+        summary = dict(self.counters)
+        for name, seconds in self.timers.items():
+            summary[f"{name}_s"] = seconds
+        busy = sum(self.timers.get(name, 0.0) for name in ("generate", "solve", "steps"))
+        summary["compute_s"] = max(0.0, busy - self.timers.get("animate", 0.0))
+        return summary
+
+    def report(self) -> str:
+        """
+        Returns the summary as text, one counter or timer per line.
+        """
+        lines = []
+        for name, value in sorted(self.summary().items()):
+            lines.append(f"{name:<16} {value:.6f}" if isinstance(value, float) else f"{name:<16} {value}")
+        return "\n".join(lines)
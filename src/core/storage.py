@@ -0,0 +1,119 @@
+"""
+Binary file format for the walls of a maze, with memory-mapped loading.
+
+A file is a 48 byte little-endian header followed by the wall payload:
+
+    offset  size  field
+    0       4     magic, b"MAZE"
+    4       2     format version, currently 1
+    6       2     flags, bit 0 set if the seed is known
+    8       4     number of columns
+    12      4     number of rows
+    16      8     seed (signed, 0 if unknown)
+    24      16    generation algorithm, UTF-8, zero padded (empty if unknown)
+    40      8     generation backend, UTF-8, zero padded (empty if unknown)
+    48      ...   one byte per cell, row by row, holding the wall bits of core.grid
+
+The payload has exactly the layout of Grid.walls, so a file can be memory-mapped and used as the grid
+of a maze directly, with no decoding and no copy into Python objects.
+"""
+from core.grid import Grid
+import mmap
+import struct
+
+MAGIC = b"MAZE"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIq16s8s")
+FLAG_SEED = 1
+
+
+class MazeHeader():
+    def __init__(self, num_cols: int, num_rows: int, seed: int = None, algorithm: str = None, backend: str = None):
+        """
+        Initializes the header of a maze file.
+
+        Args:
+            num_cols (int): The number of columns of the maze.
+            num_rows (int): The number of rows of the maze.
+            seed (int, optional): The seed the maze was generated with, if known. Defaults to None.
+            algorithm (str, optional): The generation algorithm, if known. Defaults to None.
+            backend (str, optional): The generation backend, if known. Defaults to None.
+        """
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.seed = seed
+        self.algorithm = algorithm
+        self.backend = backend
+
+    def pack(self) -> bytes:
+        """
+        Returns the header as the bytes written at the start of the file.
+        """
+        flags = FLAG_SEED if self.seed is not None else 0
+        return HEADER.pack(MAGIC, VERSION, flags, self.num_cols, self.num_rows, self.seed or 0,
+                           (self.algorithm or "").encode(), (self.backend or "").encode())
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'MazeHeader':
+        """
+        Reads a header from the first bytes of a file.
+
+        Args:
+            data (bytes): At least HEADER.size bytes from the start of the file.
+
+        Raises:
+            ValueError: If the data is not the header of a maze file of a supported version.
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("file too short for a maze header")
+        magic, version, flags, num_cols, num_rows, seed, algorithm, backend = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a maze file")
+        if version != VERSION:
+            raise ValueError(f"unsupported maze file version {version}")
+        return cls(num_cols, num_rows, seed if flags & FLAG_SEED else None,
+                   algorithm.rstrip(b"\0").decode() or None, backend.rstrip(b"\0").decode() or None)
+
+
+def save_grid(path: str, grid: Grid, seed: int = None, algorithm: str = None, backend: str = None) -> None:
+    """
+    Writes the walls of a grid to a maze file.
+
+    Args:
+        path (str): The path of the file to write.
+        grid (Grid): The grid holding the walls.
+        seed (int, optional): The seed the maze was generated with. Defaults to None.
+        algorithm (str, optional): The generation algorithm. Defaults to None.
+        backend (str, optional): The generation backend. Defaults to None.
+    """
+    with open(path, "wb") as file:
+        file.write(MazeHeader(grid.num_cols, grid.num_rows, seed, algorithm, backend).pack())
+        file.write(grid.walls)
+
+
+def load_grid(path: str, use_mmap: bool = True) -> tuple:
+    """
+    Reads a maze file and returns its grid and header.
+
+    With use_mmap the file is mapped copy-on-write: pages are only read from disk when the walls are
+    used, and changing the walls of the returned grid never modifies the file.
+
+    Args:
+        path (str): The path of the file to read.
+        use_mmap (bool, optional): Whether to memory-map the file instead of reading it. Defaults to True.
+
+    Raises:
+        ValueError: If the file is not a maze file or is truncated.
+    """
+    with open(path, "rb") as file:
+        header = MazeHeader.unpack(file.read(HEADER.size))
+        size = header.num_cols * header.num_rows
+        if use_mmap and size > 0:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+            walls = memoryview(mapped)[HEADER.size:HEADER.size + size] # Keeps the mapping alive
+        else:
+            walls = bytearray(file.read(size))
+
+    if len(walls) != size:
+        raise ValueError(f"truncated maze file, expected {size} wall bytes, got {len(walls)}")
+    return Grid(header.num_cols, header.num_rows, walls), header
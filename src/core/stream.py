@@ -0,0 +1,146 @@
+"""
+Row-streaming generation and export of mazes too large to hold in memory.
+
+Eller's algorithm (core.generators.eller_rows) builds a maze one row at a time, and every row only depends
+on the one above it. stream_maze() passes each row to a list of sinks as soon as it is made, and the sinks
+write it out before the next row replaces it, so memory stays proportional to the number of columns
+whatever the number of rows. A sink has three methods:
+
+    begin(num_cols, num_rows)  called once before the first row
+    write_row(row)             called for every row, top to bottom, with num_cols wall bytes
+    end()                      called once after the last row
+
+The row given to write_row() is reused for the next row, sinks that need it later must copy it.
+The rows are the same as the walls of Maze(..., seed=seed, algorithm="eller"), entrance and exit included.
+"""
+from core.grid import LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL
+from core.generators import eller_rows
+from core.raster import RowRasterizer
+from core import storage
+import random
+
+
+def stream_rows(num_cols: int, num_rows: int, seed: int = None, rng=None):
+    """
+    Yields the walls of a maze one row at a time, as a bytearray of num_cols wall bytes, with the entrance
+    and exit of Maze._break_entrance_and_exit() already open.
+
+    Args:
+        num_cols (int): The number of columns of the maze.
+        num_rows (int): The number of rows of the maze.
+        seed (int, optional): The seed of the random number generator. Defaults to None.
+        rng (random.Random, optional): The random number generator to use instead of seeding one. Defaults to None.
+    """
+    if rng is None:
+        rng = random.Random(seed)
+    last = num_rows - 1
+    for j, row in enumerate(eller_rows(num_cols, num_rows, rng)):
+        if j == 0:
+            row[0] &= ~LEFT_WALL  # Entrance
+        if j == last:
+            row[-1] &= ~BOTTOM_WALL  # Exit
+        yield row
+
+
+def stream_maze(num_cols: int, num_rows: int, sinks: list, seed: int = None) -> None:
+    """
+    Generates a maze row by row and writes every row to every sink.
+
+    Args:
+        num_cols (int): The number of columns of the maze.
+        num_rows (int): The number of rows of the maze.
+        sinks (list): The sinks to write to, see the module docstring.
+        seed (int, optional): The seed of the random number generator. Defaults to None.
+    """
+    for sink in sinks:
+        sink.begin(num_cols, num_rows)
+    for row in stream_rows(num_cols, num_rows, seed):
+        for sink in sinks:
+            sink.write_row(row)
+    for sink in sinks:
+        sink.end()
+
+
+class BinarySink():
+    def __init__(self, file, seed: int = None):
+        """
+        Initializes a BinarySink writing a maze file of core.storage, to be loaded with Maze.load().
+
+        Args:
+            file (file): A file opened in binary mode.
+            seed (int, optional): The seed given to stream_maze(), stored in the header. Defaults to None.
+        """
+        self._file = file
+        self._seed = seed
+
+    def begin(self, num_cols: int, num_rows: int) -> None:
+        self._file.write(storage.MazeHeader(num_cols, num_rows, self._seed, "eller", "python").pack())
+
+    def write_row(self, row: bytearray) -> None:
+        self._file.write(row)
+
+    def end(self) -> None:
+        pass
+
+
+class AsciiSink():
+    def __init__(self, file):
+        """
+        Initializes an AsciiSink drawing the maze as text, two lines per row of cells plus the bottom line:
+
+            +--+--+
+               |  |
+            +  +  +
+            |
+            +--+--+
+
+        Args:
+            file (file): A file opened in text mode.
+        """
+        self._file = file
+        self._row = None
+
+    def begin(self, num_cols: int, num_rows: int) -> None:
+        self._row = None
+
+    def write_row(self, row: bytearray) -> None:
+        top = "".join("+--" if wall & TOP_WALL else "+  " for wall in row) + "+"
+        body = "".join("|  " if wall & LEFT_WALL else "   " for wall in row)
+        body += "|" if row[-1] & RIGHT_WALL else " "
+        self._file.write(top + "\n" + body + "\n")
+        self._row = row
+
+    def end(self) -> None:
+        if self._row is not None:
+            self._file.write("".join("+--" if wall & BOTTOM_WALL else "+  " for wall in self._row) + "+\n")
+
+
+class PPMSink():
+    def __init__(self, file, cell_size: int = 4, **colors):
+        """
+        Initializes a PPMSink writing the maze as a binary PPM image, like core.raster.write_ppm().
+
+        Args:
+            file (file): A file opened in binary mode.
+            cell_size (int, optional): The size of a cell in pixels, walls included (at least 2). Defaults to 4.
+            **colors: wall_color and background, see core.raster.RowRasterizer.
+        """
+        self._file = file
+        self._cell_size = cell_size
+        self._colors = colors
+        self._rasterizer = None
+        self._row = None
+
+    def begin(self, num_cols: int, num_rows: int) -> None:
+        self._rasterizer = RowRasterizer(num_cols, num_rows, self._cell_size, **self._colors)
+        self._file.write(b"P6\n%d %d\n255\n" % (self._rasterizer.width, self._rasterizer.height))
+        self._row = None
+
+    def write_row(self, row: bytearray) -> None:
+        for pixels in self._rasterizer.cell_rows(row):
+            self._file.write(pixels)
+        self._row = row
+
+    def end(self) -> None:
+        if self._row is not None:
+            self._file.write(self._rasterizer.bottom_row(self._row))
@@ -1,21 +1,50 @@
-from core.gui import *
-from core.cell import *
-from core.maze import *
-from constants import *
-def main():
+from core.gui import Window
+from core.maze import Maze
+from core.scheduler import Scheduler
+from core.stats import Stats
+from constants import WINDOW_WIDTH, WINDOW_HEIGHT, MARGIN, NUM_ROWS, NUM_COLS, ANIMATION_FPS, ANIMATION_DURATION
+from itertools import chain
+import argparse
+import cProfile
+import sys
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Generate and solve a maze in a window.")
+    parser.add_argument("--profile", action="store_true",
+                        help="count draws, redraws and steps and print a summary when the window is closed")
+    parser.add_argument("--profile-out", metavar="FILE",
+                        help="also run under cProfile and write the pstats data to FILE, implies --profile")
+    args = parser.parse_args(argv)
+    if args.profile_out:
+        args.profile = True
+
+    # Instrumentation is off unless asked for
+    stats = Stats() if args.profile else None
+    profiler = cProfile.Profile() if args.profile_out else None
+    if profiler is not None:
+        profiler.enable()
+
     # Calculate cell size based on window dimensions and maze grid
     cell_size_x = (WINDOW_WIDTH - 2 * MARGIN) / NUM_COLS
     cell_size_y = (WINDOW_HEIGHT - 2 * MARGIN) / NUM_ROWS
-    
+
     # Create window
     win = Window(WINDOW_WIDTH, WINDOW_HEIGHT)
-    
-    # Create and solve maze
-    maze = Maze(MARGIN, MARGIN, NUM_ROWS, NUM_COLS, cell_size_x, cell_size_y, win)
-    maze.solve()
-    
+
+    # Create the maze, it is generated and solved by the scheduler
+    maze = Maze(MARGIN, MARGIN, NUM_ROWS, NUM_COLS, cell_size_x, cell_size_y, win, generate=False, stats=stats)
+
+    # Animate the generation and the solving from the event loop, a batch of steps per frame
+    scheduler = Scheduler(win, fps=ANIMATION_FPS, duration=ANIMATION_DURATION, stats=stats)
+    scheduler.run(chain(maze.generate_steps(), maze.solve_steps()), total_steps=3 * NUM_ROWS * NUM_COLS)
+
     # Wait for user to close window
     win.wait_for_close()
 
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile_out)
+    if stats is not None:
+        print(stats.report(), file=sys.stderr)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,6 +1,46 @@
 import unittest 
+from unittest import mock
+import random
+import tracemalloc
+import json
+import os
+import tempfile
+import subprocess
+import sys
+import types
+import io
+from array import array
+import asyncio
+import itertools
+import threading
+import struct
+import zlib
+import bench
 from core.maze import Maze
-from core.gui import Window
+from core.grid import LEFT_WALL, TOP_WALL, RIGHT_WALL, BOTTOM_WALL
+from core import solvers
+from core.scheduler import Scheduler
+from core.batch import generate_batch
+from core.rng import RandomBlock
+from core.chunked import ChunkedMaze
+from core import raster, storage
+from core.stats import Stats
+from core.events import EventLog, Player, WALL_BROKEN, CELL_VISITED, MOVE, BACKTRACK, neighbor
+from core.bitboard import BitBoard
+from core.index import MazeIndex
+from core.stream import stream_rows, stream_maze, BinarySink, AsciiSink, PPMSink
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from core.gui import Window, LODRenderer, wall_runs
+from constants import PATH_COLOR, WINDOW_BG_COLOR
+
+# Budget for importing the headless core (python -X importtime -c "import core.maze"), measured at about 40 ms.
+# It is generous so that a loaded machine does not fail the test, the GUI being pulled back in is caught by the module check.
+HEADLESS_IMPORT_BUDGET_US = 300_000
+
 class Tests(unittest.TestCase):
     def test_maze_create_cells(self):
         num_cols = 12
@@ -106,6 +146,811 @@ class Tests(unittest.TestCase):
             False,
         )
 
+    def test_maze_break_walls_i_matches_recursive(self):
+        num_cols = 12
+        num_rows = 10
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10, seed=7)
+        m2 = Maze(0, 0, num_rows, num_cols, 10, 10)
+        # Rebuild the second maze with the recursive generator and the same seed
+        for col in m2._cells:
+            for cell in col:
+                cell.has_left_wall = cell.has_right_wall = cell.has_top_wall = cell.has_bottom_wall = True
+        m2._reset_cells_visited()
+        m2._break_entrance_and_exit()
+        m2._rng.seed(7)
+        m2._break_walls_r(0, 0)
+        for i in range(num_cols):
+            for j in range(num_rows):
+                c1 = m1._cells[i][j]
+                c2 = m2._cells[i][j]
+                self.assertEqual(
+                    (c1.has_left_wall, c1.has_top_wall, c1.has_right_wall, c1.has_bottom_wall),
+                    (c2.has_left_wall, c2.has_top_wall, c2.has_right_wall, c2.has_bottom_wall),
+                )
+
+    def test_maze_break_walls_i_large(self):
+        num_cols = 200
+        num_rows = 200
+        # 40,000 cells is far beyond the default recursion limit
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10, seed=1)
+        m1._reset_cells_visited()
+        m1._break_walls_i(0, 0)
+        self.assertEqual(
+            m1._cells[num_cols - 1][num_rows - 1].visited,
+            True,
+        )
+
+    def test_grid_memory_per_cell(self):
+        num_cols = 128
+        num_rows = 128
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10, seed=3)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        # 1 byte of walls and 1 bit of visited flag per cell, plus a little bookkeeping
+        self.assertEqual(m1._grid.nbytes, num_cols * num_rows * 9 // 8)
+        self.assertLess(used / (num_cols * num_rows), 1.5)
+
+    def test_grid_cell_view(self):
+        num_cols = 12
+        num_rows = 10
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10)
+        cell = m1._cells[3][4]
+        cell.has_left_wall = True
+        cell.has_bottom_wall = False
+        self.assertEqual(m1._grid.has_wall(m1._grid.index(3, 4), LEFT_WALL), True)
+        self.assertEqual(m1._cells[3][4].has_bottom_wall, False)
+        self.assertEqual(len(list(m1._cells)), num_cols)
+        self.assertEqual(m1._cells[-1][-1]._x2, num_cols * 10)
+
+    def test_maze_solve_headless(self):
+        num_cols = 300
+        num_rows = 300
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10, seed=5)
+        self.assertEqual(m1._cells[0][0].has_left_wall, False)
+        self.assertTrue(m1.solve())
+        self.assertEqual(m1._cells[num_cols - 1][num_rows - 1].visited, True)
+
+        # Solving the same maze again finds the same path, whatever solved it before
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=1)
+        first = m1.solve()
+        for algorithm in ("dfs", "bfs", "dfs", "astar", "dfs"):
+            self.assertEqual(m1.solve(algorithm).path, first.path)
+        self.assertEqual(m1.solve("dfs", log=EventLog(12, 10)).path, first.path)  # Through solve_steps()
+        self.assertEqual(m1.solve("dfs", log=EventLog(12, 10)).path, first.path)
+
+    def test_cell_draw_move_headless(self):
+        m1 = Maze(0, 0, 2, 2, 10, 10)
+        # Must not touch a window when there is none
+        m1._cells[0][0].draw_move(m1._cells[1][0])
+        m1._cells[0][0].draw(0, 10, 0, 10)
+
+    def test_maze_solve_algorithms(self):
+        num_cols = 40
+        num_rows = 30
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10, seed=11)
+        results = {}
+        for algorithm in ("dfs", "bfs", "astar", "bidirectional", "bitboard"):
+            m1._reset_cells_visited()
+            results[algorithm] = m1.solve(algorithm)
+            path = results[algorithm].path
+            self.assertEqual(path[0], 0)
+            self.assertEqual(path[-1], num_cols * num_rows - 1)
+        # A perfect maze has exactly one path between two cells
+        self.assertEqual(results["bfs"].path, results["dfs"].path)
+        self.assertEqual(results["astar"].path, results["bfs"].path)
+        self.assertEqual(results["bidirectional"].path, results["bfs"].path)
+        self.assertEqual(results["bitboard"].path, results["bfs"].path)
+        self.assertLessEqual(results["astar"].nodes_expanded, results["bfs"].nodes_expanded)
+        coords = results["bfs"].coordinates()
+        self.assertEqual(list(coords[:2]), [0, 0])
+        self.assertEqual(list(coords[-2:]), [num_cols - 1, num_rows - 1])
+
+    def test_solvers_shortest_with_loops(self):
+        # Knocking down extra walls makes many paths, the shortest solvers still agree on the length
+        rng = random.Random(4)
+        for seed in range(5):
+            m1 = Maze(0, 0, 25, 35, 10, 10, seed=seed)
+            for _ in range(150):
+                i, j = rng.randrange(34), rng.randrange(24)
+                m1.open_wall((i, j), (i + 1, j) if rng.random() < 0.5 else (i, j + 1))
+            index = MazeIndex(m1._grid, root=0)
+            for goal in (m1._grid.size - 1, rng.randrange(m1._grid.size)):
+                for algorithm in ("astar", "bidirectional", "bitboard"):
+                    path = solvers.solve(m1._grid, algorithm, 0, goal).path
+                    self.assertEqual(len(path) - 1, index.distance[goal], (seed, goal, algorithm))
+                    for k, n in zip(path, path[1:]):
+                        self.assertIn(n, index._open_neighbors(k))
+
+    def test_maze_solve_unknown_algorithm(self):
+        m1 = Maze(0, 0, 2, 2, 10, 10)
+        with self.assertRaises(ValueError):
+            m1.solve("teleport")
+
+    def assert_perfect_maze(self, m1):
+        # Every cell is reachable from the top-left cell and there are exactly cells - 1 passages
+        grid = m1._grid
+        m1._reset_cells_visited()
+        reached = solvers.solve(grid, "bfs", 0, grid.size - 1)
+        self.assertTrue(reached)
+        passages = 0
+        for k in range(grid.size):
+            i = k % grid.num_cols
+            if i + 1 < grid.num_cols and not grid.has_wall(k, RIGHT_WALL):
+                self.assertEqual(grid.has_wall(k + 1, LEFT_WALL), False)
+                passages += 1
+            if k + grid.num_cols < grid.size and not grid.has_wall(k, BOTTOM_WALL):
+                self.assertEqual(grid.has_wall(k + grid.num_cols, TOP_WALL), False)
+                passages += 1
+        self.assertEqual(passages, grid.size - 1)
+        self.assertEqual(m1._cells[0][0].has_left_wall, False)
+        self.assertEqual(m1._cells[-1][-1].has_bottom_wall, False)
+
+    def test_maze_generate_python(self):
+        for algorithm in ("backtracker", "binary_tree", "sidewinder", "kruskal", "prim", "wilson", "eller"):
+            m1 = Maze(0, 0, 17, 23, 10, 10, seed=2, algorithm=algorithm)
+            self.assert_perfect_maze(m1)
+            self.assertEqual(m1._grid.walls, Maze(0, 0, 17, 23, 10, 10, seed=2, algorithm=algorithm)._grid.walls)
+            for num_rows, num_cols in ((1, 9), (9, 1)):
+                self.assert_perfect_maze(Maze(0, 0, num_rows, num_cols, 10, 10, seed=2, algorithm=algorithm))
+
+    @unittest.skipUnless(numpy, "NumPy is not installed")
+    def test_maze_generate_numpy(self):
+        for algorithm in ("binary_tree", "sidewinder"):
+            m1 = Maze(0, 0, 17, 23, 10, 10, seed=2, algorithm=algorithm, backend="numpy")
+            self.assert_perfect_maze(m1)
+            m2 = Maze(0, 0, 17, 23, 10, 10, seed=2, algorithm=algorithm, backend="numpy")
+            self.assertEqual(m1._grid.walls, m2._grid.walls)
+            # Regenerating follows the maze's generator: a new maze, and the first one again after a reseed
+            m2.generate(algorithm, "numpy")
+            self.assertNotEqual(m1._grid.walls, m2._grid.walls)
+            m2.generate(algorithm, "numpy", seed=2)
+            self.assertEqual(m1._grid.walls, m2._grid.walls)
+
+    def test_maze_generate_unknown(self):
+        with self.assertRaises(ValueError):
+            Maze(0, 0, 2, 2, 10, 10, algorithm="backtracker", backend="numpy")
+
+    def test_wall_runs(self):
+        m1 = Maze(0, 0, 3, 4, 10, 10)
+        # With every wall standing each grid line is a single run
+        m1._grid.reset_walls()
+        self.assertEqual(wall_runs(m1._grid, True, 1), [(0, 4)])
+        self.assertEqual(wall_runs(m1._grid, False, 4), [(0, 3)])
+        # Opening a passage between (1, 0) and (1, 1) splits the line between rows 0 and 1
+        m1._cells[1][0].has_bottom_wall = False
+        m1._cells[1][1].has_top_wall = False
+        self.assertEqual(wall_runs(m1._grid, True, 1), [(0, 1), (2, 4)])
+        # The entrance is a gap at the top of the left border
+        m1._break_entrance_and_exit()
+        self.assertEqual(wall_runs(m1._grid, False, 0), [(1, 3)])
+        self.assertEqual(wall_runs(m1._grid, True, 3), [(0, 3)])
+
+    def test_maze_steps_headless(self):
+        num_cols = 12
+        num_rows = 10
+        m1 = Maze(0, 0, num_rows, num_cols, 10, 10, seed=4)
+        m2 = Maze(0, 0, num_rows, num_cols, 10, 10, generate=False)
+        steps = list(m2.generate_steps(seed=4))
+        self.assertEqual(len(steps), num_cols * num_rows + 1)
+        self.assertEqual(m1._grid.walls, m2._grid.walls)
+        solve_steps = m2.solve_steps()
+        while True:
+            try:
+                next(solve_steps)
+            except StopIteration as stop:
+                result = stop.value
+                break
+        self.assertEqual(result.path, m1.solve("bfs").path)
+
+    def test_maze_steps_do_not_sleep(self):
+        class FakeRenderer:
+            def __init__(self):
+                self.updates = 0
+            def draw(self, grid):
+                pass
+            def update_cell(self, grid, i, j):
+                self.updates += 1
+        class FakeWindow:
+            def __init__(self):
+                self.redraws = 0
+            def maze_renderer(self, x1, y1, cell_size_x, cell_size_y):
+                self.renderer = FakeRenderer()
+                return self.renderer
+            def redraw(self):
+                self.redraws += 1
+
+        # Step by step, the cells are updated but the window is left to the caller
+        win = FakeWindow()
+        m1 = Maze(0, 0, 12, 16, 10, 10, win, generate=False)
+        with mock.patch("core.maze.time.sleep") as sleep:
+            steps = list(m1.generate_steps(seed=4))
+        sleep.assert_not_called()
+        self.assertEqual(win.redraws, 0)
+        self.assertEqual(win.renderer.updates, 16 * 12)
+        self.assertEqual(m1._grid.walls, Maze(0, 0, 12, 16, 10, 10, seed=4)._grid.walls)
+
+        # The blocking generate() animates once per step
+        with mock.patch("core.maze.time.sleep") as sleep:
+            m1.generate(seed=4)
+        self.assertEqual(sleep.call_count, len(steps))
+        self.assertEqual(win.redraws, len(steps))
+
+    def test_scheduler_steps_per_frame(self):
+        class FakeWindow:
+            # Stands in for the Tk event loop, running scheduled callbacks in order
+            closed = False
+            def __init__(self):
+                self.callbacks = []
+            def after(self, ms, callback):
+                self.callbacks.append(callback)
+            def run(self):
+                while self.callbacks:
+                    self.callbacks.pop(0)()
+
+        win = FakeWindow()
+        done = []
+        scheduler = Scheduler(win, fps=60, duration=10)
+        self.assertEqual(scheduler.steps_per_frame(6000), 10)
+        scheduler.run(iter(range(6000)), total_steps=6000, on_done=lambda: done.append(True))
+        win.run()
+        self.assertTrue(scheduler.done)
+        self.assertEqual(done, [True])
+        self.assertEqual(scheduler.frames, 601)
+
+        # Closing the window stops the animation
+        win = FakeWindow()
+        scheduler = Scheduler(win, steps_per_frame=5)
+        scheduler.run(iter(range(100)))
+        win.callbacks.pop(0)()
+        win.closed = True
+        win.run()
+        self.assertFalse(scheduler.done)
+        self.assertEqual(scheduler.frames, 1)
+
+        # Instrumented, frames and steps are counted
+        win = FakeWindow()
+        stats = Stats()
+        Scheduler(win, steps_per_frame=7, stats=stats).run(iter(range(100)))
+        win.run()
+        self.assertEqual((stats.counters["frames"], stats.counters["steps"]), (15, 100))
+
+    def test_scheduler_run_async(self):
+        class FakeWindow:
+            closed = False
+
+        async def close_after(win, seconds):
+            await asyncio.sleep(seconds)
+            win.closed = True
+
+        win = FakeWindow()
+        scheduler = Scheduler(win, fps=1000, steps_per_frame=10)
+        self.assertTrue(asyncio.run(scheduler.run_async(iter(range(95)))))
+        self.assertTrue(scheduler.done)
+        self.assertEqual(scheduler.frames, 10)
+
+        # Another coroutine runs between the frames and can close the window
+        async def main():
+            return await asyncio.gather(scheduler.run_async(itertools.count()), close_after(win, 0.05))
+        self.assertEqual(asyncio.run(main())[0], False)
+        self.assertFalse(scheduler.done)
+        self.assertGreater(scheduler.frames, 1)
+
+    def test_window_post_from_thread(self):
+        try:
+            from tkinter import TclError
+        except ImportError:
+            self.skipTest("no tkinter")
+        try:
+            win = Window(100, 100)
+        except TclError:
+            self.skipTest("no display")
+        calls = []
+
+        def work():
+            for n in range(100):
+                win.post(calls.append, n)
+            win.post(win.close)
+
+        worker = threading.Thread(target=work)
+        win.after(0, worker.start)
+        win.wait_for_close()
+        self.assertEqual(calls, list(range(100)))
+        self.assertTrue(win.closed)
+
+    def test_headless_import_budget(self):
+        # The model, generators, solvers and scheduler import without the GUI module, tkinter or asyncio
+        code = ("import core.maze, core.generators, core.solvers, core.scheduler, sys; "
+                "print([m for m in ('core.gui', 'tkinter', 'asyncio') if m in sys.modules])")
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+        # The cumulative import time of the core packages, summed over the top level imports, stays within the budget
+        cumulative_us = 0
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].startswith(" core.") and fields[1].strip().isdigit():
+                cumulative_us += int(fields[1])
+        self.assertGreater(cumulative_us, 0)
+        self.assertLess(cumulative_us, HEADLESS_IMPORT_BUDGET_US)
+
+    def test_bench_run_and_compare(self):
+        results = bench.run_benchmarks(sizes=[(8, 6)], seeds=[1, 2], generators=["backtracker"], solvers=["bfs"], render=False)
+        cases = [(result["case"], result["variant"]) for result in results["results"]]
+        self.assertEqual(cases, [("construct", None), ("generate", "backtracker"), ("solve", "bfs"),
+                                 ("query", "exit"), ("query", "pairs")])
+        self.assertIsNotNone(results["results"][1]["peak_bytes"])
+        self.assertGreater(results["results"][1]["cells_per_s"], 0)
+        self.assertGreater(results["results"][3]["queries_per_s"], 0)
+
+        slower = json.loads(json.dumps(results))
+        slower["results"][2]["time_s"] *= 2
+        comparison = bench.compare_results(results, slower, threshold=0.5)
+        self.assertEqual([row["regression"] for row in comparison], [False, False, True, False, False])
+
+    def test_maze_save_load(self):
+        m1 = Maze(0, 0, 30, 40, 10, 10, seed=9, algorithm="sidewinder")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "maze.bin")
+            m1.save(path)
+            self.assertEqual(os.path.getsize(path), 48 + 30 * 40)
+            for use_mmap in (True, False):
+                m2 = Maze.load(path, use_mmap=use_mmap)
+                self.assertEqual(bytes(m2._grid.walls), bytes(m1._grid.walls))
+                self.assertEqual((m2._num_cols, m2._num_rows, m2._seed, m2._algorithm, m2._backend),
+                                 (40, 30, 9, "sidewinder", "python"))
+                self.assertEqual(m2.solve("bfs").path, m1.solve("bfs").path)
+                del m2
+
+            # Changing a memory-mapped maze does not change the file
+            m3 = Maze.load(path)
+            m3._cells[0][0].has_left_wall = True
+            del m3
+            self.assertEqual(bytes(Maze.load(path, use_mmap=False)._grid.walls), bytes(m1._grid.walls))
+
+            with open(path, "r+b") as file:
+                file.write(b"NOPE")
+            with self.assertRaises(ValueError):
+                Maze.load(path)
+
+    def test_maze_rng_per_instance(self):
+        expected = {seed: bytes(Maze(0, 0, 20, 30, 10, 10, seed=seed)._grid.walls) for seed in range(8)}
+        # Using the random module in between does not change the mazes
+        random.seed(0)
+        random.random()
+        self.assertEqual(bytes(Maze(0, 0, 20, 30, 10, 10, seed=3)._grid.walls), expected[3])
+        # Neither does building them concurrently
+        def build(seed):
+            random.seed(seed + 100)
+            return bytes(Maze(0, 0, 20, 30, 10, 10, seed=seed)._grid.walls)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(dict(zip(range(8), executor.map(build, range(8)))), expected)
+        # Regenerating with a seed gives the same maze as creating it with that seed
+        m1 = Maze(0, 0, 20, 30, 10, 10, seed=1)
+        m1.generate(seed=5)
+        self.assertEqual(bytes(m1._grid.walls), expected[5])
+
+    def test_random_block(self):
+        draws = RandomBlock(random.Random(2), block_size=8)
+        values = [draws.below(3) for _ in range(100)]
+        self.assertEqual(set(values), {0, 1, 2})
+        draws = RandomBlock(random.Random(2), block_size=8)
+        self.assertEqual([draws.choice([0, 1, 2]) for _ in range(100)], values)
+        # The values are the little-endian 16-bit words of the generator's bytes, whatever the host
+        data = random.Random(2).randbytes(16)
+        self.assertEqual(list(RandomBlock(random.Random(2), block_size=8).next_block()),
+                         [int.from_bytes(data[n:n + 2], "little") for n in range(0, 16, 2)])
+
+    def test_chunked_maze(self):
+        c1 = ChunkedMaze(3, tiles_x=4, tiles_y=3, tile_cols=8, tile_rows=6, cache_tiles=4)
+        m1 = c1.view(0, 0, 32, 18)
+        self.assert_perfect_maze(m1)
+        self.assertLessEqual(len(c1._tiles), 4)
+        self.assertGreater(c1.evictions, 0)
+        # Tiles are rebuilt identically after eviction, and regions match the whole maze
+        expected = b"".join(m1._grid.walls[j * 32 + 5:j * 32 + 25] for j in range(4, 13))
+        self.assertEqual(bytes(c1.region(5, 4, 20, 9).walls), expected)
+        self.assertEqual(bytes(ChunkedMaze(3, 4, 3, 8, 6, cache_tiles=1).region(5, 4, 20, 9).walls), expected)
+        # The streamed path is the shortest path through the whole maze
+        for start, goal in (((0, 0), None), ((30, 2), (1, 17)), ((9, 9), (9, 9))):
+            k_start = start[1] * 32 + start[0]
+            k_goal = goal[1] * 32 + goal[0] if goal is not None else None
+            expected = solvers.solve(m1._grid, "bfs", k_start, k_goal).coordinates()
+            self.assertEqual(c1.solve(start, goal), expected)
+
+    def test_chunked_maze_unbounded(self):
+        c1 = ChunkedMaze(5, tile_cols=16, tile_rows=16, cache_tiles=8)
+        coords = c1.solve((0, 0), (300, 200))
+        self.assertEqual(coords[:2].tolist(), [0, 0])
+        self.assertEqual(coords[-2:].tolist(), [300, 200])
+        self.assertEqual(coords.typecode, solvers.SolveResult("bfs", array("I"), 0, 0.0, 1).coordinates().typecode)
+        self.assertLessEqual(len(c1._tiles), 8)
+        with self.assertRaises(ValueError):
+            c1.solve()
+        with self.assertRaises(IndexError):
+            c1.cell_walls(-1, 0)
+
+    def test_maze_index_queries(self):
+        m1 = Maze(0, 0, 20, 30, 10, 10, seed=6)
+        index = m1.index()
+        self.assertIs(m1.index(), index)
+        self.assertEqual(len(index.neighbors), 2 * (m1._grid.size - 1))
+        self.assertEqual(m1.query().path, m1.solve("bfs").path)
+        grid = m1._grid
+        for start, goal in (((3, 15), (27, 2)), ((29, 19), (0, 0)), ((4, 4), (4, 4))):
+            expected = solvers.solve(grid, "bfs", grid.index(*start), grid.index(*goal)).path
+            self.assertEqual(m1.query(start, goal).path, expected)
+
+        # Changing a wall rebuilds the index, walling in the exit disconnects every other cell from it
+        m1._cells[-1][-1].has_top_wall = True
+        m1._cells[-1][-1].has_left_wall = True
+        m1._cells[-1][-2].has_bottom_wall = True
+        m1._cells[-2][-1].has_right_wall = True
+        self.assertIsNot(m1.index(), index)
+        self.assertFalse(m1.query())
+
+    def test_maze_query_batch(self):
+        m1 = Maze(0, 0, 20, 30, 10, 10, seed=6)
+        grid = m1._grid
+        rng = random.Random(3)
+        starts = array("I")
+        goals = array("I")
+        for _ in range(50):
+            starts.extend((rng.randrange(30), rng.randrange(20)))
+            goals.extend((rng.randrange(30), rng.randrange(20)))
+        starts.extend(starts[:4])  # Repeated starts share their paths too
+
+        to_exit = m1.query_batch(starts)
+        between = m1.query_batch(starts[:100], goals)
+        self.assertEqual((len(to_exit), len(between)), (52, 50))
+        for n in range(52):
+            start = (starts[2 * n], starts[2 * n + 1])
+            self.assertEqual(to_exit.path(n), m1.query(start).path)
+            if n < 50:
+                self.assertEqual(between.path(n), m1.query(start, (goals[2 * n], goals[2 * n + 1])).path)
+        self.assertEqual(list(to_exit.lengths()), [len(to_exit.path(n)) for n in range(52)])
+        coords = to_exit.coordinates()
+        self.assertEqual(len(coords), 2 * len(to_exit.cells))
+        self.assertEqual(coords[:2], starts[:2])
+        self.assertEqual(tuple(coords[-2:]), (29, 19))
+        with self.assertRaises(ValueError):
+            m1.query_batch(starts, goals)
+
+        # A start cut off from the exit gets an empty path
+        grid.walls[0] = 15
+        grid.walls[1] |= LEFT_WALL
+        grid.walls[30] |= TOP_WALL
+        grid.version += 1
+        batch = m1.query_batch([0, 0, 1, 0])
+        self.assertEqual(list(batch.offsets[:2]), [0, 0])
+        self.assertEqual(batch.path(1), m1.query((1, 0)).path)
+
+    def test_maze_incremental_edits(self):
+        class FakeRenderer:
+            # Records the path lines drawn and erased
+            def __init__(self):
+                self.lines = set()
+                self.erased = 0
+            def update_cell(self, grid, i, j):
+                pass
+            def draw_path(self, num_cols, path):
+                self.lines.update(zip(path, path[1:]))
+            def erase_path(self, path):
+                self.erased += len(path) - 1 if path else 0
+                self.lines.difference_update(zip(path, path[1:]))
+
+        m1 = Maze(0, 0, 20, 30, 10, 10, seed=8)
+        renderer = FakeRenderer()
+        m1._renderer = renderer
+        index = m1.index()
+        m1.show_path()
+        rng = random.Random(2)
+        for _ in range(300):
+            i, j = rng.randrange(29), rng.randrange(19)
+            neighbor = (i + 1, j) if rng.random() < 0.5 else (i, j + 1)
+            if rng.random() < 0.6:
+                m1.open_wall((i, j), neighbor)
+            else:
+                m1.close_wall((i, j), neighbor)
+
+            # The repaired index is still the cached one and matches a new search
+            self.assertIs(m1.index(), index)
+            expected = MazeIndex(m1._grid)
+            self.assertEqual(index.distance, expected.distance)
+            self.assertEqual(index.neighbors, expected.neighbors)
+            for k, p in enumerate(index.parent):
+                if k != index.root and p >= 0:
+                    self.assertEqual(index.distance[p], index.distance[k] - 1)
+                    self.assertIn(p, index._open_neighbors(k))
+            path = index.path_to_root(0)
+            self.assertEqual(renderer.lines, set(zip(path, path[1:])))
+
+        # Closing a passage of a perfect maze only searches the subtree it cuts off
+        m1 = Maze(0, 0, 40, 40, 10, 10, seed=8)
+        index = m1.index()
+        k = index.parent[0]
+        self.assertEqual(m1.close_wall((0, 0), divmod(k, 40)[::-1]), 1)
+        self.assertEqual(index.distance[0], -1)
+        self.assertFalse(m1.query())
+        self.assertEqual(m1.open_wall((0, 0), divmod(k, 40)[::-1]), 1)
+        self.assertEqual(m1.query().path, solvers.solve(m1._grid, "bfs").path)
+        self.assertEqual(m1.open_wall((0, 0), divmod(k, 40)[::-1]), 0)
+        with self.assertRaises(ValueError):
+            m1.open_wall((0, 0), (1, 1))
+
+        # Cells cut off from the exit together are still connected to each other
+        m1 = Maze(0, 0, 40, 40, 10, 10, seed=8)
+        index = m1.index()
+        chain = [0]
+        for _ in range(6):
+            chain.append(index.parent[chain[-1]])
+        cut = chain.pop()
+        m1.close_wall(divmod(chain[-1], 40)[::-1], divmod(cut, 40)[::-1])
+        self.assertEqual((index.distance[0], index.distance[chain[-1]]), (-1, -1))
+        self.assertEqual(list(m1.query((0, 0), divmod(chain[-1], 40)[::-1]).path), chain)
+        batch = m1.query_batch([0, 0, *divmod(chain[-1], 40)[::-1]], [*divmod(chain[-1], 40)[::-1], 39, 39])
+        self.assertEqual(list(batch.path(0)), chain)
+        self.assertEqual(len(batch.path(1)), 0)
+        self.assertEqual(list(index.path(chain[-1], chain[-1])), [chain[-1]])
+
+    def test_bitboard(self):
+        m1 = Maze(0, 0, 20, 30, 10, 10, seed=6)
+        grid = m1._grid
+        # Knock down a few more walls so there are loops and several shortest paths
+        for k in range(0, grid.size - 31, 37):
+            grid.set_wall(k, RIGHT_WALL, False)
+            grid.set_wall(k + 1, LEFT_WALL, False)
+            grid.set_wall(k, BOTTOM_WALL, False)
+            grid.set_wall(k + 30, TOP_WALL, False)
+        board = BitBoard(grid)
+        index = MazeIndex(grid, root=0)
+        for goal in (0, 1, 29, 45, 570, grid.size - 1):
+            self.assertEqual(board.distance(0, goal), index.distance[goal])
+        self.assertEqual(board.count(board.reachable(0)), grid.size)
+        self.assertEqual(sum(map(board.count, board.frontiers(0))), grid.size)
+
+        # The paths are shortest and only go through open passages
+        for start, goal in ((0, grid.size - 1), (45, 570), (570, 45), (29, 29)):
+            path, cells = board.search(start, goal)
+            self.assertEqual((path[0], path[-1]), (start, goal))
+            self.assertEqual(len(path) - 1, MazeIndex(grid, root=start).distance[goal])
+            for k, n in zip(path, path[1:]):
+                self.assertIn(n, index._open_neighbors(k))
+            self.assertLessEqual(board.count(cells), grid.size)
+
+        # Walling in the bottom right cell cuts it off from the rest
+        grid.walls[-1] = 15
+        grid.walls[-2] |= RIGHT_WALL
+        grid.walls[-31] |= BOTTOM_WALL
+        board = BitBoard(grid)
+        self.assertEqual(board.distance(0, grid.size - 1), -1)
+        self.assertEqual(len(board.search(0, grid.size - 1)[0]), 0)
+        self.assertFalse(solvers.solve(grid, "bitboard"))
+        reached = board.to_bitmap(board.reachable(0))
+        self.assertEqual(len(reached), len(grid.visited))
+        index = MazeIndex(grid, root=0)
+        self.assertEqual(board.count(board.reachable(0)), sum(1 for d in index.distance if d >= 0))
+        self.assertFalse(reached[-1] & (1 << ((grid.size - 1) & 7)))
+        self.assertEqual(board.reachable(grid.size - 1), 1 << (grid.size - 1))
+
+    def test_maze_save_image(self):
+        m1 = Maze(0, 0, 6, 8, 10, 10, seed=1)
+        result = m1.solve("dfs")
+        ppm = io.BytesIO()
+        m1.save_image(ppm, cell_size=4, result=result, show_visited=True, image_format="ppm")
+        header = b"P6\n33 25\n255\n"
+        self.assertTrue(ppm.getvalue().startswith(header))
+        pixels = ppm.getvalue()[len(header):]
+        self.assertEqual(len(pixels), 33 * 25 * 3)
+        pixel = lambda x, y: pixels[(y * 33 + x) * 3:(y * 33 + x) * 3 + 3]
+        self.assertEqual(pixel(0, 0), raster.parse_color("white"))  # Corner post
+        self.assertEqual(pixel(0, 2), raster.parse_color("black"))  # Entrance
+        self.assertEqual(pixel(2, 2), raster.parse_color("red"))  # Start of the path
+        self.assertEqual(pixel(30, 24), raster.parse_color("black"))  # Exit
+
+        # The PNG holds the same rows, each after a filter type byte
+        png = io.BytesIO()
+        m1.save_image(png, cell_size=4, result=result, show_visited=True, image_format="png")
+        data = png.getvalue()
+        self.assertEqual(data[:8], raster.PNG_SIGNATURE)
+        chunks = {}
+        pos = 8
+        while pos < len(data):
+            length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+            chunks[kind] = chunks.get(kind, b"") + data[pos + 8:pos + 8 + length]
+            pos += 12 + length
+        self.assertEqual(struct.unpack(">II", chunks[b"IHDR"][:8]), (33, 25))
+        rows = zlib.decompress(chunks[b"IDAT"])
+        self.assertEqual(b"".join(rows[y * 100 + 1:(y + 1) * 100] for y in range(25)), pixels)
+
+        with self.assertRaises(ValueError):
+            m1.save_image("maze.gif")
+
+        # Marking the path and the visited cells takes memory per row, not per cell of the maze
+        m1 = Maze(0, 0, 500, 500, 1, 1, seed=1, algorithm="binary_tree")
+        result = m1.solve("dfs")
+        class Discard:
+            def write(self, data):
+                pass
+        tracemalloc.start()
+        m1.save_image(Discard(), cell_size=2, result=result, show_visited=True, image_format="ppm")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertLess(peak, m1._grid.size)
+
+    def test_stream_maze(self):
+        for cols, rows in ((8, 6), (1, 5), (5, 1)):
+            m1 = Maze(0, 0, rows, cols, 10, 10, seed=4, algorithm="eller")
+            self.assertEqual(b"".join(stream_rows(cols, rows, seed=4)), m1._grid.walls)
+
+        binary = io.BytesIO()
+        text = io.StringIO()
+        ppm = io.BytesIO()
+        stream_maze(8, 6, [BinarySink(binary, seed=4), AsciiSink(text), PPMSink(ppm, cell_size=4)], seed=4)
+        m1 = Maze(0, 0, 6, 8, 10, 10, seed=4, algorithm="eller")
+        self.assertEqual(binary.getvalue()[storage.HEADER.size:], m1._grid.walls)
+        self.assertEqual(storage.MazeHeader.unpack(binary.getvalue()).seed, 4)
+        lines = text.getvalue().splitlines()
+        self.assertEqual(len(lines), 2 * 6 + 1)
+        self.assertEqual(lines[0], "+--" * 8 + "+")
+        self.assertTrue(lines[1].startswith(" "))  # Entrance
+        self.assertTrue(lines[-1].endswith("+  +"))  # Exit
+        expected = io.BytesIO()
+        m1.save_image(expected, cell_size=4, image_format="ppm")
+        self.assertEqual(ppm.getvalue(), expected.getvalue())
+
+    def test_lod_renderer(self):
+        class FakeCanvas:
+            # Records scheduled renders and the images shown
+            def __init__(self):
+                self.idle = []
+                self.images = []
+            def bind(self, sequence, callback):
+                pass
+            def after_idle(self, callback):
+                self.idle.append(callback)
+            def create_image(self, x, y, anchor, image):
+                self.images.append(image)
+                return 1
+            def itemconfigure(self, item, image):
+                self.images.append(image)
+
+        def run_idle(canvas):
+            while canvas.idle:
+                canvas.idle.pop(0)()
+
+        m1 = Maze(0, 0, 400, 500, 1, 1, seed=5, algorithm="binary_tree")
+        canvas = FakeCanvas()
+        fake_tkinter = types.SimpleNamespace(PhotoImage=lambda master, data, format: data)
+        with mock.patch.dict(sys.modules, tkinter=fake_tkinter):
+            renderer = LODRenderer(canvas, 10, 20, 1.0, 1.0)
+            renderer.draw(m1._grid)
+            renderer.update_cell(m1._grid, 3, 3)
+            self.assertEqual(len(canvas.idle), 1)  # Changes are drawn once
+            run_idle(canvas)
+
+            # Zoomed out, every other cell is drawn at 2 pixels
+            self.assertEqual(renderer.viewport(), (range(0, 500, 2), range(0, 400, 2), 2))
+            self.assertTrue(canvas.images[-1].startswith(b"P6\n501 401\n255\n"))
+
+            # Zooming keeps the cell under the pointer in place, panning moves the view by whole pixels
+            renderer.zoom(8, 10 + 200, 20 + 100)
+            columns, rows, cell_size = renderer.viewport()
+            self.assertEqual((columns.start, rows.start, columns.step, cell_size), (175, 87, 1, 8))
+            renderer.pan(-80, -40)
+            self.assertEqual(renderer.viewport()[:2], (range(185, 248), range(92, 143)))  # Half a cell of row 142 is in view
+            renderer.pan(10000, 10000)
+            self.assertEqual(renderer.viewport()[:2], (range(0, 63), range(0, 50)))
+            renderer.draw_path(500, m1.solve("bfs").path)
+            run_idle(canvas)
+            expected = raster.RegionRasterizer(m1._grid, range(0, 63), range(0, 50), 8, path=m1.solve("bfs").path)
+            self.assertEqual(canvas.images[-1], raster.ppm_bytes(expected))
+            self.assertEqual(renderer.renders, 2)
+
+            # Separate moves are not joined to each other, even between open neighbors
+            renderer.erase_path(m1.solve("bfs").path)
+            renderer.draw_moves(500, [(0, 1, False), (2, 3, False)])
+            run_idle(canvas)
+            header = b"P6\n505 401\n255\n"
+            pixels = canvas.images[-1][len(header):]
+            pixel = lambda x, y: pixels[(y * 505 + x) * 3:(y * 505 + x) * 3 + 3]
+            self.assertFalse(m1._grid.has_wall(2, LEFT_WALL))
+            self.assertEqual(pixel(8, 4), raster.parse_color(PATH_COLOR))  # Between cells 0 and 1
+            self.assertEqual(pixel(16, 4), raster.parse_color(WINDOW_BG_COLOR))  # Between cells 1 and 2
+            self.assertEqual(pixel(24, 4), raster.parse_color(PATH_COLOR))  # Between cells 2 and 3
+
+            # Zooming out stops at the whole maze
+            renderer.zoom(0.01, 0, 0)
+            self.assertEqual(renderer.viewport(), (range(0, 500, 2), range(0, 400, 2), 2))
+
+    def test_event_log_replay(self):
+        for algorithm in ("backtracker", "binary_tree"):
+            m1 = Maze(0, 0, 10, 12, 10, 10, seed=3, generate=False)
+            log = EventLog(12, 10)
+            m1.generate(algorithm, log=log)
+            ops = [op for op, _, _, _ in log]
+            self.assertEqual(ops.count(WALL_BROKEN), 12 * 10 - 1)  # One wall per passage of a perfect maze
+            self.assertEqual(m1._grid.walls, Maze(0, 0, 10, 12, 10, 10, seed=3, algorithm=algorithm)._grid.walls)
+            generated = len(log)
+            if algorithm == "backtracker":
+                # Every cell is visited once and backtracked from once, each visit after the wall broken to reach it
+                self.assertEqual(ops.count(CELL_VISITED), 2 * 12 * 10)
+                self.assertEqual(log[0], (CELL_VISITED, 0, 0, 0))
+                for n, (op, i, j, direction) in enumerate(log):
+                    if op == WALL_BROKEN:
+                        k = neighbor(12, j * 12 + i, direction)
+                        self.assertEqual(log[n + 1], (CELL_VISITED, k % 12, k // 12, 0))
+
+                # Replaying redraws the cells like the generation did
+                class FakeRenderer:
+                    def __init__(self):
+                        self.updates = []
+                    def draw(self, grid):
+                        pass
+                    def clear_moves(self):
+                        pass
+                    def draw_moves(self, num_cols, moves):
+                        pass
+                    def update_cell(self, grid, i, j):
+                        self.updates.append((i, j))
+                class FakeWindow:
+                    def maze_renderer(self, x1, y1, cell_size_x, cell_size_y):
+                        self.renderer = FakeRenderer()
+                        return self.renderer
+                win = FakeWindow()
+                player = Player(log, win)
+                player.step(generated)
+                self.assertEqual(len(win.renderer.updates), len(log))
+                self.assertEqual(set(win.renderer.updates), {(i, j) for i in range(12) for j in range(10)})
+                self.assertEqual(player.grid.walls, m1._grid.walls)
+            result = m1.solve("dfs", log=log)
+            self.assertEqual(log[generated], (CELL_VISITED, 0, 0, 0))
+            ops = [op for op, _, _, _ in log]
+            self.assertEqual(ops.count(MOVE) - ops.count(BACKTRACK), len(result.path) - 1)
+
+            # Replaying gives the same walls, and the moves not backtracked are the path
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "maze.events")
+                log.save(path)
+                player = Player(EventLog.load(path))
+            player.skip_to_end()
+            self.assertEqual(player.grid.walls, m1._grid.walls)
+            forward = [move for move, undo in player.moves.items() if not undo]
+            self.assertEqual(forward, list(zip(result.path, result.path[1:])))
+
+            # Seeking back and stepping forward again ends in the same state
+            player.seek(generated // 2)
+            self.assertEqual(player.position, generated // 2)
+            self.assertEqual(player.moves, {})
+            self.assertEqual(len(list(player.steps())), len(log) - generated // 2)
+            self.assertEqual(player.grid.walls, m1._grid.walls)
+            self.assertEqual(list(player.steps()), [])
+
+    def test_maze_stats(self):
+        self.assertIsNone(Maze(0, 0, 10, 12, 10, 10, seed=1).stats())
+        stats = Stats()
+        m1 = Maze(0, 0, 10, 12, 10, 10, seed=1, stats=stats)
+        result = m1.solve("bfs")
+        summary = m1.stats()
+        self.assertEqual(summary["cells_visited"], 12 * 10)
+        self.assertEqual(summary["walls_broken"], 12 * 10 - 1)
+        self.assertEqual((summary["solves"], summary["cells_expanded"]), (1, result.nodes_expanded))
+        self.assertGreater(summary["generate_s"], 0)
+        self.assertAlmostEqual(summary["compute_s"], summary["generate_s"] + summary["solve_s"])
+        m1.solve("dfs", log=EventLog(12, 10))  # Through solve_steps(), counted once
+        self.assertEqual(m1.stats()["solves"], 2)
+
+    def test_generate_batch(self):
+        results = generate_batch([5, 3, 8], 10, 12, workers=2)
+        self.assertEqual([result.seed for result in results], [5, 3, 8])
+        for result in results:
+            m1 = Maze(0, 0, 10, 12, 10, 10, seed=result.seed)
+            self.assertEqual(result.walls, bytes(m1._grid.walls))
+            self.assertEqual(result.path, m1.solve("bfs").path)
+            self.assertEqual(bytes(result.to_maze()._grid.walls), result.walls)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file